@@ -0,0 +1,63 @@
+"""
+Measure the memory a parsed program keeps alive, per AST node, on a large
+generated program.
+
+Run from the repository root:
+    python -m benchmarks.ast_memory
+"""
+import gc
+import tracemalloc
+
+from project_code.abstract_syntax_tree import iter_nodes
+from project_code.lexer import Lexer
+from project_code.parser_ import Parser
+
+NUM_FUNCS = 2000
+
+
+def generate_program(num_funcs):
+    lines = []
+
+    for i in range(num_funcs):
+        lines += [
+            f"func(int) f{i}(var(int) n, var(str) label = \"f{i}\") {{",
+            f"    var(int) acc = {i}, stride = n // 3 + 1;",
+            "    for (var(int) i from 0 to n step stride) {",
+            "        if (i % 2 == 0 and not (i > 100)) {",
+            "            acc += i * 3 - 1 + acc // 7;",
+            "        } elseif (i == 5) {",
+            "            continue;",
+            "        } else {",
+            "            acc -= len(label[0:2]) + i;",
+            "        }",
+            "    }",
+            "    return acc;",
+            "}",
+            f"println(f{i}({i}));",
+        ]
+
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    text = generate_program(NUM_FUNCS)
+
+    gc.collect()
+    tracemalloc.start()
+
+    tree = Parser(Lexer(text), lazy_func_bodies=False).parse()
+
+    gc.collect()
+    retained_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    num_nodes = sum(1 for _ in iter_nodes(tree))
+
+    print(f"Program:        {text.count(chr(10))} lines")
+    print(f"AST nodes:      {num_nodes}")
+    print(f"Retained:       {retained_bytes / 2**20:.2f} MiB")
+    print(f"Bytes per node: {retained_bytes / num_nodes:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare a full parse with an incremental re-parse after single-character edits
+on a generated program of about 50k lines.
+
+Run from the repository root:
+    python -m benchmarks.incremental_parsing
+"""
+import random
+import time
+
+from project_code.incremental import IncrementalParser
+from project_code.lexer import Lexer
+from project_code.parser_ import Parser
+
+NUM_FUNCS = 5000
+NUM_EDITS = 200
+
+
+def generate_program(num_funcs):
+    lines = []
+
+    for i in range(num_funcs):
+        lines += [
+            f"func(int) f{i}(var(int) n) {{",
+            f"    var(int) acc = {i};",
+            "    for (var(int) i from 0 to n) {",
+            "        if (i % 2 == 0) {",
+            "            acc += i * 3 - 1;",
+            "        } else {",
+            "            acc -= i // 2;",
+            "        }",
+            "    }",
+            "    return acc;",
+            "}",
+        ]
+
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    text = generate_program(NUM_FUNCS)
+    print(f"Program: {text.count(chr(10))} lines, {len(text)} characters")
+
+    start = time.perf_counter()
+    Parser(Lexer(text)).parse()
+    full_parse_time = time.perf_counter() - start
+    print(f"Full parse:                {full_parse_time * 1000:10.2f} ms")
+
+    incremental_parser = IncrementalParser(text)
+    rng = random.Random(0)
+    digit_offsets = [i for i, char in enumerate(text) if char.isdigit()]
+
+    for label, inserted_text in (("digit", "7"), ("newline", "\n")):
+        start = time.perf_counter()
+
+        for _ in range(NUM_EDITS):
+            text = incremental_parser.text
+            offset = rng.choice(digit_offsets)
+
+            if inserted_text == "\n":
+                # Break the line right after a semicolon, and join it back up.
+                offset = text.index(";", offset) + 1
+                incremental_parser.edit(offset, 0, inserted_text)
+                incremental_parser.edit(offset, 1, "")
+            else:
+                incremental_parser.edit(offset, 1, inserted_text)
+
+        edit_count = NUM_EDITS * (2 if inserted_text == "\n" else 1)
+        edit_time = (time.perf_counter() - start) / edit_count
+        print(
+            f"Incremental {label + ' edit:':14}{edit_time * 1000:10.2f} ms"
+            f"  ({full_parse_time / edit_time:.0f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare string functions written in Compact, with a loop over the characters,
+against the native built-in functions on a 1 MB string.
+
+Run from the repository root:
+    python -m benchmarks.string_builtins
+"""
+import contextlib
+import io
+import time
+
+from project_code.interpreter import Interpreter
+from project_code.lexer import Lexer
+from project_code.parser_ import Parser
+from project_code.semantic_analysis import SemanticAnalyzer
+
+TEXT_SETUP = 'var(str) text = "abcdefghij" * 100000 + "z";'
+
+COMPACT_FUNCS = """
+func(int) countChar(var(str) word, var(str) charToCheck) {
+    var(int) num = 0;
+
+    for (var(str) char from word) {
+        if (char == charToCheck) {
+            num += 1;
+        }
+    }
+
+    return num;
+}
+
+func(int) findChar(var(str) word, var(str) charToFind) {
+    var(int) index = 0;
+
+    for (var(str) char from word) {
+        if (char == charToFind) {
+            return index;
+        }
+
+        index += 1;
+    }
+
+    return -1;
+}
+"""
+
+CASES = (
+    ("count", 'println(countChar(text, "a"));', 'println(count(text, "a"));'),
+    ("find", 'println(findChar(text, "z"));', 'println(find(text, "z"));'),
+)
+
+
+def run_program(text):
+    """
+    Return the output of the program and the time it took to run it, without
+    the time to parse and check it.
+    """
+    tree = Parser(Lexer(text)).parse()
+    SemanticAnalyzer().visit(tree)
+    output = io.StringIO()
+
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(output):
+        Interpreter(tree).interpret()
+
+    return output.getvalue(), time.perf_counter() - start
+
+
+def main():
+    for name, compact_call, native_call in CASES:
+        compact_output, compact_time = run_program(
+            "\n".join((COMPACT_FUNCS, TEXT_SETUP, compact_call))
+        )
+        native_output, native_time = run_program("\n".join((TEXT_SETUP, native_call)))
+        assert compact_output == native_output, (compact_output, native_output)
+
+        print(
+            f"{name + ':':7}Compact loop {compact_time * 1000:10.2f} ms, "
+            f"native {native_time * 1000:8.2f} ms"
+            f"  ({compact_time / native_time:.0f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import argparse
 import os
 import sys
 
+from project_code import embedding
 from project_code.error import (
     LexerError,
     ParserError,
@@ -8,18 +10,57 @@ from project_code.error import (
     InterpreterError,
 )
 from project_code.interpreter import Interpreter
-from project_code.lexer import Lexer
-from project_code.parser_ import Parser
-from project_code.semantic_analysis import SemanticAnalyzer
-
-
-def open_program_file():
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <filename>.co")
-        sys.exit(1)
-
-    filename = sys.argv[1]
-
+from project_code.output import OutputBuffer
+from project_code.program_cache import ProgramCache
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(
+        description="Run a program written in Compact."
+    )
+    arg_parser.add_argument("filename", help="path of the <filename>.co file")
+    arg_parser.add_argument(
+        "--eager",
+        action="store_true",
+        help="parse and check every function body up front, including the ones "
+        "that are never called (useful in CI)",
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        help="directory for the cached checked programs (default: a __cocache__ "
+        "directory next to each program)",
+    )
+    arg_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always lex, parse and check the program, and do not cache it",
+    )
+    arg_parser.add_argument(
+        "--no-vectorize",
+        action="store_true",
+        help="interpret every loop, even when NumPy could run it in one batch",
+    )
+    arg_parser.add_argument(
+        "--output-buffer",
+        type=int,
+        default=OutputBuffer.DEFAULT_SIZE,
+        metavar="SIZE",
+        help="number of printed characters buffered before they are written "
+        f"(default: {OutputBuffer.DEFAULT_SIZE})",
+    )
+    arg_parser.add_argument(
+        "--flush",
+        choices=OutputBuffer.FLUSH_POLICIES,
+        default=OutputBuffer.AUTO,
+        help="when else the output is written: at the end of every line, only "
+        "when the buffer is full or before a prompt, or at the end of every "
+        "line if the output is a terminal (default: auto)",
+    )
+
+    return arg_parser.parse_args()
+
+
+def open_program_file(filename):
     if os.path.splitext(filename)[1] != ".co":
         print("Error: File must be a .co file.")
         sys.exit(1)
@@ -36,32 +77,40 @@ def open_program_file():
     return text
 
 
-def main():
-    text = open_program_file()
-
-    if not text:
-        return
-
-    lexer = Lexer(text)
-
+def check_program(text, eager):
     try:
-        parser = Parser(lexer)
-        tree = parser.parse()
-    except (LexerError, ParserError) as l_p_error:
-        print(l_p_error.message)
-        sys.exit(1)
-
-    try:
-        semantic_analyzer = SemanticAnalyzer()
-        semantic_analyzer.visit(tree)
-    except SemanticError as s_error:
-        print(s_error.message)
+        return embedding.check_program(text, eager)
+    except (LexerError, ParserError, SemanticError) as error:
+        print(error.message)
         sys.exit(1)
     except NotImplementedError as n_error:
         print(n_error)
         sys.exit(1)
 
-    interpreter = Interpreter(tree)
+
+def main():
+    args = parse_args()
+    text = open_program_file(args.filename)
+
+    if not text:
+        return
+
+    if args.no_cache:
+        tree = check_program(text, args.eager)
+    else:
+        program_cache = ProgramCache(args.cache_dir)
+        cache_key = ProgramCache.key(text, args.eager)
+        tree = program_cache.load(args.filename, cache_key)
+
+        if tree is None:
+            tree = check_program(text, args.eager)
+            program_cache.store(args.filename, cache_key, tree)
+
+    interpreter = Interpreter(
+        tree,
+        vectorize=not args.no_vectorize,
+        output=OutputBuffer(size=args.output_buffer, flush_policy=args.flush),
+    )
 
     try:
         interpreter.interpret()
@@ -0,0 +1,2 @@
+from .embedding import compile, Program, RunResult
+from .error import Error, LexerError, ParserError, SemanticError, InterpreterError
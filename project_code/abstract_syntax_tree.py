@@ -1,371 +1,711 @@
 class AST:
-    pass
+    """
+    Nodes keep their fields in __slots__ as plain attributes. A node does not
+    keep the tokens it was built from: where a node is reported in errors, its
+    source location is stored as the line and column ints of its token, and
+    read as "line" and "col".
 
+    The semantic analysis sets "type_", the name of the static type, on every
+    expression node it checks.
 
-class VarNode(AST):
-    def __init__(self, var_token):
-        self.__token = var_token
-        self.__val = var_token.val
+    The nodes of a top-level statement parsed by IncrementalParser share a
+    LocationShift, so that moving the statement after an edit does not touch
+    its nodes. Their locations are then resolved when they are read.
+    """
 
-    @property
-    def token(self):  # for reporting errors.
-        return self.__token
+    __slots__ = ()
 
-    @property
-    def val(self):
-        return self.__val
+    def attach_shift(self, location_shift):
+        """
+        Make the location of the node move with "location_shift".
+        """
 
 
-class FuncCallNode(AST):
-    def __init__(self, func_name, args, func_token, is_statement=None):
-        self.__func_name = func_name
-        self.__func_token = func_token
+class LocationShift(AST):
+    """
+    How far the nodes of a top-level statement have moved since it was parsed:
+    by "line_delta" lines, and by "col_delta" columns on "first_line", the line
+    it starts on as it was parsed.
+    """
 
-        self.__args = args
-        self.__is_statement = is_statement
+    __slots__ = ("line_delta", "col_delta", "first_line")
 
-    @property
-    def func_name(self):
-        return self.__func_name
+    def __init__(self):
+        self.line_delta = 0
+        self.col_delta = 0
+        self.first_line = None
+
+    def move(self, on_line, line_delta, col_delta):
+        """
+        Move the nodes as after a text edit that ended on "on_line", the line the
+        statement starts on: by "line_delta" lines, and by "col_delta" columns on
+        "on_line".
+        """
+        if col_delta:
+            self.first_line = on_line - self.line_delta
+            self.col_delta += col_delta
+
+        self.line_delta += line_delta
+
+    def shift_line(self, line):
+        return line + self.line_delta
+
+    def shift_col(self, line, col):
+        return col + self.col_delta if line == self.first_line else col
 
-    @property
-    def args(self):
-        return self.__args
+
+class LocatedNode(AST):
+    __slots__ = ("_line", "_col", "shift")
+
+    def __init__(self, token):
+        self._line = token.line
+        self._col = token.col
+        self.shift = None
 
     @property
-    def is_statement(self):
-        return self.__is_statement
+    def line(self):
+        if self.shift is None:
+            return self._line
+
+        return self.shift.shift_line(self._line)
 
     @property
-    def token(self):
-        return self.__func_token
+    def col(self):
+        if self.shift is None:
+            return self._col
+
+        return self.shift.shift_col(self._line, self._col)
+
+    def attach_shift(self, location_shift):
+        self.shift = location_shift
+
+
+def iter_nodes(ast_node):
+    """
+    Yield "ast_node" and every node below it, once each even if it has several
+    parents, like the target of a compound assignment. The body of a lazily
+    parsed function is only included once it has been parsed.
+    """
+    stack = [ast_node]
+    seen_node_ids = set()
+
+    while stack:
+        node = stack.pop()
+
+        if isinstance(node, AST):
+            if id(node) in seen_node_ids:
+                continue
+
+            seen_node_ids.add(id(node))
+            yield node
+            stack.extend(getattr(node, name) for name in _slot_names(type(node)))
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+
+
+_slot_names_by_class = {}
+
+
+def _slot_names(node_class):
+    """
+    The attribute names of the slots of "node_class", including the inherited
+    and the name-mangled ones.
+    """
+    slot_names = _slot_names_by_class.get(node_class)
+
+    if slot_names is None:
+        slot_names = _slot_names_by_class[node_class] = tuple(
+            f"_{cls.__name__}{name}" if name.startswith("__") else name
+            for cls in node_class.__mro__
+            for name in cls.__dict__.get("__slots__", ())
+        )
+
+    return slot_names
+
+
+class VarNode(LocatedNode):
+    __slots__ = ("val", "type_")
+
+    def __init__(self, var_token):
+        self._line = var_token.line
+        self._col = var_token.col
+        self.shift = None
+        self.val = var_token.val
+        self.type_ = None
+
+
+class FuncCallNode(LocatedNode):
+    __slots__ = ("func_name", "args", "is_statement", "type_")
+
+    def __init__(self, func_name, args, func_token, is_statement=None):
+        self._line = func_token.line
+        self._col = func_token.col
+        self.shift = None
+        self.func_name = func_name
+
+        self.args = args
+        self.is_statement = is_statement
+        self.type_ = None
 
 
 class AccessNode(AST):
+    __slots__ = ("accessor_node", "start_index_node", "end_index_node", "type_")
+
     def __init__(self, accessor_node, start_index_node, end_index_node=None):
-        self.__accessor_node = accessor_node
-        self.__start_index_node = start_index_node
-        self.__end_index_node = end_index_node
+        self.accessor_node = accessor_node
+        self.start_index_node = start_index_node
+        self.end_index_node = end_index_node
+        self.type_ = None
 
     @property
-    def accessor_node(self):
-        return self.__accessor_node
+    def line(self):  # for reporting errors.
+        return self.accessor_node.line
 
     @property
-    def start_index_node(self):
-        return self.__start_index_node
+    def col(self):
+        return self.accessor_node.col
 
-    @property
-    def end_index_node(self):
-        return self.__end_index_node
 
-    @property
-    def token(self):  # for reporting errors.
-        return self.__accessor_node.token
+class ArrayNode(LocatedNode):
+    __slots__ = ("element_nodes", "type_")
 
+    def __init__(self, left_bracket_token, element_nodes):
+        self._line = left_bracket_token.line
+        self._col = left_bracket_token.col
+        self.shift = None
+        self.element_nodes = element_nodes
+        self.type_ = None
 
-class NumberNode(AST):
-    def __init__(self, num_token):
-        self.__token = num_token
-        self.__val = num_token.val
 
-    @property
-    def token(self):  # for reporting errors.
-        return self.__token
+class NumberNode(LocatedNode):
+    __slots__ = ("val", "type_")
 
-    @property
-    def val(self):
-        return self.__val
+    def __init__(self, num_token):
+        self._line = num_token.line
+        self._col = num_token.col
+        self.shift = None
+        self.val = num_token.val
+        self.type_ = None
 
 
-class BoolNode(AST):
-    def __init__(self, bool_token):
-        self.__token = bool_token
-        self.__val = bool_token.val
+class BoolNode(LocatedNode):
+    __slots__ = ("val", "type_")
 
-    @property
-    def token(self):  # for reporting errors.
-        return self.__token
+    def __init__(self, bool_token):
+        self._line = bool_token.line
+        self._col = bool_token.col
+        self.shift = None
+        self.val = bool_token.val
+        self.type_ = None
 
-    @property
-    def val(self):
-        return self.__val
 
+class StrNode(LocatedNode):
+    __slots__ = ("val", "type_")
 
-class StrNode(AST):
     def __init__(self, str_token):
-        self.__token = str_token
-        self.__val = str_token.val
-
-    @property
-    def token(self):  # for reporting errors.
-        return self.__token
-
-    @property
-    def val(self):
-        return self.__val
+        self._line = str_token.line
+        self._col = str_token.col
+        self.shift = None
+        self.val = str_token.val
+        self.type_ = None
 
 
 class UnaryOpNode(AST):
+    __slots__ = ("op", "child_node", "_op_line", "_op_col", "shift", "type_")
+
     def __init__(self, op_token, child_node):
-        self.__op_token = op_token
-        self.__child_node = child_node
+        self.op = op_token.type_
+        self.child_node = child_node
+
+        self._op_line = op_token.line
+        self._op_col = op_token.col
+        self.shift = None
+        self.type_ = None
+
+    @property
+    def op_line(self):
+        if self.shift is None:
+            return self._op_line
+
+        return self.shift.shift_line(self._op_line)
 
     @property
-    def op_token(self):
-        return self.__op_token
+    def op_col(self):
+        if self.shift is None:
+            return self._op_col
+
+        return self.shift.shift_col(self._op_line, self._op_col)
 
     @property
-    def child_node(self):
-        return self.__child_node
+    def line(self):  # for reporting errors.
+        return self.child_node.line
 
     @property
-    def token(self):  # for reporting errors.
-        return self.__child_node.token
+    def col(self):
+        return self.child_node.col
+
+    def attach_shift(self, location_shift):
+        self.shift = location_shift
 
 
 class BinaryOpNode(AST):
+    __slots__ = (
+        "left_node",
+        "op",
+        "right_node",
+        "_op_line",
+        "_op_col",
+        "shift",
+        "type_",
+    )
+
     def __init__(self, left_node, op_token, right_node):
-        self.__left_node = left_node
-        self.__op_token = op_token
-        self.__right_node = right_node
+        """
+        The operator of a compound assignment, e.g. "+" in "a += b", is made up by
+        the parser and has no location.
+        """
+        self.left_node = left_node
+        self.op = op_token.type_
+        self.right_node = right_node
+
+        self._op_line = op_token.line
+        self._op_col = op_token.col
+        self.shift = None
+        self.type_ = None
 
     @property
-    def left_node(self):
-        return self.__left_node
+    def op_line(self):
+        if self.shift is None or self._op_line is None:
+            return self._op_line
+
+        return self.shift.shift_line(self._op_line)
 
     @property
-    def op_token(self):
-        return self.__op_token
+    def op_col(self):
+        if self.shift is None or self._op_line is None:
+            return self._op_col
+
+        return self.shift.shift_col(self._op_line, self._op_col)
 
     @property
-    def right_node(self):
-        return self.__right_node
+    def line(self):  # for reporting errors.
+        return self.left_node.line
 
     @property
-    def token(self):  # for reporting errors.
-        return self.__left_node.token
+    def col(self):
+        return self.left_node.col
 
+    def attach_shift(self, location_shift):
+        self.shift = location_shift
 
-class EmptyStatementNode(AST):
-    pass
 
+class NaryOpNode(AST):
+    """
+    A chain of binary operators of the same precedence, e.g. "a + b - c + d".
+    It is kept flat and evaluated left to right, so long generated chains do not
+    turn into deeply nested BinaryOpNodes.
 
-class AssignmentStatementNode(AST):
-    def __init__(self, left_node, op_token, right_node):
-        self.__left_node = left_node
-        self.__op_token = op_token
-        self.__right_node = right_node
+    The semantic analysis sets "op_kinds": for each operator, the index of its
+    type-specialized node class in BINARY_OP_NODES.
+    """
 
-    @property
-    def left_node(self):
-        return self.__left_node
+    __slots__ = (
+        "operand_nodes",
+        "ops",
+        "_op_lines",
+        "_op_cols",
+        "shift",
+        "op_kinds",
+        "type_",
+    )
 
-    @property
-    def op_token(self):
-        return self.__op_token
+    def __init__(self, binary_op_node):
+        """
+        Start the chain with the operator and the operands of "binary_op_node".
+        """
+        self.operand_nodes = [binary_op_node.left_node, binary_op_node.right_node]
+        self.ops = [binary_op_node.op]
 
-    @property
-    def right_node(self):
-        return self.__right_node
+        self._op_lines = [binary_op_node.op_line]
+        self._op_cols = [binary_op_node.op_col]
+        self.shift = None
 
+        self.op_kinds = None
+        self.type_ = None
 
-class ConditionalStatementNode(AST):
-    def __init__(self, if_cases, else_case):
-        self.__if_cases = if_cases
-        self.__else_case = else_case
+    def append(self, op_token, operand_node):
+        self.operand_nodes.append(operand_node)
+        self.ops.append(op_token.type_)
 
-    @property
-    def if_cases(self):
-        return self.__if_cases
+        self._op_lines.append(op_token.line)
+        self._op_cols.append(op_token.col)
 
     @property
-    def else_case(self):
-        return self.__else_case
+    def op_lines(self):
+        if self.shift is None:
+            return self._op_lines
 
+        return [self.shift.shift_line(op_line) for op_line in self._op_lines]
 
-class WhileStatementNode(AST):
-    def __init__(self, condition, statement_list_node):
-        self.__condition = condition
-        self.__statement_list_node = statement_list_node
+    @property
+    def op_cols(self):
+        if self.shift is None:
+            return self._op_cols
+
+        return [
+            self.shift.shift_col(op_line, op_col)
+            for op_line, op_col in zip(self._op_lines, self._op_cols)
+        ]
 
     @property
-    def condition(self):
-        return self.__condition
+    def line(self):  # for reporting errors.
+        return self.operand_nodes[0].line
 
     @property
-    def statement_list_node(self):
-        return self.__statement_list_node
+    def col(self):
+        return self.operand_nodes[0].col
 
+    def attach_shift(self, location_shift):
+        self.shift = location_shift
 
-class BreakStatementNode(AST):
-    def __init__(self, token):
-        self.__token = token
 
-    @property
-    def token(self):
-        return self.__token
+class EmptyStatementNode(AST):
+    __slots__ = ()
 
 
-class ContinueStatementNode(AST):
-    def __init__(self, token):
-        self.__token = token
+class AssignmentStatementNode(AST):
+    __slots__ = ("left_node", "op", "right_node")
 
-    @property
-    def token(self):
-        return self.__token
+    def __init__(self, left_node, op_token, right_node):
+        self.left_node = left_node
+        self.op = op_token.type_
+        self.right_node = right_node
 
 
-class RangeExprNode(AST):
-    def __init__(self, start_node, end_node, step_node):
-        self.__start_node = start_node
-        self.__end_node = end_node
-        self.__step_node = step_node
+class ConditionalStatementNode(AST):
+    __slots__ = ("if_cases", "else_case")
 
-    @property
-    def start_node(self):
-        return self.__start_node
+    def __init__(self, if_cases, else_case):
+        self.if_cases = if_cases
+        self.else_case = else_case
 
-    @property
-    def end_node(self):
-        return self.__end_node
 
-    @property
-    def step_node(self):
-        return self.__step_node
+class WhileStatementNode(AST):
+    __slots__ = ("condition", "statement_list_node")
 
-    @property
-    def token(self):  # for reporting errors.
-        return self.__start_node.token
+    def __init__(self, condition, statement_list_node):
+        self.condition = condition
+        self.statement_list_node = statement_list_node
 
 
-class ForStatementNode(AST):
-    def __init__(self, var_decl_statement_node, iterable, statement_list_node):
-        self.__var_decl_statement_node = var_decl_statement_node
-        self.__iterable = iterable
-        self.__statement_list_node = statement_list_node
+class BreakStatementNode(LocatedNode):
+    __slots__ = ()
 
-    @property
-    def var_decl_statement_node(self):
-        return self.__var_decl_statement_node
 
-    @property
-    def iterable(self):
-        return self.__iterable
+class ContinueStatementNode(LocatedNode):
+    __slots__ = ()
 
-    @property
-    def statement_list_node(self):
-        return self.__statement_list_node
 
+class RangeExprNode(AST):
+    __slots__ = ("start_node", "end_node", "step_node")
 
-class VarTypeNode(AST):
-    def __init__(self, type_token):
-        self.__token = type_token
-        self.__val = type_token.val
+    def __init__(self, start_node, end_node, step_node):
+        self.start_node = start_node
+        self.end_node = end_node
+        self.step_node = step_node
 
     @property
-    def token(self):
-        return self.__token
+    def line(self):  # for reporting errors.
+        return self.start_node.line
 
     @property
-    def val(self):
-        return self.__val
+    def col(self):
+        return self.start_node.col
 
 
-class VarDeclStatementNode(AST):
-    def __init__(self, var_type_node, variables):
-        self.__var_type_node = var_type_node
-        self.__variables = variables
+class ForStatementNode(AST):
+    __slots__ = (
+        "var_decl_statement_node",
+        "iterable",
+        "statement_list_node",
+        "is_parallel",
+        "reduction_names",
+    )
+
+    def __init__(
+        self, var_decl_statement_node, iterable, statement_list_node, is_parallel=False
+    ):
+        """
+        The semantic analysis sets "reduction_names" of a parallel for statement:
+        the outer variables that its iterations add to.
+        """
+        self.var_decl_statement_node = var_decl_statement_node
+        self.iterable = iterable
+        self.statement_list_node = statement_list_node
+
+        self.is_parallel = is_parallel
+        self.reduction_names = ()
+
+
+class VarTypeNode(LocatedNode):
+    __slots__ = ("val",)
+
+    def __init__(self, type_token, is_array=False):
+        """
+        "val" is the name of the type, e.g. "int", or "int[]" for an array.
+        """
+        self._line = type_token.line
+        self._col = type_token.col
+        self.shift = None
+        self.val = type_token.val + "[]" if is_array else type_token.val
+
+
+class MapTypeNode(LocatedNode):
+    __slots__ = ("key_type_node", "value_type_node")
+
+    def __init__(self, map_token, key_type_node, value_type_node):
+        self._line = map_token.line
+        self._col = map_token.col
+        self.shift = None
+        self.key_type_node = key_type_node
+        self.value_type_node = value_type_node
 
     @property
-    def var_type_node(self):
-        return self.__var_type_node
+    def val(self):
+        """
+        The name of the type, e.g. "map(str, int)".
+        """
+        return f"map({self.key_type_node.val}, {self.value_type_node.val})"
 
-    @property
-    def variables(self):
-        return self.__variables
 
+class GenTypeNode(LocatedNode):
+    __slots__ = ("element_type_node",)
 
-class ReturnTypeNode(AST):
-    def __init__(self, return_type_token):
-        self.__val = return_type_token.val
+    def __init__(self, gen_token, element_type_node):
+        self._line = gen_token.line
+        self._col = gen_token.col
+        self.shift = None
+        self.element_type_node = element_type_node
 
     @property
     def val(self):
-        return self.__val
+        """
+        The name of the type, e.g. "gen int".
+        """
+        return f"gen {self.element_type_node.val}"
 
 
-class ReturnStatementNode(AST):
-    def __init__(self, return_token, return_expr=None):
-        self.__token = return_token
-        self.__expr_node = return_expr
+class VarDeclStatementNode(AST):
+    __slots__ = ("var_type_node", "variables")
 
-    @property
-    def token(self):
-        return self.__token
+    def __init__(self, var_type_node, variables):
+        self.var_type_node = var_type_node
+        self.variables = variables
 
-    @property
-    def expr_node(self):
-        return self.__expr_node
 
+class ReturnTypeNode(AST):
+    __slots__ = ("val", "is_generator")
 
-class FuncParamNode(AST):
-    def __init__(self, var_type_node, var_node):
-        self.__var_type_node = var_type_node
-        self.__var_node = var_node
+    def __init__(self, return_type):
+        """
+        "return_type" is the K_VOID token, or the type node of the returned type.
+        A function that returns a generator is a generator function.
+        """
+        self.val = return_type.val
+        self.is_generator = isinstance(return_type, GenTypeNode)
 
-    @property
-    def var_type_node(self):
-        return self.__var_type_node
 
-    @property
-    def var_node(self):
-        return self.__var_node
+class ReturnStatementNode(LocatedNode):
+    __slots__ = ("expr_node",)
 
+    def __init__(self, return_token, return_expr=None):
+        self._line = return_token.line
+        self._col = return_token.col
+        self.shift = None
+        self.expr_node = return_expr
 
-class FuncDeclStatementNode(AST):
-    def __init__(self, return_type_node, func_token, func_params, func_body):
-        self.__return_type_node = return_type_node
-        self.__token = func_token
-        self.__name = func_token.val
 
-        self.__params = func_params
-        self.__body = func_body
+class YieldStatementNode(LocatedNode):
+    __slots__ = ("expr_node",)
 
-    @property
-    def return_type_node(self):
-        return self.__return_type_node
+    def __init__(self, yield_token, yield_expr):
+        self._line = yield_token.line
+        self._col = yield_token.col
+        self.shift = None
+        self.expr_node = yield_expr
 
-    @property
-    def name(self):
-        return self.__name
 
-    @property
-    def params(self):
-        return self.__params
+class FuncParamNode(AST):
+    __slots__ = ("var_type_node", "var_node")
+
+    def __init__(self, var_type_node, var_node):
+        self.var_type_node = var_type_node
+        self.var_node = var_node
+
+
+class FuncDeclStatementNode(LocatedNode):
+    __slots__ = ("return_type_node", "name", "params", "__body", "__parse_body")
+
+    def __init__(
+        self, return_type_node, func_token, func_params, func_body, parse_body=None
+    ):
+        """
+        A lazily parsed function has no "func_body" yet; "parse_body" builds it
+        the first time the body is accessed.
+        """
+        self._line = func_token.line
+        self._col = func_token.col
+        self.shift = None
+        self.return_type_node = return_type_node
+        self.name = func_token.val
+
+        self.params = func_params
+        self.__body = func_body
+        self.__parse_body = parse_body
 
     @property
     def body(self):
+        if self.__body is None:
+            self.__body = self.__parse_body()
+            self.__parse_body = None
+
         return self.__body
 
     @property
-    def token(self):
-        return self.__token
+    def is_body_parsed(self):
+        return self.__body is not None
 
 
 class StatementListNode(AST):
-    def __init__(self):
-        self.__statements = []
+    __slots__ = ("statements",)
 
-    @property
-    def statements(self):
-        return self.__statements
+    def __init__(self):
+        self.statements = []
 
 
 class ProgramNode(AST):
+    __slots__ = ("statement_list_node",)
+
     def __init__(self, statement_list_node):
-        self.__statement_list_node = statement_list_node
+        self.statement_list_node = statement_list_node
 
-    @property
-    def statement_list_node(self):
-        return self.__statement_list_node
+
+###################################
+# Type-Specialized Operator Nodes #
+###################################
+# Once the types of the operands are known, the semantic analysis turns every
+# UnaryOpNode and BinaryOpNode into one of these, in place, so the interpreter
+# runs each operator without testing the types of its operands at run time.
+# int and float operands share a node, as Python applies the same operator.
+
+
+class NegNode(UnaryOpNode):
+    __slots__ = ()
+
+
+class PosNode(UnaryOpNode):
+    __slots__ = ()
+
+
+class NotNode(UnaryOpNode):
+    __slots__ = ()
+
+
+class AddNode(BinaryOpNode):
+    """
+    Adds two numbers or concatenates two strings.
+    """
+
+    __slots__ = ()
+
+
+class ConcatNode(BinaryOpNode):
+    """
+    Concatenates a string with a value of another type.
+    """
+
+    __slots__ = ()
+
+
+class SubNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class MulNode(BinaryOpNode):
+    """
+    Multiplies two numbers or repeats a string.
+    """
+
+    __slots__ = ()
+
+
+class IntDivNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class FloatDivNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class ModNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class EqualsNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class NotEqualsNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class LessThanNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class LessThanOrEqualsNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class GreaterThanNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class GreaterThanOrEqualsNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class AndNode(BinaryOpNode):
+    __slots__ = ()
+
+
+class OrNode(BinaryOpNode):
+    __slots__ = ()
+
+
+# Indexed by the "op_kinds" of a NaryOpNode.
+BINARY_OP_NODES = (
+    AddNode,
+    ConcatNode,
+    SubNode,
+    MulNode,
+    IntDivNode,
+    FloatDivNode,
+    ModNode,
+    EqualsNode,
+    NotEqualsNode,
+    LessThanNode,
+    LessThanOrEqualsNode,
+    GreaterThanNode,
+    GreaterThanOrEqualsNode,
+    AndNode,
+    OrNode,
+)
+
+
+class MapAccessNode(AccessNode):
+    """
+    Looks up a key of a map, instead of indexing a string or an array.
+    """
+
+    __slots__ = ()
@@ -0,0 +1,607 @@
+import array
+
+from .error import InterpreterError
+from .symbol_table import BuiltInTypeSymbol, Types
+
+
+class TypeParam(BuiltInTypeSymbol):
+    """
+    Stands, in the "param_types" and "return_type" of a BuiltInFunc, for a type
+    that depends on the type of the first argument: "resolve" gets that type and
+    returns the one the TypeParam stands for.
+    """
+
+    def __init__(self, name, resolve):
+        super().__init__(name)
+        self.resolve = resolve
+
+
+ELEMENT_TYPE = TypeParam("element", lambda array_type: array_type.element_type)
+KEY_TYPE = TypeParam("key", lambda map_type: map_type.key_type)
+KEY_ARRAY_TYPE = TypeParam("key[]", lambda map_type: Types.ARRAYS[map_type.key_type])
+
+
+class BuiltInFuncError(Exception):
+    """
+    Raised by a built-in function for arguments it cannot work with. The
+    interpreter reports its message as an error at the call.
+    """
+
+
+class BuiltInFunc:
+    """
+    Describes a built-in function for every phase: the semantic analysis checks
+    calls against "param_types", and the interpreter calls "func" with the
+    values of the arguments.
+
+    - "param_types" has, for each parameter, a tuple of the types it accepts, or
+      None if it accepts any type. The last "num_optional_params" parameters may
+      be left out. A variadic function takes any number of arguments of any
+      type instead.
+    - "return_type" is None for functions that return nothing.
+    - A pure function has no side effects and its result only depends on its
+      arguments. The only side effect of an impure function may be that it
+      "modifies_arg", its first argument, or "writes_output". A function that
+      writes output gets the OutputBuffer of the program before its arguments,
+      and writes to it.
+    - A function that "reads_input" gets the InputReader of the program before
+      its arguments. If the InputReader shows prompts, it is called after the
+      output is flushed, so that its prompt comes after what was printed.
+    - A function that "uses_files" gets the OpenFiles of the program run before
+      its arguments.
+    - "func" may raise ValueError for arguments it cannot convert; it is
+      reported as an invalid literal. It may return an array as a list, which is
+      then stored like the other arrays of its type.
+    - "params_description" replaces the description of the accepted arguments
+      made up from "param_types" in error messages.
+    """
+
+    def __init__(
+        self,
+        name,
+        func,
+        param_types=(),
+        return_type=None,
+        num_optional_params=0,
+        is_variadic=False,
+        is_pure=True,
+        modifies_arg=False,
+        writes_output=False,
+        reads_input=False,
+        uses_files=False,
+        params_description=None,
+    ):
+        self.name = name
+        self.func = func
+
+        self.param_types = tuple(param_types)
+        self.return_type = return_type
+        self.num_optional_params = num_optional_params
+
+        self.is_variadic = is_variadic
+        self.is_pure = is_pure
+        self.modifies_arg = modifies_arg
+        self.writes_output = writes_output
+        self.reads_input = reads_input
+        self.uses_files = uses_files
+        self.__params_description = params_description
+
+    @property
+    def num_required_params(self):
+        return len(self.param_types) - self.num_optional_params
+
+    @property
+    def arity_description(self):
+        """
+        E.g. "1 argument", "2 arguments" or "0 or 1 argument".
+        """
+        min_args = self.num_required_params
+        max_args = len(self.param_types)
+        noun = "argument" if max_args == 1 else "arguments"
+
+        if min_args == max_args:
+            return f"{max_args} {noun}"
+
+        if min_args + 1 == max_args:
+            return f"{min_args} or {max_args} {noun}"
+
+        return f"{min_args} to {max_args} {noun}"
+
+    @property
+    def params_description(self):
+        """
+        E.g. "a string argument" or "integer or float values as arguments".
+        """
+        if self.__params_description is not None:
+            return self.__params_description
+
+        accepted_types = {types for types in self.param_types if types is not None}
+
+        if len(accepted_types) != 1:
+            return "arguments of the types " + ", ".join(
+                "any"
+                if types is None
+                else " or ".join(f'"{type_.name}"' for type_ in types)
+                for types in self.param_types
+            )
+
+        types_description = " or ".join(
+            _TYPE_DESCRIPTIONS[type_] for type_ in accepted_types.pop()
+        )
+
+        if len(self.param_types) == 1:
+            article = "an" if types_description[0] in "aeiou" else "a"
+            return f"{article} {types_description} argument"
+
+        return f"{types_description} values as arguments"
+
+
+_TYPE_DESCRIPTIONS = {
+    Types.INT: "integer",
+    Types.FLOAT: "float",
+    Types.BOOL: "boolean",
+    Types.STR: "string",
+    Types.INT_ARRAY: "integer array",
+    Types.FLOAT_ARRAY: "float array",
+    Types.BOOL_ARRAY: "boolean array",
+    Types.STR_ARRAY: "string array",
+}
+
+# Built-in function name -> BuiltInFunc
+BUILT_IN_FUNCS = {}
+
+
+def register_built_in_func(built_in_func):
+    """
+    Make a function written in Python callable from Compact programs. It has to
+    be registered before the programs that call it are checked.
+    """
+    if built_in_func.name in BUILT_IN_FUNCS:
+        raise ValueError(
+            f'A built-in function named "{built_in_func.name}" already exists'
+        )
+
+    BUILT_IN_FUNCS[built_in_func.name] = built_in_func
+
+
+def _is_array(val):
+    """
+    int and float arrays are stored in array.array, the other ones in lists.
+    Maps are stored in dicts.
+    """
+    return isinstance(val, (array.array, list))
+
+
+def _format(val):
+    """
+    How println shows a value.
+    """
+    if val is True:
+        return "true"
+
+    if val is False:
+        return "false"
+
+    if _is_array(val):
+        return "[" + ", ".join(_format_element(element) for element in val) + "]"
+
+    if isinstance(val, dict):
+        return (
+            "{"
+            + ", ".join(
+                f"{_format_element(key)}: {_format_element(value)}"
+                for key, value in val.items()
+            )
+            + "}"
+        )
+
+    return str(val)
+
+
+def _format_element(val):
+    return f'"{val}"' if isinstance(val, str) else _format(val)
+
+
+def _print(output, *vals):
+    output.write(" ".join(map(_format, vals)))
+
+
+def _println(output, *vals):
+    output.write(" ".join(map(_format, vals)) + "\n")
+
+
+def _input(input_reader, prompt=""):
+    line = input_reader.read_line(prompt)
+
+    if line is None:
+        raise BuiltInFuncError("There is no more input to read")
+
+    return line
+
+
+def _typeof(val):
+    if _is_array(val):
+        return "array"
+
+    if isinstance(val, dict):
+        return "map"
+
+    return type(val).__name__
+
+
+def _split(str_, separator):
+    if not separator:
+        raise BuiltInFuncError("The separator cannot be empty")
+
+    return str_.split(separator)
+
+
+def _append(vals, val):
+    try:
+        vals.append(val)
+    except OverflowError:
+        raise BuiltInFuncError(InterpreterError.INT_ARRAY_OVERFLOW)
+
+
+def _sort(vals):
+    if isinstance(vals, list):
+        vals.sort()
+    else:
+        vals[:] = array.array(vals.typecode, sorted(vals))
+
+
+def _sum(vals):
+    return sum(vals, 0.0 if vals.typecode == "d" else 0)
+
+
+def _remove(map_, key):
+    try:
+        del map_[key]
+    except KeyError:
+        raise BuiltInFuncError(f'The key "{key}" is not found')
+
+
+def _min(vals):
+    if not vals:
+        raise BuiltInFuncError("The minimum of an empty array is undefined")
+
+    return min(vals)
+
+
+def _max(vals):
+    if not vals:
+        raise BuiltInFuncError("The maximum of an empty array is undefined")
+
+    return max(vals)
+
+
+# Files are read and written through buffers of this size.
+_FILE_BUFFER_SIZE = 1 << 20
+
+
+class OpenFiles:
+    """
+    The files that a program run opened with "open_read" or "open_write", by
+    their handles.
+    """
+
+    def __init__(self):
+        self.__files = {}
+        self.__next_handle = 1
+
+    def open(self, path, mode):
+        handle = self.__next_handle
+        self.__files[handle] = _open_file(path, mode)
+        self.__next_handle += 1
+
+        return handle
+
+    def get(self, handle, mode):
+        file = self.__files.get(handle)
+
+        if file is None:
+            raise BuiltInFuncError(f"No file is open with the handle {handle}")
+
+        if (file.mode == "r") != (mode == "r"):
+            raise BuiltInFuncError(
+                f"The file with the handle {handle} is not open for "
+                f'{"reading" if mode == "r" else "writing"}'
+            )
+
+        return file
+
+    def close(self, handle):
+        file = self.__files.pop(handle, None)
+
+        if file is None:
+            raise BuiltInFuncError(f"No file is open with the handle {handle}")
+
+        file.close()
+
+    def close_all(self):
+        """
+        Close the files the program left open, writing out what is still
+        buffered.
+        """
+        while self.__files:
+            self.__files.popitem()[1].close()
+
+
+def _open_file(path, mode):
+    try:
+        file = open(
+            path,
+            mode,
+            buffering=_FILE_BUFFER_SIZE,
+            encoding="utf-8",
+            errors="replace",
+        )
+    except OSError as e:
+        raise BuiltInFuncError(f'Cannot open the file "{path}": {e.strerror}')
+
+    return file
+
+
+def _open_write(open_files, path, append=False):
+    return open_files.open(path, "a" if append else "w")
+
+
+def _read_lines(open_files, file):
+    """
+    "file" is a path, or the handle of a file opened with "open_read". A file
+    opened from a path is closed once all of its lines are read.
+    """
+    if isinstance(file, str):
+        return _iter_lines(_open_file(file, "r"), close=True)
+
+    return _iter_lines(open_files.get(file, "r"), close=False)
+
+
+def _iter_lines(file, close):
+    """
+    Yield the lines of the file without their line breaks, as they are read.
+    Stops early if the file gets closed.
+    """
+    try:
+        for line in file:
+            yield line.removesuffix("\n")
+    except ValueError:
+        if not file.closed:
+            raise
+    finally:
+        if close:
+            file.close()
+
+
+def _write(open_files, handle, str_):
+    open_files.get(handle, "w").write(str_)
+
+
+_NUMBER_TYPES = (Types.INT, Types.FLOAT)
+_SCALAR_TYPES = (Types.INT, Types.FLOAT, Types.BOOL, Types.STR)
+_ARRAY_TYPES = tuple(Types.ARRAYS.values())
+_MAP_TYPES = tuple(Types.MAPS.values())
+
+for _built_in_func in (
+    BuiltInFunc(
+        "print", _print, is_variadic=True, is_pure=False, writes_output=True
+    ),
+    BuiltInFunc(
+        "println", _println, is_variadic=True, is_pure=False, writes_output=True
+    ),
+    BuiltInFunc(
+        "input",
+        _input,
+        param_types=[(Types.STR,)],
+        return_type=Types.STR,
+        num_optional_params=1,
+        is_pure=False,
+        reads_input=True,
+    ),
+    BuiltInFunc(
+        "reverse",
+        lambda str_: str_[::-1],
+        param_types=[(Types.STR,)],
+        return_type=Types.STR,
+    ),
+    BuiltInFunc(
+        "len",
+        len,
+        param_types=[(Types.STR, *_ARRAY_TYPES, *_MAP_TYPES)],
+        return_type=Types.INT,
+        params_description="a string, an array or a map argument",
+    ),
+    BuiltInFunc(
+        "pow",
+        pow,
+        param_types=[_NUMBER_TYPES, _NUMBER_TYPES],
+        return_type=Types.FLOAT,
+    ),
+    BuiltInFunc("typeof", _typeof, param_types=[None], return_type=Types.STR),
+    # Arrays, maps and generators have no conversions.
+    BuiltInFunc(
+        "toint",
+        int,
+        param_types=[_SCALAR_TYPES],
+        return_type=Types.INT,
+        params_description="a scalar argument",
+    ),
+    BuiltInFunc(
+        "tofloat",
+        float,
+        param_types=[_SCALAR_TYPES],
+        return_type=Types.FLOAT,
+        params_description="a scalar argument",
+    ),
+    BuiltInFunc(
+        "tobool",
+        bool,
+        param_types=[_SCALAR_TYPES],
+        return_type=Types.BOOL,
+        params_description="a scalar argument",
+    ),
+    BuiltInFunc(
+        "tostr",
+        str,
+        param_types=[_SCALAR_TYPES],
+        return_type=Types.STR,
+        params_description="a scalar argument",
+    ),
+    ####################
+    # String Functions #
+    ####################
+    BuiltInFunc(
+        "count",
+        str.count,
+        param_types=[(Types.STR,), (Types.STR,)],
+        return_type=Types.INT,
+    ),
+    BuiltInFunc(
+        "find",
+        str.find,
+        param_types=[(Types.STR,), (Types.STR,)],
+        return_type=Types.INT,
+    ),
+    BuiltInFunc(
+        "replace",
+        str.replace,
+        param_types=[(Types.STR,), (Types.STR,), (Types.STR,)],
+        return_type=Types.STR,
+    ),
+    BuiltInFunc(
+        "startswith",
+        str.startswith,
+        param_types=[(Types.STR,), (Types.STR,)],
+        return_type=Types.BOOL,
+    ),
+    BuiltInFunc(
+        "endswith",
+        str.endswith,
+        param_types=[(Types.STR,), (Types.STR,)],
+        return_type=Types.BOOL,
+    ),
+    BuiltInFunc("upper", str.upper, param_types=[(Types.STR,)], return_type=Types.STR),
+    BuiltInFunc("lower", str.lower, param_types=[(Types.STR,)], return_type=Types.STR),
+    BuiltInFunc("trim", str.strip, param_types=[(Types.STR,)], return_type=Types.STR),
+    BuiltInFunc(
+        "split",
+        _split,
+        param_types=[(Types.STR,), (Types.STR,)],
+        return_type=Types.STR_ARRAY,
+    ),
+    BuiltInFunc(
+        "join",
+        lambda strs, separator: separator.join(strs),
+        param_types=[(Types.STR_ARRAY,), (Types.STR,)],
+        return_type=Types.STR,
+    ),
+    ###################
+    # Array Functions #
+    ###################
+    BuiltInFunc(
+        "append",
+        _append,
+        param_types=[_ARRAY_TYPES, ELEMENT_TYPE],
+        is_pure=False,
+        modifies_arg=True,
+        params_description="an array and a value of its element type as arguments",
+    ),
+    BuiltInFunc(
+        "sort",
+        _sort,
+        param_types=[_ARRAY_TYPES],
+        is_pure=False,
+        modifies_arg=True,
+        params_description="an array argument",
+    ),
+    BuiltInFunc(
+        "sum",
+        _sum,
+        param_types=[(Types.INT_ARRAY, Types.FLOAT_ARRAY)],
+        return_type=ELEMENT_TYPE,
+    ),
+    BuiltInFunc(
+        "min",
+        _min,
+        param_types=[_ARRAY_TYPES],
+        return_type=ELEMENT_TYPE,
+        params_description="an array argument",
+    ),
+    BuiltInFunc(
+        "max",
+        _max,
+        param_types=[_ARRAY_TYPES],
+        return_type=ELEMENT_TYPE,
+        params_description="an array argument",
+    ),
+    #################
+    # Map Functions #
+    #################
+    BuiltInFunc(
+        "has",
+        lambda map_, key: key in map_,
+        param_types=[_MAP_TYPES, KEY_TYPE],
+        return_type=Types.BOOL,
+        params_description="a map and a value of its key type as arguments",
+    ),
+    BuiltInFunc(
+        "keys",
+        list,
+        param_types=[_MAP_TYPES],
+        return_type=KEY_ARRAY_TYPE,
+        params_description="a map argument",
+    ),
+    BuiltInFunc(
+        "remove",
+        _remove,
+        param_types=[_MAP_TYPES, KEY_TYPE],
+        is_pure=False,
+        modifies_arg=True,
+        params_description="a map and a value of its key type as arguments",
+    ),
+    ######################
+    # File I/O Functions #
+    ######################
+    BuiltInFunc(
+        "open_read",
+        lambda open_files, path: open_files.open(path, "r"),
+        param_types=[(Types.STR,)],
+        return_type=Types.INT,
+        is_pure=False,
+        uses_files=True,
+    ),
+    BuiltInFunc(
+        "open_write",
+        _open_write,
+        param_types=[(Types.STR,), (Types.BOOL,)],
+        return_type=Types.INT,
+        num_optional_params=1,
+        is_pure=False,
+        uses_files=True,
+    ),
+    BuiltInFunc(
+        "read_lines",
+        _read_lines,
+        param_types=[(Types.STR, Types.INT)],
+        return_type=Types.GENERATORS[Types.STR],
+        is_pure=False,
+        uses_files=True,
+        params_description="a path or a file handle argument",
+    ),
+    BuiltInFunc(
+        "write",
+        _write,
+        param_types=[(Types.INT,), (Types.STR,)],
+        is_pure=False,
+        uses_files=True,
+        params_description="a file handle and a string as arguments",
+    ),
+    BuiltInFunc(
+        "close",
+        OpenFiles.close,
+        param_types=[(Types.INT,)],
+        is_pure=False,
+        uses_files=True,
+    ),
+):
+    register_built_in_func(_built_in_func)
@@ -0,0 +1,116 @@
+import collections
+import io
+import threading
+
+from .error import InterpreterError
+from .input_reader import InputReader
+from .interpreter import Interpreter
+from .lexer import Lexer
+from .output import OutputBuffer
+from .parser_ import Parser
+from .program_cache import ProgramCache
+from .semantic_analysis import SemanticAnalyzer
+
+
+def check_program(text, eager=False):
+    """
+    Lex, parse and check a program and return its ProgramNode. Raises the
+    LexerError, ParserError or SemanticError of the first error found.
+    """
+    tree = Parser(Lexer(text), lazy_func_bodies=not eager).parse()
+    SemanticAnalyzer().visit(tree)
+
+    return tree
+
+
+class Program:
+    """
+    A checked program. It can be run any number of times, also at the same
+    time in threads, since runs do not change it. Create it with "compile".
+    """
+
+    def __init__(self, tree):
+        self.__tree = tree
+
+    def run(self, stdin=None, stdout=None, inputs=None, vectorize=True):
+        """
+        Run the program and return a RunResult.
+
+        The program reads the strings of "inputs" as its input lines, or else
+        the text or binary stream "stdin"; without either, it has no input. It
+        prints to the text stream "stdout", or else to the output of the result.
+        """
+        if inputs is not None:
+            stdin = io.StringIO("".join(f"{line}\n" for line in inputs))
+
+        output_stream = io.StringIO() if stdout is None else stdout
+        interpreter = Interpreter(
+            self.__tree,
+            vectorize=vectorize,
+            output=OutputBuffer(output_stream, flush_policy=OutputBuffer.BLOCK),
+            input_reader=InputReader(io.StringIO() if stdin is None else stdin),
+        )
+
+        error = None
+
+        try:
+            interpreter.interpret()
+        except InterpreterError as e:
+            error = e
+
+        return RunResult(output_stream.getvalue() if stdout is None else None, error)
+
+
+class RunResult:
+    """
+    What a run of a program printed (None if it printed to a given stream),
+    and the InterpreterError it failed with, if any.
+    """
+
+    def __init__(self, output, error):
+        self.output = output
+        self.error = error
+
+    @property
+    def status(self):
+        """
+        The exit status that main.py would have: 0, or 1 if the run failed.
+        """
+        return 0 if self.error is None else 1
+
+
+# The number of compiled programs kept in memory.
+COMPILED_PROGRAMS_SIZE = 256
+
+# ProgramCache key -> Program, from the least to the most recently used
+_compiled_programs = collections.OrderedDict()
+_compiled_programs_lock = threading.Lock()
+
+
+def compile(source, eager=False):
+    """
+    Check the program in "source" and return it as a Program. Raises the
+    LexerError, ParserError or SemanticError of the first error found.
+
+    The last COMPILED_PROGRAMS_SIZE programs compiled are kept by the hash of
+    their source, so compiling one of them again returns it without checking
+    it again.
+    """
+    key = ProgramCache.key(source, eager)
+
+    with _compiled_programs_lock:
+        program = _compiled_programs.get(key)
+
+        if program is not None:
+            _compiled_programs.move_to_end(key)
+            return program
+
+    program = Program(check_program(source, eager))
+
+    with _compiled_programs_lock:
+        _compiled_programs[key] = program
+
+        while len(_compiled_programs) > COMPILED_PROGRAMS_SIZE:
+            _compiled_programs.popitem(last=False)
+
+    return program
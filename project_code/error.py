@@ -23,3 +23,4 @@ class SemanticError(Error):
 class InterpreterError(Error):
     DIVISION_BY_ZERO = "Division by zero detected"
     MODULO_BY_ZERO = "Modulo by zero detected"
+    INT_ARRAY_OVERFLOW = "The value is too large for an int array"
@@ -0,0 +1,354 @@
+import array
+import json
+import struct
+import sys
+
+from . import abstract_syntax_tree
+from .abstract_syntax_tree import AST, FuncDeclStatementNode, _slot_names
+
+
+class FlatAST:
+    """
+    A parsed program encoded as parallel arrays instead of a graph of node objects:
+
+    - "kinds[i]" is the kind of node "i", an index into "kind_names".
+    - The fields of node "i" are "field_tags" and "field_values" from
+      "field_starts[i]" on, in the order of the slots of its node class.
+    - A field value is, depending on its tag, a node index, an inline int, an
+      index into the constant pool, or the position of a list: its length
+      followed by its items, stored as fields too.
+
+    Node 0 is the ProgramNode. A node that has several parents, like the target
+    of a compound assignment, is stored once. The arrays can be memoryviews over
+    a single buffer (see to_bytes() and from_buffer()), so a program can be
+    shared read-only between processes or loaded without building any nodes.
+    """
+
+    ##############
+    # Field Tags #
+    ##############
+    NODE = 0
+    INT = 1
+    CONST = 2
+    NONE = 3
+    LIST = 4
+    TUPLE = 5
+
+    MAGIC = b"COFLAT01"
+    HEADER = struct.Struct("=qqq")  # number of nodes, number of fields, meta size
+
+    def __init__(
+        self,
+        kinds,
+        field_starts,
+        field_tags,
+        field_values,
+        kind_names,
+        kind_slot_names,
+        constants,
+    ):
+        self.kinds = kinds
+        self.field_starts = field_starts
+        self.field_tags = field_tags
+        self.field_values = field_values
+
+        self.kind_names = kind_names
+        self.kind_slot_names = kind_slot_names
+        self.constants = constants
+
+        self.__field_positions = [
+            {name: i for i, name in enumerate(slot_names)}
+            for slot_names in kind_slot_names
+        ]
+
+    @property
+    def num_nodes(self):
+        return len(self.kinds)
+
+    def kind_name(self, index):
+        return self.kind_names[self.kinds[index]]
+
+    def field(self, index, name):
+        """
+        Return the field "name" of node "index". Child nodes are returned as node
+        indices, and lists as lists of field values.
+        """
+        position = self.__field_positions[self.kinds[index]][name]
+        return self.__decode(self.field_starts[index] + position, None)
+
+    def children(self, index):
+        """
+        Yield the indices of the child nodes of node "index", including the ones
+        in list fields.
+        """
+        field_tags = self.field_tags
+        field_values = self.field_values
+        start = self.field_starts[index]
+        num_slots = len(self.kind_slot_names[self.kinds[index]])
+        stack = list(reversed(range(start, start + num_slots)))
+
+        while stack:
+            position = stack.pop()
+            tag = field_tags[position]
+
+            if tag == FlatAST.NODE:
+                yield field_values[position]
+            elif tag in (FlatAST.LIST, FlatAST.TUPLE):
+                length_at = field_values[position]
+                end = length_at + 1 + field_values[length_at]
+                stack.extend(reversed(range(length_at + 1, end)))
+
+    def to_tree(self):
+        """
+        Build the object tree back.
+        """
+        node_classes = [
+            getattr(abstract_syntax_tree, kind_name) for kind_name in self.kind_names
+        ]
+        nodes = [node_classes[kind].__new__(node_classes[kind]) for kind in self.kinds]
+
+        for index, node in enumerate(nodes):
+            slot_names = self.kind_slot_names[self.kinds[index]]
+
+            for position, name in enumerate(slot_names, start=self.field_starts[index]):
+                setattr(node, name, self.__decode(position, nodes))
+
+        return nodes[0]
+
+    def __decode(self, position, nodes):
+        tag = self.field_tags[position]
+        value = self.field_values[position]
+
+        if tag == FlatAST.NODE:
+            return value if nodes is None else nodes[value]
+
+        if tag == FlatAST.INT:
+            return value
+
+        if tag == FlatAST.CONST:
+            return self.constants[value]
+
+        if tag == FlatAST.NONE:
+            return None
+
+        end = value + 1 + self.field_values[value]
+        items = [self.__decode(position, nodes) for position in range(value + 1, end)]
+
+        return items if tag == FlatAST.LIST else tuple(items)
+
+    @staticmethod
+    def from_tree(program_node, parse_func_bodies=True):
+        """
+        Encode a ProgramNode. Lazily parsed function bodies are parsed first,
+        unless "parse_func_bodies" is False: a body that was not parsed yet is
+        then left out, and must not be accessed once the tree is built back.
+        """
+        return _FlatASTEncoder(parse_func_bodies).encode(program_node)
+
+    #################
+    # Single Buffer #
+    #################
+    def to_bytes(self):
+        meta = json.dumps(
+            {
+                "byteorder": sys.byteorder,
+                "kinds": [
+                    [kind_name, list(slot_names)]
+                    for kind_name, slot_names in zip(
+                        self.kind_names, self.kind_slot_names
+                    )
+                ],
+                "constants": list(self.constants),
+            }
+        ).encode("utf-8")
+        meta += b" " * (-len(meta) % 8)  # Keeps the arrays after it aligned.
+
+        kinds = self.kinds.tobytes()
+
+        return b"".join(
+            (
+                FlatAST.MAGIC,
+                FlatAST.HEADER.pack(len(self.kinds), len(self.field_tags), len(meta)),
+                meta,
+                self.field_values.tobytes(),
+                self.field_starts.tobytes(),
+                kinds + bytes(-len(kinds) % 8),
+                self.field_tags.tobytes(),
+            )
+        )
+
+    @staticmethod
+    def from_buffer(buffer):
+        """
+        Read a FlatAST from "buffer", e.g. bytes or an mmap, without copying
+        its arrays.
+        """
+        buffer = memoryview(buffer)
+        magic_len = len(FlatAST.MAGIC)
+
+        if bytes(buffer[:magic_len]) != FlatAST.MAGIC:
+            raise ValueError("Not an encoded FlatAST")
+
+        offset = magic_len + FlatAST.HEADER.size
+        num_nodes, num_fields, meta_len = FlatAST.HEADER.unpack(
+            buffer[magic_len:offset]
+        )
+        meta = json.loads(bytes(buffer[offset : offset + meta_len]))
+        offset += meta_len
+
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError("The FlatAST was encoded with a different byte order")
+
+        arrays = []
+
+        for length, fmt, item_size in (
+            (num_fields, "q", 8),
+            (num_nodes, "q", 8),
+            (num_nodes, "H", 2),
+            (num_fields, "B", 1),
+        ):
+            arrays.append(buffer[offset : offset + length * item_size].cast(fmt))
+            offset += length * item_size + (-(length * item_size) % 8)
+
+        field_values, field_starts, kinds, field_tags = arrays
+
+        return FlatAST(
+            kinds,
+            field_starts,
+            field_tags,
+            field_values,
+            kind_names=[kind_name for kind_name, _ in meta["kinds"]],
+            kind_slot_names=[tuple(slot_names) for _, slot_names in meta["kinds"]],
+            constants=meta["constants"],
+        )
+
+    def __reduce__(self):
+        return FlatAST.from_buffer, (self.to_bytes(),)
+
+
+class _FlatASTEncoder:
+    INT64_RANGE = range(-(2**63), 2**63)
+
+    # The slot that holds the parser of a lazily parsed function body.
+    PARSE_BODY_SLOT = "_FuncDeclStatementNode__parse_body"
+
+    def __init__(self, parse_func_bodies):
+        self.__parse_func_bodies = parse_func_bodies
+
+        self.__kinds = array.array("H")
+        self.__field_starts = array.array("q")
+        self.__field_tags = array.array("B")
+        self.__field_values = array.array("q")
+
+        self.__kind_indices = {}  # node class -> kind
+        self.__node_indices = {}  # id(node) -> node index
+        self.__constants = []
+        self.__constant_indices = {}  # (type, value) -> constant pool index
+
+    def encode(self, program_node):
+        self.__encode_node(program_node)
+        node_classes = sorted(self.__kind_indices, key=self.__kind_indices.get)
+
+        return FlatAST(
+            self.__kinds,
+            self.__field_starts,
+            self.__field_tags,
+            self.__field_values,
+            kind_names=[node_class.__name__ for node_class in node_classes],
+            kind_slot_names=[_slot_names(node_class) for node_class in node_classes],
+            constants=self.__constants,
+        )
+
+    def __encode_node(self, node):
+        index = self.__node_indices.get(id(node))
+
+        if index is not None:
+            return index
+
+        if isinstance(node, FuncDeclStatementNode) and self.__parse_func_bodies:
+            node.body  # Parses a lazily parsed body.
+
+        node_class = type(node)
+        kind = self.__kind_indices.setdefault(node_class, len(self.__kind_indices))
+        slot_names = _slot_names(node_class)
+
+        index = self.__node_indices[id(node)] = len(self.__kinds)
+        self.__kinds.append(kind)
+
+        start = self.__reserve_fields(len(slot_names))
+        self.__field_starts.append(start)
+
+        for position, name in enumerate(slot_names, start=start):
+            if name == _FlatASTEncoder.PARSE_BODY_SLOT:
+                self.__encode_field(position, None)
+            else:
+                self.__encode_field(position, getattr(node, name))
+
+        return index
+
+    def __encode_field(self, position, value):
+        if isinstance(value, AST):
+            tag, value = FlatAST.NODE, self.__encode_node(value)
+        elif value is None:
+            tag, value = FlatAST.NONE, 0
+        elif isinstance(value, (list, tuple)):
+            tag = FlatAST.LIST if isinstance(value, list) else FlatAST.TUPLE
+            value = self.__encode_items(value)
+        elif type(value) is int and value in _FlatASTEncoder.INT64_RANGE:
+            tag = FlatAST.INT
+        else:
+            tag, value = FlatAST.CONST, self.__add_constant(value)
+
+        self.__field_tags[position] = tag
+        self.__field_values[position] = value
+
+    def __encode_items(self, items):
+        length_at = self.__reserve_fields(1 + len(items))
+        self.__field_tags[length_at] = FlatAST.INT
+        self.__field_values[length_at] = len(items)
+
+        for position, item in enumerate(items, start=length_at + 1):
+            self.__encode_field(position, item)
+
+        return length_at
+
+    def __reserve_fields(self, num_fields):
+        start = len(self.__field_tags)
+        self.__field_tags.extend([0] * num_fields)
+        self.__field_values.extend([0] * num_fields)
+
+        return start
+
+    def __add_constant(self, value):
+        # The type is part of the key so that 1, 1.0 and True stay apart.
+        key = (type(value), value)
+        index = self.__constant_indices.get(key)
+
+        if index is None:
+            index = self.__constant_indices[key] = len(self.__constants)
+            self.__constants.append(value)
+
+        return index
+
+
+class FlatASTVisitor:
+    """
+    Like ASTNodeVisitor, but visits the nodes of a FlatAST by their index.
+    """
+
+    def __init__(self, flat_ast):
+        self.flat_ast = flat_ast
+
+    def visit(self, index):
+        execute = getattr(
+            self, "visit" + self.flat_ast.kind_name(index), self.no_visit
+        )
+        return execute(index)
+
+    def no_visit(self, index):
+        """
+        Raise an exception if no visit method is implemented for a node.
+        """
+        raise NotImplementedError(
+            f'NotImplementedError: "visit{self.flat_ast.kind_name(index)}" not implemented.'
+        )
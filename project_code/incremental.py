@@ -0,0 +1,325 @@
+import bisect
+
+from .abstract_syntax_tree import (
+    EmptyStatementNode,
+    LocationShift,
+    StatementListNode,
+    ProgramNode,
+    iter_nodes,
+)
+from .error import LexerError, ParserError
+from .lexer import Lexer
+from .parser_ import Parser
+from .tokens import Token
+
+
+class IncrementalParser:
+    """
+    Keeps a program split into its top-level statements (chunks), so that after
+    a text edit only the chunks touched by the edit are lexed and parsed again.
+    Every other statement node, and its tokens, is reused as is.
+
+    A chunk spans from the end of the previous chunk's last token to the end of
+    its own last token, so the whitespace and comments in front of a statement
+    belong to it.
+
+    The tokens and nodes of a chunk keep the locations they were parsed at. When
+    an edit moves the chunk, only its LocationShift is updated, and the
+    locations are resolved when they are read.
+    """
+
+    def __init__(self, text):
+        self.__text = text
+        self.__tree = None
+        self.__eof_token = None
+
+        self.__chunk_ends = None  # None until the text parses.
+        self.__chunk_tokens = []
+        self.__chunk_statements = []
+        self.__chunk_shifts = []
+
+        self.__reparse_all()
+
+    @property
+    def text(self):
+        return self.__text
+
+    @property
+    def tree(self):
+        return self.__tree
+
+    @property
+    def tokens(self):
+        tokens = []
+
+        for chunk_tokens, location_shift in zip(
+            self.__chunk_tokens, self.__chunk_shifts
+        ):
+            if location_shift.line_delta == 0 and location_shift.col_delta == 0:
+                tokens.extend(chunk_tokens)
+                continue
+
+            tokens.extend(
+                Token(
+                    token.type_,
+                    token.val,
+                    location_shift.shift_line(token.line),
+                    location_shift.shift_col(token.line, token.col),
+                )
+                for token in chunk_tokens
+            )
+
+        tokens.append(self.__eof_token)
+
+        return tokens
+
+    def edit(self, offset, deleted_len, inserted_text):
+        """
+        Replace "deleted_len" characters at "offset" with "inserted_text" and
+        return the updated ProgramNode. Lexer and parser errors are raised as
+        usual; the next edit then starts over with a full parse.
+        """
+        old_text = self.__text
+
+        if offset < 0 or deleted_len < 0 or offset + deleted_len > len(old_text):
+            raise ValueError(f"Edit is outside of the text: {offset}, {deleted_len}")
+
+        self.__text = (
+            old_text[:offset] + inserted_text + old_text[offset + deleted_len :]
+        )
+
+        if not self.__chunk_ends:
+            return self.__reparse_all()
+
+        try:
+            self.__reparse_damaged_chunks(old_text, offset, deleted_len, inserted_text)
+        except (LexerError, ParserError):
+            # The damaged chunks no longer form whole statements on their own.
+            return self.__reparse_all()
+
+        return self.__tree
+
+    def __reparse_all(self):
+        self.__chunk_ends = None
+
+        try:
+            chunks = list(self.__split_statements(Lexer(self.__text)))
+            chunk_statements = [self.__parse_chunk(tokens) for tokens, _ in chunks]
+            chunk_shifts = [
+                self.__attach_shift(statements) for statements in chunk_statements
+            ]
+        except (LexerError, ParserError):
+            # Either the text is wrong, in which case the full parse below reports
+            # it, or the top-level statements could not be told apart.
+            chunks = None
+
+        if chunks is None:
+            # Parsing straight from the lexer reports errors in the usual order.
+            tree = Parser(Lexer(self.__text)).parse()
+            tokens = Lexer(self.__text).tokenize()
+
+            self.__eof_token = tokens.pop()
+            self.__chunk_tokens = [tokens]
+            self.__chunk_statements = [tree.statement_list_node.statements[:-1]]
+            self.__chunk_shifts = [self.__attach_shift(self.__chunk_statements[0])]
+            self.__chunk_ends = [len(self.__text)]
+        else:
+            self.__chunk_tokens = [tokens for tokens, _ in chunks]
+            self.__chunk_statements = chunk_statements
+            self.__chunk_shifts = chunk_shifts
+            self.__chunk_ends = [end for _, end in chunks]
+            self.__eof_token = self.__lex_eof_token(
+                self.__chunk_ends[-1] if chunks else 0
+            )
+
+        self.__build_tree()
+        return self.__tree
+
+    def __reparse_damaged_chunks(self, old_text, offset, deleted_len, inserted_text):
+        text = self.__text
+        chunk_ends = self.__chunk_ends
+        delta = len(inserted_text) - deleted_len
+
+        first = bisect.bisect_left(chunk_ends, offset)
+        last = bisect.bisect_left(chunk_ends, offset + deleted_len)
+        region_start = chunk_ends[first - 1] if first > 0 else 0
+
+        lexer = self.__lexer_at(region_start)
+        new_chunks = []
+        reused_from = len(chunk_ends)  # Index of the first old chunk kept.
+
+        for tokens, end in self.__split_statements(lexer):
+            statements = self.__parse_chunk(tokens)
+            location_shift = self.__attach_shift(statements)
+            new_chunks.append((tokens, end, statements, location_shift))
+            old_end = end - delta
+
+            if last < len(chunk_ends) and old_end >= chunk_ends[last]:
+                i = bisect.bisect_left(chunk_ends, old_end)
+
+                if i < len(chunk_ends) and chunk_ends[i] == old_end:
+                    reused_from = i + 1
+                    break
+
+        if reused_from < len(chunk_ends):
+            self.__shift_reused_chunks(old_text, chunk_ends[reused_from - 1], delta)
+
+            for i in range(reused_from, len(chunk_ends)):
+                chunk_ends[i] += delta
+        else:
+            self.__eof_token = self.__lex_eof_token(
+                new_chunks[-1][1] if new_chunks else region_start
+            )
+
+        self.__chunk_ends[first:reused_from] = [chunk[1] for chunk in new_chunks]
+        self.__chunk_tokens[first:reused_from] = [chunk[0] for chunk in new_chunks]
+        self.__chunk_statements[first:reused_from] = [
+            chunk[2] for chunk in new_chunks
+        ]
+        self.__chunk_shifts[first:reused_from] = [chunk[3] for chunk in new_chunks]
+
+        self.__build_tree()
+
+    def __shift_reused_chunks(self, old_text, old_region_end, delta):
+        """
+        Move the tokens and nodes after the damaged region by updating the
+        LocationShift of their chunks. Columns only change on the line where the
+        region ends, so only for the chunks that start on it.
+        """
+        text = self.__text
+        new_region_end = old_region_end + delta
+
+        line_delta = text.count("\n", 0, new_region_end) - old_text.count(
+            "\n", 0, old_region_end
+        )
+        col_delta = (new_region_end - text.rfind("\n", 0, new_region_end)) - (
+            old_region_end - old_text.rfind("\n", 0, old_region_end)
+        )
+        region_end_line = old_text.count("\n", 0, old_region_end) + 1
+
+        if line_delta == 0 and col_delta == 0:
+            return
+
+        region_end_line_end = old_text.find("\n", old_region_end)
+
+        if region_end_line_end == -1:
+            region_end_line_end = len(old_text)
+
+        chunk_ends = self.__chunk_ends
+        first_reused = bisect.bisect_right(chunk_ends, old_region_end)
+
+        for i in range(first_reused, len(chunk_ends)):
+            if chunk_ends[i - 1] <= region_end_line_end:
+                self.__chunk_shifts[i].move(region_end_line, line_delta, col_delta)
+            elif line_delta == 0:
+                break
+            else:
+                self.__chunk_shifts[i].move(region_end_line, line_delta, 0)
+
+        eof_token = self.__eof_token
+
+        if eof_token.line == region_end_line:
+            eof_token.col += col_delta
+
+        eof_token.line += line_delta
+
+    def __lex_eof_token(self, last_end):
+        return self.__lexer_at(last_end).get_next_token()
+
+    def __lexer_at(self, char_pos):
+        text = self.__text
+        line = text.count("\n", 0, char_pos) + 1
+        col = char_pos - text.rfind("\n", 0, char_pos)
+
+        if 0 < char_pos == len(text):
+            # The lexer does not move the column past the last character.
+            col -= 1
+
+        return Lexer(text, char_pos, line, col)
+
+    def __build_tree(self):
+        statement_list_node = StatementListNode()
+
+        for statements in self.__chunk_statements:
+            statement_list_node.statements.extend(statements)
+
+        statement_list_node.statements.append(EmptyStatementNode())
+        self.__tree = ProgramNode(statement_list_node)
+
+    @staticmethod
+    def __attach_shift(statements):
+        """
+        Give the nodes of the statements of a chunk a LocationShift and return
+        it.
+        """
+        location_shift = LocationShift()
+
+        for statement in statements:
+            for node in iter_nodes(statement):
+                node.attach_shift(location_shift)
+
+        return location_shift
+
+    @staticmethod
+    def __parse_chunk(tokens):
+        """
+        Parse the tokens of one top-level statement.
+        """
+        last_token = tokens[-1]
+        tree = Parser(
+            tokens + [Token(Token.EOF, None, last_token.line, last_token.col)]
+        ).parse()
+        statements = tree.statement_list_node.statements[:-1]
+
+        if len(statements) != 1:
+            raise ParserError(ParserError.UNEXPECTED_TOKEN)
+
+        return statements
+
+    @staticmethod
+    def __split_statements(lexer):
+        """
+        Yield the tokens of each top-level statement together with the offset
+        just past its last token. A statement ends with a SEMICOLON, or with a
+        RIGHT_CURLY_BRACKET that is not followed by K_ELSEIF or K_ELSE.
+        """
+        chunk_tokens = []
+        depth = 0
+        closed_at = None
+
+        while True:
+            token = lexer.get_next_token()
+
+            if closed_at is not None:
+                if token.type_ not in (Token.K_ELSEIF, Token.K_ELSE):
+                    yield chunk_tokens, closed_at
+                    chunk_tokens = []
+
+                closed_at = None
+
+            if token.type_ == Token.EOF:
+                if chunk_tokens:
+                    yield chunk_tokens, lexer.char_pos
+
+                return
+
+            chunk_tokens.append(token)
+
+            if token.type_ in (
+                Token.LEFT_PARENTHESIS,
+                Token.LEFT_SQUARE_BRACKET,
+                Token.LEFT_CURLY_BRACKET,
+            ):
+                depth += 1
+            elif token.type_ in (
+                Token.RIGHT_PARENTHESIS,
+                Token.RIGHT_SQUARE_BRACKET,
+                Token.RIGHT_CURLY_BRACKET,
+            ):
+                depth -= 1
+
+                if depth == 0 and token.type_ == Token.RIGHT_CURLY_BRACKET:
+                    closed_at = lexer.char_pos
+            elif token.type_ == Token.SEMICOLON and depth == 0:
+                yield chunk_tokens, lexer.char_pos
+                chunk_tokens = []
@@ -0,0 +1,104 @@
+import codecs
+import functools
+import sys
+
+
+class InputReader:
+    """
+    Hands out the lines of the input one at a time. Input from a terminal is
+    read with Python's input function, which shows the prompt. Any other input,
+    e.g. a pipe, is read in large blocks that are split into lines at once, and
+    prompts are not shown, since nobody is there to read them.
+    """
+
+    BLOCK_SIZE = 1 << 20
+
+    def __init__(self, stream=None):
+        """
+        "stream" is a text or binary stream; it defaults to sys.stdin as it is
+        when the first line is read.
+        """
+        self.__stream = stream
+        self.__read_block = None  # Set on the first line.
+        self.__decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        self.__lines = []
+        self.__next_line = 0
+        self.__partial_line = ""
+        self.__at_end = False
+
+    @property
+    def shows_prompts(self):
+        """
+        Whether the input is read from a terminal, which shows the prompts.
+        """
+        return (
+            self.__read_block is None
+            and self.__stream is None
+            and sys.stdin.isatty()
+        )
+
+    def read_line(self, prompt=""):
+        """
+        Return the next line without its line break, or None at the end of the
+        input.
+        """
+        if self.__read_block is None:
+            if self.shows_prompts:
+                return self.__read_tty_line(prompt)
+
+            self.__start_block_reads()
+
+        while self.__next_line == len(self.__lines):
+            if self.__at_end:
+                return None
+
+            self.__read_lines()
+
+        line = self.__lines[self.__next_line]
+        self.__next_line += 1
+
+        return line
+
+    @staticmethod
+    def __read_tty_line(prompt):
+        try:
+            return input(prompt)
+        except EOFError:
+            return None
+
+    def __start_block_reads(self):
+        stream = sys.stdin if self.__stream is None else self.__stream
+        # Read the bytes under a text stream, without its own line splitting.
+        source = getattr(stream, "buffer", stream)
+        # "read1" returns what is available, instead of waiting for a full block.
+        self.__read_block = functools.partial(
+            getattr(source, "read1", source.read), InputReader.BLOCK_SIZE
+        )
+
+    def __read_lines(self):
+        """
+        Read the next block and split it into lines. The last line of a block
+        is kept until its end is read.
+        """
+        block = self.__read_block()
+        text = (
+            self.__decoder.decode(block, final=not block)
+            if isinstance(block, bytes)
+            else block
+        )
+
+        text = self.__partial_line + text
+
+        if not block:
+            self.__at_end = True
+            lines = [text] if text else []
+        else:
+            lines = text.split("\n")
+            self.__partial_line = lines.pop()
+
+        if "\r" in text:
+            lines = [line.removesuffix("\r") for line in lines]
+
+        self.__lines = lines
+        self.__next_line = 0
@@ -1,29 +1,181 @@
-from .abstract_syntax_tree import VarNode, AccessNode, AssignmentStatementNode
+import array
+import concurrent.futures
+import functools
+import io
+import itertools
+import multiprocessing
+import operator
+import os
+import pickle
+import sys
+import tempfile
+import threading
+
+from .abstract_syntax_tree import (
+    AST,
+    iter_nodes,
+    VarNode,
+    AccessNode,
+    MapAccessNode,
+    MapTypeNode,
+    AssignmentStatementNode,
+    ConditionalStatementNode,
+    WhileStatementNode,
+    ForStatementNode,
+    YieldStatementNode,
+    StatementListNode,
+    AddNode,
+    ConcatNode,
+    SubNode,
+    MulNode,
+    IntDivNode,
+    FloatDivNode,
+    ModNode,
+    EqualsNode,
+    NotEqualsNode,
+    LessThanNode,
+    LessThanOrEqualsNode,
+    GreaterThanNode,
+    GreaterThanOrEqualsNode,
+    AndNode,
+    OrNode,
+    BINARY_OP_NODES,
+)
+from .built_in_funcs import BUILT_IN_FUNCS, BuiltInFuncError, OpenFiles
 from .error import InterpreterError
+from .input_reader import InputReader
+from .output import OutputBuffer
 from .program_stack import ProgramStack, StackFrame
-from .tokens import Token
+from .symbol_table import Types
+from .vectorizer import LoopVectorizer
 from .visit_ast_node import ASTNodeVisitor
 
 
+def _concat(left_val, right_val):
+    return str(left_val) + str(right_val)
+
+
+# int and float arrays are stored compactly in array.array, the other arrays in
+# lists.
+_ARRAY_TYPECODES = {
+    Types.INT_ARRAY.name: "q",
+    Types.FLOAT_ARRAY.name: "d",
+    Types.BOOL_ARRAY.name: None,
+    Types.STR_ARRAY.name: None,
+}
+
+
+def _new_array(type_name, vals=()):
+    typecode = _ARRAY_TYPECODES[type_name]
+    return list(vals) if typecode is None else array.array(typecode, vals)
+
+
+_BINARY_OP_FUNCS = {
+    AddNode: operator.add,
+    ConcatNode: _concat,
+    SubNode: operator.sub,
+    MulNode: operator.mul,
+    IntDivNode: operator.floordiv,
+    FloatDivNode: operator.truediv,
+    ModNode: operator.mod,
+    EqualsNode: operator.eq,
+    NotEqualsNode: operator.ne,
+    LessThanNode: operator.lt,
+    LessThanOrEqualsNode: operator.le,
+    GreaterThanNode: operator.gt,
+    GreaterThanOrEqualsNode: operator.ge,
+}
+
+
+# The chunk runner of the parallel for statements a worker process runs, and
+# the AST nodes of the program by their ids. Worker processes are forked from
+# the interpreter when it runs its first parallel for statement, so they
+# inherit it with the program. The state each statement starts from is sent to
+# them in a file, with the AST nodes they have sent as their ids.
+_parallel_chunk_runner = None
+_parallel_ast_nodes = None
+_is_parallel_worker = False
+# The number of the parallel for statement the worker ran last, and its state.
+_parallel_loop = (None, None)
+
+
+def _start_parallel_worker(chunk_runner, ast_nodes):
+    global _parallel_chunk_runner, _parallel_ast_nodes, _is_parallel_worker
+    _parallel_chunk_runner = chunk_runner
+    _parallel_ast_nodes = ast_nodes
+    _is_parallel_worker = True
+
+
+def _run_parallel_chunk(loop_num, state_path, chunk):
+    global _parallel_loop
+
+    if _parallel_loop[0] != loop_num:
+        with open(state_path, "rb") as state_file:
+            _parallel_loop = (loop_num, _ParallelStateUnpickler(state_file).load())
+
+    ast_node, stack_frame = _parallel_loop[1]
+    return _parallel_chunk_runner(ast_node, stack_frame, chunk)
+
+
+class _ParallelStatePickler(pickle.Pickler):
+    """
+    Pickles the AST nodes that the worker processes have as their ids.
+    """
+
+    def __init__(self, file, ast_nodes):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.__ast_nodes = ast_nodes
+
+    def persistent_id(self, obj):
+        if isinstance(obj, AST) and id(obj) in self.__ast_nodes:
+            return id(obj)
+
+        return None
+
+
+class _ParallelStateUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return _parallel_ast_nodes[pid]
+
+
 class Interpreter(ASTNodeVisitor):
-    PROGRAM_STACK = ProgramStack()
-    BUILT_IN_FUNCS = [
-        "print",
-        "println",
-        "input",
-        "reverse",
-        "len",
-        "pow",
-        "typeof",
-        "toint",
-        "tofloat",
-        "tobool",
-        "tostr",
-    ]
-
-    def __init__(self, ast):
+    # The operators of NaryOpNodes by their "op_kinds"; None for "and" and "or".
+    NARY_OP_FUNCS = [_BINARY_OP_FUNCS.get(node_class) for node_class in BINARY_OP_NODES]
+    AND_KIND = BINARY_OP_NODES.index(AndNode)
+    OR_KIND = BINARY_OP_NODES.index(OrNode)
+    MOD_KIND = BINARY_OP_NODES.index(ModNode)
+    # The statements of a generator function body that can contain a yield
+    # statement.
+    LAZY_STATEMENT_NODES = (
+        YieldStatementNode,
+        ConditionalStatementNode,
+        WhileStatementNode,
+        ForStatementNode,
+    )
+    # A parallel for statement is split into this many chunks, whatever the
+    # number of processes, so that its sums are added up the same everywhere.
+    PARALLEL_CHUNKS = 64
+
+    def __init__(self, ast, vectorize=True, output=None, input_reader=None):
+        """
+        With "vectorize", for loops over ranges that only do arithmetic on arrays
+        run as NumPy array operations, if NumPy is installed. The program prints
+        to "output", an OutputBuffer that defaults to one over sys.stdout, and
+        reads from "input_reader", an InputReader that defaults to one over
+        sys.stdin.
+
+        Everything a run changes is kept in the instance and set up again by
+        "interpret", so that instances can run in threads at the same time, and
+        an instance can run again after a failed run.
+        """
         self.__ast = ast
-        self.__zero_token = None  # Used for reporting errors.
+        self.__output = OutputBuffer() if output is None else output
+        self.__input_reader = InputReader() if input_reader is None else input_reader
+        self.__vectorizer = (
+            LoopVectorizer() if vectorize and LoopVectorizer.is_available() else None
+        )
+        self.__program_stack = None
+        self.__open_files = None
 
         self.__return_flag = False
         self.__return_val = None
@@ -31,14 +183,38 @@ class Interpreter(ASTNodeVisitor):
         self.__continue_flag = False
         self.__break_flag = False
 
+        self.__process_pool = None
+        self.__ast_nodes = None
+        self.__parallel_loops = 0
+
     def interpret(self):
         if self.__ast is None:
             return ""
 
-        return self.visit(self.__ast)
+        self.__program_stack = ProgramStack()
+        self.__open_files = OpenFiles()
+
+        self.__return_flag = False
+        self.__return_val = None
+
+        self.__continue_flag = False
+        self.__break_flag = False
+
+        self.__process_pool = None
+        self.__ast_nodes = None
+        self.__parallel_loops = 0
+
+        try:
+            return self.visit(self.__ast)
+        finally:
+            self.__output.flush()
+            self.__open_files.close_all()
+
+            if self.__process_pool is not None:
+                self.__process_pool.shutdown(cancel_futures=True)
 
     def visitVarNode(self, ast_node):
-        curr_stack_frame = Interpreter.PROGRAM_STACK.peek()
+        curr_stack_frame = self.__program_stack.peek()
 
         var_name = ast_node.val
         var_val = curr_stack_frame.get_var(var_name)
@@ -46,7 +222,7 @@ class Interpreter(ASTNodeVisitor):
         if var_val is None:
             self.__error(
                 f'The variable "{var_name}" is not defined',
-                ast_node.token,
+                ast_node,
             )
 
         return curr_stack_frame.get_var(ast_node.val)
@@ -55,26 +231,33 @@ class Interpreter(ASTNodeVisitor):
         func_name = ast_node.func_name
         func_args = ast_node.args
 
-        if func_name in Interpreter.BUILT_IN_FUNCS:
-            return self.__call_builtin_func(func_name, func_args)
+        built_in_func = BUILT_IN_FUNCS.get(func_name)
+
+        if built_in_func is not None:
+            return self.__call_built_in_func(built_in_func, func_args, ast_node)
 
         try:
             (
                 func_frame,
                 func_param_names,
-                func_body,
-            ) = Interpreter.PROGRAM_STACK.peek().get_func(func_name)
+                func_decl,
+            ) = self.__program_stack.peek().get_func(func_name)
+
+            if func_decl.return_type_node.is_generator:
+                return self.__call_generator_func(
+                    func_frame, func_param_names, func_decl, func_args
+                )
 
             for i, arg in enumerate(func_args):
                 func_frame.variables[func_param_names[i]] = self.visit(arg)
 
-            Interpreter.PROGRAM_STACK.push(func_frame)
-            self.visit(func_body)
-            Interpreter.PROGRAM_STACK.pop()
+            self.__program_stack.push(func_frame)
+            self.visit(func_decl.body)
+            self.__program_stack.pop()
         except RecursionError as e:
             self.__error(
                 e.args[0],
-                ast_node.token,
+                ast_node,
             )
 
         if self.__return_flag:
@@ -84,51 +267,151 @@ class Interpreter(ASTNodeVisitor):
             self.__return_val = None
             return return_val
 
-    def __call_builtin_func(self, func_name, func_args):
-        match func_name:
-            case "print" | "println":
-                func_args_vals = [self.visit(arg) for arg in func_args]
-                func_arg_vals = [
-                    "true"
-                    if arg_val is True
-                    else "false"
-                    if arg_val is False
-                    else arg_val
-                    for arg_val in func_args_vals
-                ]
-
-                if func_name == "println":
-                    print(*func_arg_vals)
+    def __call_generator_func(self, func_frame, func_param_names, func_decl, args):
+        """
+        Return a generator that runs the body in a stack frame of its own, so
+        that every call can be iterated over on its own.
+        """
+        gen_frame = StackFrame(
+            name=func_decl.name,
+            type_=StackFrame.FUNC,
+            scope_level=func_frame.scope_level,
+            outer_scope=func_frame.outer_scope,
+        )
+        # The values of the default parameters.
+        gen_frame.variables.update(func_frame.variables)
+
+        for i, arg in enumerate(args):
+            gen_frame.variables[func_param_names[i]] = self.visit(arg)
+
+        return self.__generate(gen_frame, func_decl.body)
+
+    def __generate(self, gen_frame, body):
+        """
+        Run the body up to its next yield statement whenever the next value is
+        asked for. While the generator is suspended, the stack frames of the
+        body are kept off the program stack.
+        """
+        steps = self.__run_lazily(body)
+        frames = [gen_frame]
+
+        while True:
+            base_size = self.__program_stack.size()
+
+            for frame in frames:
+                self.__program_stack.push(frame)
+
+            try:
+                val = next(steps)
+            except StopIteration:
+                self.__program_stack.pop()
+                self.__return_flag = False
+                self.__return_val = None
+                return
+
+            frames = []
+
+            while self.__program_stack.size() > base_size:
+                frames.append(self.__program_stack.pop())
+
+            frames.reverse()
+            yield val
+
+    def __run_lazily(self, ast_node):
+        """
+        Run a statement of a generator function body like "visit" does, as a
+        Python generator that yields the values of the yield statements in it.
+        The statements that cannot contain a yield statement are visited.
+        """
+        if isinstance(ast_node, StatementListNode):
+            for statement in ast_node.statements:
+                if isinstance(statement, Interpreter.LAZY_STATEMENT_NODES):
+                    yield from self.__run_lazily(statement)
                 else:
-                    print(*func_args_vals, end="")
-            case "input":
-                return input(self.visit(func_args[0]) if func_args else "")
-            case "reverse":
-                return self.visit(func_args[0])[::-1]
-            case "len":
-                return len(self.visit(func_args[0]))
-            case "pow":
-                return self.visit(func_args[0]) ** self.visit(func_args[1])
-            case "typeof":
-                return type(self.visit(func_args[0])).__name__
-            case "toint" | "tofloat" | "tobool" | "tostr":
-                func_arg_val = self.visit(func_args[0])
+                    self.visit(statement)
 
-                try:
-                    match func_name:
-                        case "toint":
-                            return int(func_arg_val)
-                        case "tofloat":
-                            return float(func_arg_val)
-                        case "tobool":
-                            return bool(func_arg_val)
-                        case "tostr":
-                            return str(func_arg_val)
-                except ValueError:
-                    self.__error(
-                        f'Invalid literal for "{func_name}": "{func_arg_val}"',
-                        func_args[0].token,
-                    )
+                if self.__return_flag or self.__break_flag or self.__continue_flag:
+                    break
+
+        elif isinstance(ast_node, YieldStatementNode):
+            yield self.visit(ast_node.expr_node)
+
+        elif isinstance(ast_node, ConditionalStatementNode):
+            case = self.__select_case(ast_node)
+
+            if case is not None:
+                self.__push_block_frame(case[0], StackFrame.CONDITIONAL_STATEMENT)
+                yield from self.__run_lazily(case[1])
+                self.__program_stack.pop()
+
+        elif isinstance(ast_node, WhileStatementNode):
+            self.__push_block_frame("while statement", StackFrame.WHILE_STATEMENT)
+
+            while self.visit(ast_node.condition):
+                yield from self.__run_lazily(ast_node.statement_list_node)
+
+                if self.__end_loop_iteration():
+                    break
+
+            self.__program_stack.pop()
+
+        elif ast_node.is_parallel:
+            # A parallel for statement cannot contain a yield statement.
+            self.visit(ast_node)
+
+        else:
+            iterable, curr_stack_frame = self.__enter_for_statement(ast_node)
+            var_name = ast_node.var_decl_statement_node.variables[0].val
+
+            for val in iterable:
+                curr_stack_frame.set_var(var_name, val=val)
+                yield from self.__run_lazily(ast_node.statement_list_node)
+
+                if self.__end_loop_iteration():
+                    break
+
+            self.__program_stack.pop()
+
+    def __call_built_in_func(self, built_in_func, func_args, func_node):
+        func_arg_vals = [self.visit(arg) for arg in func_args]
+        # What the function gets from the program run before its arguments.
+        run_vals = ()
+
+        if built_in_func.writes_output:
+            run_vals = (self.__output,)
+
+        elif built_in_func.reads_input:
+            # The prompt must come after what was printed before it.
+            if self.__input_reader.shows_prompts:
+                self.__output.flush()
+
+            run_vals = (self.__input_reader,)
+
+        elif built_in_func.uses_files:
+            run_vals = (self.__open_files,)
+
+        try:
+            val = built_in_func.func(*run_vals, *func_arg_vals)
+        except ValueError:
+            if not func_args:
+                self.__error(f'Invalid literal for "{built_in_func.name}"', func_node)
+
+            self.__error(
+                f'Invalid literal for "{built_in_func.name}": "{func_arg_vals[0]}"',
+                func_args[0],
+            )
+        except BuiltInFuncError as e:
+            self.__error(e.args[0], func_node)
+
+        typecode = _ARRAY_TYPECODES.get(func_node.type_)
+
+        if typecode is not None and type(val) is list:
+            try:
+                return array.array(typecode, val)
+            except OverflowError:
+                self.__error(InterpreterError.INT_ARRAY_OVERFLOW, func_node)
+
+        return val
 
     def visitAccessNode(self, ast_node):
         """
@@ -144,24 +427,39 @@ class Interpreter(ASTNodeVisitor):
             else self.visit(ast_node.end_index_node)
         )
 
-        self.__check_start_index(start_index, end_index, accessor_len, ast_node.token)
+        self.__check_start_index(start_index, end_index, accessor_len, ast_node)
         return (
             accessor[start_index]
             if end_index is None
             else accessor[start_index:end_index]
         )
 
-    def __check_start_index(self, start_index, end_index, accessor_len, accessor_token):
+    def visitMapAccessNode(self, ast_node):
+        map_ = self.visit(ast_node.accessor_node)
+        key = self.visit(ast_node.start_index_node)
+
+        try:
+            return map_[key]
+        except KeyError:
+            self.__error(f'The key "{key}" is not found', ast_node)
+
+    def __check_start_index(self, start_index, end_index, accessor_len, accessor_node):
         if abs(start_index) >= accessor_len:
             self.__error(
                 f'The index is out of range: "[{start_index}{":" + str(end_index) if end_index is not None else ""}]"',
-                accessor_token,
+                accessor_node,
             )
 
-    def visitNumberNode(self, ast_node):
-        if ast_node.val == 0:
-            self.__zero_token = ast_node.token
+    def visitArrayNode(self, ast_node):
+        try:
+            return _new_array(
+                ast_node.type_,
+                [self.visit(element_node) for element_node in ast_node.element_nodes],
+            )
+        except OverflowError:
+            self.__error(InterpreterError.INT_ARRAY_OVERFLOW, ast_node)
 
+    def visitNumberNode(self, ast_node):
         return ast_node.val
 
     def visitBoolNode(self, ast_node):
@@ -173,74 +471,112 @@ class Interpreter(ASTNodeVisitor):
     def visitStrNode(self, ast_node):
         return ast_node.val
 
-    def visitUnaryOpNode(self, ast_node):
-        match (ast_node.op_token.type_):
-            case Token.PLUS:
-                return +self.visit(ast_node.child_node)
-            case Token.MINUS:
-                return -self.visit(ast_node.child_node)
-            case Token.K_NOT:
-                return not self.visit(ast_node.child_node)
-
-    def visitBinaryOpNode(self, ast_node):
-        match (ast_node.op_token.type_):
-            case Token.PLUS:
-                left_node_val = self.visit(ast_node.left_node)
-                right_node_val = self.visit(ast_node.right_node)
-
-                if isinstance(left_node_val, str) or isinstance(right_node_val, str):
-                    return str(left_node_val) + str(right_node_val)
-
-                return self.visit(ast_node.left_node) + self.visit(ast_node.right_node)
-            case Token.MINUS:
-                return self.visit(ast_node.left_node) - self.visit(ast_node.right_node)
-            case Token.MULTIPLICATION:
-                return self.visit(ast_node.left_node) * self.visit(ast_node.right_node)
-            case Token.INT_DIVISION:
-                right_val = self.visit(ast_node.right_node)
-
-                if right_val == 0:
-                    self.__error(InterpreterError.DIVISION_BY_ZERO, self.__zero_token)
-
-                return self.visit(ast_node.left_node) // right_val
-            case Token.FLOAT_DIVISION:
-                right_val = self.visit(ast_node.right_node)
-
-                if right_val == 0:
-                    self.__error(InterpreterError.DIVISION_BY_ZERO, self.__zero_token)
-
-                return self.visit(ast_node.left_node) / right_val
-            case Token.MODULO:
-                right_val = self.visit(ast_node.right_node)
-
-                if right_val == 0:
-                    self.__error(InterpreterError.MODULO_BY_ZERO, self.__zero_token)
-
-                return self.visit(ast_node.left_node) % right_val
-            case Token.EQUALS:
-                return self.visit(ast_node.left_node) == self.visit(ast_node.right_node)
-            case Token.NOT_EQUALS:
-                return self.visit(ast_node.left_node) != self.visit(ast_node.right_node)
-            case Token.LESS_THAN:
-                return self.visit(ast_node.left_node) < self.visit(ast_node.right_node)
-            case Token.LESS_THAN_OR_EQUALS:
-                return self.visit(ast_node.left_node) <= self.visit(ast_node.right_node)
-            case Token.GREATER_THAN:
-                return self.visit(ast_node.left_node) > self.visit(ast_node.right_node)
-            case Token.GREATER_THAN_OR_EQUALS:
-                return self.visit(ast_node.left_node) >= self.visit(ast_node.right_node)
-            case Token.K_AND:
-                return self.visit(ast_node.left_node) and self.visit(
-                    ast_node.right_node
-                )
-            case Token.K_OR:
-                return self.visit(ast_node.left_node) or self.visit(ast_node.right_node)
+    def visitNegNode(self, ast_node):
+        return -self.visit(ast_node.child_node)
+
+    def visitPosNode(self, ast_node):
+        return self.visit(ast_node.child_node)
+
+    def visitNotNode(self, ast_node):
+        return not self.visit(ast_node.child_node)
+
+    def visitAddNode(self, ast_node):
+        return self.visit(ast_node.left_node) + self.visit(ast_node.right_node)
+
+    def visitConcatNode(self, ast_node):
+        return _concat(self.visit(ast_node.left_node), self.visit(ast_node.right_node))
+
+    def visitSubNode(self, ast_node):
+        return self.visit(ast_node.left_node) - self.visit(ast_node.right_node)
+
+    def visitMulNode(self, ast_node):
+        return self.visit(ast_node.left_node) * self.visit(ast_node.right_node)
+
+    def visitIntDivNode(self, ast_node):
+        left_val = self.visit(ast_node.left_node)
+        right_val = self.visit(ast_node.right_node)
+
+        try:
+            return left_val // right_val
+        except ZeroDivisionError:
+            self.__error(InterpreterError.DIVISION_BY_ZERO, ast_node.right_node)
+
+    def visitFloatDivNode(self, ast_node):
+        left_val = self.visit(ast_node.left_node)
+        right_val = self.visit(ast_node.right_node)
+
+        try:
+            return left_val / right_val
+        except ZeroDivisionError:
+            self.__error(InterpreterError.DIVISION_BY_ZERO, ast_node.right_node)
+
+    def visitModNode(self, ast_node):
+        left_val = self.visit(ast_node.left_node)
+        right_val = self.visit(ast_node.right_node)
+
+        try:
+            return left_val % right_val
+        except ZeroDivisionError:
+            self.__error(InterpreterError.MODULO_BY_ZERO, ast_node.right_node)
+
+    def visitEqualsNode(self, ast_node):
+        return self.visit(ast_node.left_node) == self.visit(ast_node.right_node)
+
+    def visitNotEqualsNode(self, ast_node):
+        return self.visit(ast_node.left_node) != self.visit(ast_node.right_node)
+
+    def visitLessThanNode(self, ast_node):
+        return self.visit(ast_node.left_node) < self.visit(ast_node.right_node)
+
+    def visitLessThanOrEqualsNode(self, ast_node):
+        return self.visit(ast_node.left_node) <= self.visit(ast_node.right_node)
+
+    def visitGreaterThanNode(self, ast_node):
+        return self.visit(ast_node.left_node) > self.visit(ast_node.right_node)
+
+    def visitGreaterThanOrEqualsNode(self, ast_node):
+        return self.visit(ast_node.left_node) >= self.visit(ast_node.right_node)
+
+    def visitAndNode(self, ast_node):
+        return self.visit(ast_node.left_node) and self.visit(ast_node.right_node)
+
+    def visitOrNode(self, ast_node):
+        return self.visit(ast_node.left_node) or self.visit(ast_node.right_node)
+
+    def visitNaryOpNode(self, ast_node):
+        """
+        Folds the operands from left to right; "and" and "or" short-circuit.
+        """
+        operand_nodes = ast_node.operand_nodes
+        result = self.visit(operand_nodes[0])
+
+        for i, op_kind in enumerate(ast_node.op_kinds, start=1):
+            if op_kind == Interpreter.AND_KIND:
+                if result:
+                    result = self.visit(operand_nodes[i])
+            elif op_kind == Interpreter.OR_KIND:
+                if not result:
+                    result = self.visit(operand_nodes[i])
+            else:
+                try:
+                    result = Interpreter.NARY_OP_FUNCS[op_kind](
+                        result, self.visit(operand_nodes[i])
+                    )
+                except ZeroDivisionError:
+                    self.__error(
+                        InterpreterError.MODULO_BY_ZERO
+                        if op_kind == Interpreter.MOD_KIND
+                        else InterpreterError.DIVISION_BY_ZERO,
+                        operand_nodes[i],
+                    )
+
+        return result
 
     def visitEmptyStatementNode(self, ast_node):
         pass
 
     def visitAssignmentStatementNode(self, ast_node):
-        curr_stack_frame = Interpreter.PROGRAM_STACK.peek()
+        curr_stack_frame = self.__program_stack.peek()
 
         # Handle the case where ast_node.left_node is an AccessNode.
         if isinstance(ast_node.left_node, AccessNode):
@@ -250,6 +586,12 @@ class Interpreter(ASTNodeVisitor):
                 return
 
             accessor = curr_stack_frame.get_var(access_node.accessor_node.val)
+
+            if isinstance(access_node, MapAccessNode):
+                key = self.visit(access_node.start_index_node)
+                accessor[key] = self.visit(ast_node.right_node)
+                return
+
             accessor_len = len(accessor)
 
             start_index = self.visit(access_node.start_index_node)
@@ -263,14 +605,17 @@ class Interpreter(ASTNodeVisitor):
                 start_index,
                 end_index,
                 accessor_len,
-                access_node.accessor_node.token,
+                access_node.accessor_node,
             )
             right_node_val = self.visit(ast_node.right_node)
 
-            if end_index is None:
-                accessor[start_index] = right_node_val
-            else:
-                accessor[start_index:end_index] = right_node_val
+            try:
+                if end_index is None:
+                    accessor[start_index] = right_node_val
+                else:
+                    accessor[start_index:end_index] = right_node_val
+            except OverflowError:
+                self.__error(InterpreterError.INT_ARRAY_OVERFLOW, ast_node.right_node)
 
             left_node_val = access_node.accessor_node.val
             right_node_val = accessor
@@ -281,68 +626,62 @@ class Interpreter(ASTNodeVisitor):
         curr_stack_frame.set_var(left_node_val, val=right_node_val)
 
     def visitConditionalStatementNode(self, ast_node):
-        for i, (condition, statement) in enumerate(ast_node.if_cases):
-            condition_result = self.visit(condition)
-
-            if condition_result:
-                stack_frame_name = "if statement" if i == 0 else "elseif statement"
-
-                # Create a new stack frame for the if statements here.
-                Interpreter.PROGRAM_STACK.push(
-                    StackFrame(
-                        stack_frame_name,
-                        StackFrame.CONDITIONAL_STATEMENT,
-                        scope_level=Interpreter.PROGRAM_STACK.peek().scope_level + 1,
-                        outer_scope=Interpreter.PROGRAM_STACK.peek(),
-                    )
-                )
+        case = self.__select_case(ast_node)
 
-                self.visit(statement)
-                Interpreter.PROGRAM_STACK.pop()
-                return
+        if case is not None:
+            self.__push_block_frame(case[0], StackFrame.CONDITIONAL_STATEMENT)
+            self.visit(case[1])
+            self.__program_stack.pop()
+
+    def __select_case(self, ast_node):
+        """
+        Return the name of the stack frame and the statements of the case whose
+        condition holds, or None if there is none.
+        """
+        for i, (condition, statement) in enumerate(ast_node.if_cases):
+            if self.visit(condition):
+                return "if statement" if i == 0 else "elseif statement", statement
 
         if ast_node.else_case is not None:
-            # Create a new stack frame for the else statement here.
-            Interpreter.PROGRAM_STACK.push(
-                StackFrame(
-                    "else statement",
-                    StackFrame.CONDITIONAL_STATEMENT,
-                    scope_level=Interpreter.PROGRAM_STACK.peek().scope_level + 1,
-                    outer_scope=Interpreter.PROGRAM_STACK.peek(),
-                )
-            )
+            return "else statement", ast_node.else_case
 
-            self.visit(ast_node.else_case)
-            Interpreter.PROGRAM_STACK.pop()
+        return None
 
-    def visitWhileStatementNode(self, ast_node):
-        # Create a new stack frame for the while statement here.
-        Interpreter.PROGRAM_STACK.push(
+    def __push_block_frame(self, name, type_):
+        """
+        Create a new stack frame for a statement block.
+        """
+        self.__program_stack.push(
             StackFrame(
-                "while statement",
-                StackFrame.WHILE_STATEMENT,
-                scope_level=Interpreter.PROGRAM_STACK.peek().scope_level + 1,
-                outer_scope=Interpreter.PROGRAM_STACK.peek(),
+                name,
+                type_,
+                scope_level=self.__program_stack.peek().scope_level + 1,
+                outer_scope=self.__program_stack.peek(),
             )
         )
 
-        while True:
-            condition_result = self.visit(ast_node.condition)
-
-            if not condition_result:
-                break
+    def visitWhileStatementNode(self, ast_node):
+        self.__push_block_frame("while statement", StackFrame.WHILE_STATEMENT)
 
+        while self.visit(ast_node.condition):
             self.visit(ast_node.statement_list_node)
 
-            if self.__break_flag:
-                self.__break_flag = False
+            if self.__end_loop_iteration():
                 break
 
-            if self.__continue_flag:
-                self.__continue_flag = False
-                continue
+        self.__program_stack.pop()
 
-        Interpreter.PROGRAM_STACK.pop()
+    def __end_loop_iteration(self):
+        """
+        Return True if the loop has to stop after the current iteration, and
+        reset the flags of break and continue statements.
+        """
+        if self.__break_flag:
+            self.__break_flag = False
+            return True
+
+        self.__continue_flag = False
+        return self.__return_flag
 
     def visitBreakStatementNode(self, ast_node):
         self.__break_flag = True
@@ -361,48 +700,222 @@ class Interpreter(ASTNodeVisitor):
         )
 
     def visitForStatementNode(self, ast_node):
+        iterable, curr_stack_frame = self.__enter_for_statement(ast_node)
+
+        if ast_node.is_parallel:
+            self.__run_parallel_for(ast_node, iterable, curr_stack_frame)
+        elif self.__vectorizer is None or not self.__vectorizer.run(
+            ast_node, iterable, curr_stack_frame
+        ):
+            self.__run_for_loop(ast_node, iterable, curr_stack_frame)
+
+        self.__program_stack.pop()
+
+    def __enter_for_statement(self, ast_node):
+        """
+        Evaluate the iterable, push the stack frame of the for statement and
+        declare its variable. Return the iterable and the stack frame.
+        """
         iterable = self.visit(ast_node.iterable)
 
-        # Create a new stack frame for the for statement here.
-        Interpreter.PROGRAM_STACK.push(
-            StackFrame(
-                "for statement",
-                StackFrame.FOR_STATEMENT,
-                scope_level=Interpreter.PROGRAM_STACK.peek().scope_level + 1,
-                outer_scope=Interpreter.PROGRAM_STACK.peek(),
-            )
-        )
+        if isinstance(iterable, dict):
+            # The keys the map has when the loop starts, so that the loop can
+            # add and remove keys.
+            iterable = list(iterable)
 
+        self.__push_block_frame("for statement", StackFrame.FOR_STATEMENT)
         self.visit(ast_node.var_decl_statement_node)
-        var_node = ast_node.var_decl_statement_node.variables[0]
 
-        curr_stack_frame = Interpreter.PROGRAM_STACK.peek()
+        return iterable, self.__program_stack.peek()
+
+    def __run_for_loop(self, ast_node, iterable, curr_stack_frame):
+        var_name = ast_node.var_decl_statement_node.variables[0].val
 
         for val in iterable:
-            curr_stack_frame.set_var(var_node.val, val=val)
+            curr_stack_frame.set_var(var_name, val=val)
             self.visit(ast_node.statement_list_node)
 
-            if self.__break_flag:
-                self.__break_flag = False
+            if self.__end_loop_iteration():
                 break
 
-            if self.__continue_flag:
-                self.__continue_flag = False
-                continue
+    def __run_parallel_for(self, ast_node, iterable, curr_stack_frame):
+        """
+        Run the chunks of the range in worker processes, print what each chunk
+        printed and add up the sums of the reduction variables, in the order of
+        the chunks. The semantic analysis made sure that nothing else an
+        iteration does is seen outside of it.
+        """
+        reduction_names = ast_node.reduction_names
+        totals = [curr_stack_frame.get_var(name) for name in reduction_names]
+
+        if not iterable:
+            return
+
+        if None in totals:
+            # Let the loop report the undefined variable.
+            self.__run_for_loop(ast_node, iterable, curr_stack_frame)
+            return
+
+        num_chunks = min(len(iterable), Interpreter.PARALLEL_CHUNKS)
+        chunk_bounds = [len(iterable) * i // num_chunks for i in range(num_chunks + 1)]
+        chunks = [
+            iterable[chunk_bounds[i] : chunk_bounds[i + 1]] for i in range(num_chunks)
+        ]
+        chunk_results = self.__map_parallel_chunks(ast_node, curr_stack_frame, chunks)
+
+        for output, sums, error in chunk_results:
+            self.__output.write(output)
+
+            if error is not None:
+                raise error
+
+            totals = [total + sum_ for total, sum_ in zip(totals, sums)]
+
+        for name, total in zip(reduction_names, totals):
+            curr_stack_frame.set_var(name, val=total)
+
+    def __map_parallel_chunks(self, ast_node, curr_stack_frame, chunks):
+        """
+        Yield the results of the chunks, in order. They run in the worker
+        processes of the run, or in this process if there are none or if the
+        state of the loop cannot be sent to them, e.g. since it holds a
+        generator.
+        """
+        state_path = (
+            self.__save_parallel_state(ast_node, curr_stack_frame)
+            if self.__can_use_process_pool()
+            else None
+        )
+
+        if state_path is None:
+            chunk_runner = functools.partial(
+                self.__run_parallel_chunk, ast_node, curr_stack_frame
+            )
+            yield from map(chunk_runner, chunks)
+            return
+
+        if self.__process_pool is None:
+            # The workers must not write what was printed before the loop again.
+            sys.stdout.flush()
+
+            self.__process_pool = concurrent.futures.ProcessPoolExecutor(
+                os.cpu_count(),
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_start_parallel_worker,
+                initargs=(self.__run_parallel_chunk, self.__ast_nodes),
+            )
+
+        self.__parallel_loops += 1
+
+        try:
+            yield from self.__process_pool.map(
+                _run_parallel_chunk,
+                itertools.repeat(self.__parallel_loops),
+                itertools.repeat(state_path),
+                chunks,
+            )
+        finally:
+            os.remove(state_path)
+
+    def __can_use_process_pool(self):
+        """
+        Worker processes are not used by worker processes, or with a single CPU.
+        They are only forked while this is the only thread, since another
+        thread could hold a lock that the worker processes would never get.
+        """
+        if _is_parallel_worker:
+            return False
+
+        if self.__process_pool is not None:
+            return True
+
+        return (
+            (os.cpu_count() or 1) > 1
+            and "fork" in multiprocessing.get_all_start_methods()
+            and threading.current_thread() is threading.main_thread()
+            and threading.active_count() == 1
+        )
+
+    def __save_parallel_state(self, ast_node, curr_stack_frame):
+        """
+        Pickle the parallel for statement and the stack frame its chunks start
+        from into a file for the worker processes, and return its path. Returns
+        None if they cannot be pickled.
+        """
+        if self.__ast_nodes is None:
+            self.__ast_nodes = {id(node): node for node in iter_nodes(self.__ast)}
 
-        Interpreter.PROGRAM_STACK.pop()
+        try:
+            fd, state_path = tempfile.mkstemp(prefix="compact-", suffix=".pickle")
+        except OSError:
+            return None
+
+        try:
+            with os.fdopen(fd, "wb") as state_file:
+                _ParallelStatePickler(state_file, self.__ast_nodes).dump(
+                    (ast_node, curr_stack_frame)
+                )
+        except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+            os.remove(state_path)
+            return None
+
+        return state_path
+
+    def __run_parallel_chunk(self, ast_node, curr_stack_frame, chunk):
+        """
+        Return what the iterations of "chunk" print, the sums they add to the
+        reduction variables, and the InterpreterError they raise, if any.
+        """
+        reduction_names = ast_node.reduction_names
+
+        # In a worker process, the stack frame is the one sent to it.
+        if self.__program_stack.peek() is not curr_stack_frame:
+            self.__program_stack = ProgramStack()
+            self.__program_stack.push(curr_stack_frame)
+
+        for name in reduction_names:
+            curr_stack_frame.set_var(name, val=0)
+
+        output = io.StringIO()
+        program_output = self.__output
+        self.__output = OutputBuffer(output, flush_policy=OutputBuffer.BLOCK)
+
+        try:
+            self.__run_for_loop(ast_node, chunk, curr_stack_frame)
+        except InterpreterError as error:
+            return self.__end_parallel_chunk(program_output, output), None, error
+
+        sums = [curr_stack_frame.get_var(name) for name in reduction_names]
+        return self.__end_parallel_chunk(program_output, output), sums, None
+
+    def __end_parallel_chunk(self, program_output, output):
+        """
+        Return what the chunk printed and print to the program output again.
+        """
+        self.__output.flush()
+        self.__output = program_output
+
+        return output.getvalue()
 
     def visitVarTypeNode(self, ast_node):
         pass
 
     def visitVarDeclStatementNode(self, ast_node):
-        curr_stack_frame = Interpreter.PROGRAM_STACK.peek()
+        curr_stack_frame = self.__program_stack.peek()
+        type_name = ast_node.var_type_node.val
 
         for variable in ast_node.variables:
             if isinstance(variable, AssignmentStatementNode):
                 var_val = self.visit(variable.right_node)
                 curr_stack_frame.variables[variable.left_node.val] = var_val
 
+            elif type_name in _ARRAY_TYPECODES:
+                # Arrays and maps declared without a value start empty.
+                curr_stack_frame.variables[variable.val] = _new_array(type_name)
+
+            elif isinstance(ast_node.var_type_node, MapTypeNode):
+                curr_stack_frame.variables[variable.val] = {}
+
             else:
                 curr_stack_frame.variables[variable.val] = None
 
@@ -417,7 +930,7 @@ class Interpreter(ASTNodeVisitor):
 
     def visitFuncDeclStatementNode(self, ast_node):
         func_name = ast_node.name
-        curr_stack_frame = Interpreter.PROGRAM_STACK.peek()
+        curr_stack_frame = self.__program_stack.peek()
 
         func_frame = StackFrame(
             name=func_name,
@@ -442,7 +955,8 @@ class Interpreter(ASTNodeVisitor):
         curr_stack_frame.functions[func_name] = {
             "stack frame": func_frame,
             "param names": param_names,
-            "body": ast_node.body,
+            # The body is looked up on call since it may not be parsed yet.
+            "func decl": ast_node,
         }
 
     def visitStatementListNode(self, ast_node):
@@ -453,13 +967,13 @@ class Interpreter(ASTNodeVisitor):
                 break
 
     def visitProgramNode(self, ast_node):
-        Interpreter.PROGRAM_STACK.push(
+        self.__program_stack.push(
             StackFrame("global", StackFrame.GLOBAL, scope_level=1)
         )
         self.visit(ast_node.statement_list_node)
-        Interpreter.PROGRAM_STACK.pop()
+        self.__program_stack.pop()
 
-    def __error(self, error_message, token):
+    def __error(self, error_message, ast_node):
         raise InterpreterError(
-            error_message + f" in line: {token.line}, column: {token.col}",
+            error_message + f" in line: {ast_node.line}, column: {ast_node.col}",
         )
@@ -1,19 +1,44 @@
+import sys
+
 from .error import LexerError
 from .tokens import Token
 
 
 class Lexer:
-    def __init__(self, text):
+    def __init__(self, text, char_pos=0, line=1, col=1):
+        """
+        "char_pos", "line" and "col" allow lexing to start in the middle of the text.
+        """
         self.__text = text
-        self.__char_pos = 0
-        self.__curr_char = self.__text[self.__char_pos]
+        self.__char_pos = char_pos
+        self.__curr_char = text[char_pos] if char_pos < len(text) else None
 
-        self.__line = 1
-        self.__col = 1
+        self.__line = line
+        self.__col = col
 
     @property
-    def curr_char(self):
-        return self.__curr_char
+    def char_pos(self):
+        """
+        Right after a token is returned, this is the offset just past its end.
+        """
+        return self.__char_pos
+
+    def __iter__(self):
+        """
+        Yield the remaining tokens, ending with the EOF token.
+        """
+        while True:
+            token = self.get_next_token()
+            yield token
+
+            if token.type_ == Token.EOF:
+                return
+
+    def tokenize(self):
+        """
+        Produce the whole token stream in one pass.
+        """
+        return list(self)
 
     def get_next_token(self):
         while self.__curr_char is not None:
@@ -31,14 +56,18 @@ class Lexer:
 
             if self.__curr_char.isalpha():
                 identifier = self.__convert_to_id()
+                keyword = Token.KEYWORDS.get(identifier)
 
-                if identifier in Token.KEYWORDS:
-                    return Token(identifier, identifier, self.__line, self.__col)
+                if keyword is not None:
+                    return Token(keyword, identifier, self.__line, self.__col)
 
-                if identifier in ["true", "false"]:
+                if identifier in Token.BOOL_LITERALS:
                     return Token(Token.BOOL, identifier, self.__line, self.__col)
 
-                return Token(Token.IDENTIFIER, identifier, self.__line, self.__col)
+                # Interned so that name lookups can compare by identity.
+                return Token(
+                    Token.IDENTIFIER, sys.intern(identifier), self.__line, self.__col
+                )
 
             if self.__curr_char.isdigit():
                 num = self.__convert_to_num()
@@ -95,7 +124,7 @@ class Lexer:
 
         self.__char_pos += 1
 
-        if self.__char_pos == len(self.__text):  # End of input
+        if self.__char_pos >= len(self.__text):  # End of input
             self.__curr_char = None
             return
 
@@ -108,14 +137,11 @@ class Lexer:
         """
         next_char_at = self.__char_pos + offset
 
-        if next_char_at == len(self.__text):
+        if next_char_at >= len(self.__text):
             return None
 
         return self.__text[next_char_at]
 
-    def check_curr_char(self):
-        return self.__curr_char
-
     def __convert_to_arithmetic_operator(self):
         operator = self.__curr_char
         self.__advance()
@@ -289,7 +315,11 @@ class Lexer:
         self.__advance()
         self.__advance()
 
-        while self.__curr_char != "*" and self.__check_next_char() != "/":
+        while (
+            self.__curr_char is not None
+            and self.__curr_char != "*"
+            and self.__check_next_char() != "/"
+        ):
             self.__advance()
 
         self.__advance()
@@ -0,0 +1,67 @@
+import sys
+
+
+class OutputBuffer:
+    """
+    Collects what a program prints and writes it to the stream in large
+    blocks, instead of once per print call.
+
+    Besides when the buffer is full, the output is written before input is
+    read from a terminal, when the program ends and when it fails. The flush policy says when
+    else:
+    - BLOCK: never.
+    - LINE: at the end of every line, e.g. for a terminal.
+    - AUTO: like LINE if the stream is a terminal, like BLOCK otherwise.
+    """
+
+    AUTO = "auto"
+    BLOCK = "block"
+    LINE = "line"
+    FLUSH_POLICIES = (AUTO, BLOCK, LINE)
+
+    DEFAULT_SIZE = 1 << 16
+
+    def __init__(self, stream=None, size=DEFAULT_SIZE, flush_policy=AUTO):
+        """
+        "stream" defaults to whatever sys.stdout is when the output is written.
+        "size" is the number of characters buffered before they are written.
+        """
+        if flush_policy not in OutputBuffer.FLUSH_POLICIES:
+            raise ValueError(f'Unknown flush policy "{flush_policy}"')
+
+        self.__stream = stream
+        self.__size = size
+        self.__flush_policy = flush_policy
+
+        self.__parts = []
+        self.__len = 0
+        # Whether lines are flushed, found out on the first line.
+        self.__flushes_lines = None
+
+    def write(self, text):
+        self.__parts.append(text)
+        self.__len += len(text)
+
+        if self.__len >= self.__size or ("\n" in text and self.__is_line_flushed()):
+            self.flush()
+
+    def flush(self):
+        stream = sys.stdout if self.__stream is None else self.__stream
+
+        if self.__parts:
+            stream.write("".join(self.__parts))
+            self.__parts.clear()
+            self.__len = 0
+
+        stream.flush()
+
+    def __is_line_flushed(self):
+        if self.__flushes_lines is None:
+            if self.__flush_policy == OutputBuffer.AUTO:
+                stream = sys.stdout if self.__stream is None else self.__stream
+                isatty = getattr(stream, "isatty", None)
+                self.__flushes_lines = isatty is not None and isatty()
+            else:
+                self.__flushes_lines = self.__flush_policy == OutputBuffer.LINE
+
+        return self.__flushes_lines
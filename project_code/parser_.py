@@ -1,11 +1,13 @@
 from .abstract_syntax_tree import (
     VarNode,
     AccessNode,
+    ArrayNode,
     NumberNode,
     BoolNode,
     StrNode,
     UnaryOpNode,
     BinaryOpNode,
+    NaryOpNode,
     EmptyStatementNode,
     AssignmentStatementNode,
     FuncCallNode,
@@ -16,22 +18,62 @@ from .abstract_syntax_tree import (
     RangeExprNode,
     ForStatementNode,
     VarTypeNode,
+    MapTypeNode,
+    GenTypeNode,
     VarDeclStatementNode,
     ReturnTypeNode,
     ReturnStatementNode,
+    YieldStatementNode,
     FuncParamNode,
     FuncDeclStatementNode,
     StatementListNode,
     ProgramNode,
 )
+import functools
+
 from .error import ParserError
+from .token_buffer import TokenBuffer
 from .tokens import Token
 
 
 class Parser:
-    def __init__(self, lexer):
-        self.__lexer = lexer
-        self.__curr_token = self.__lexer.get_next_token()
+    ##################
+    # Binding Powers #
+    ##################
+    LOGICAL_BINDING_POWER = 1
+    COMPARISON_BINDING_POWER = 2
+    ARITHMETIC_BINDING_POWER = 3
+    TERM_BINDING_POWER = 4
+
+    BINARY_OP_BINDING_POWERS = {
+        Token.K_AND: LOGICAL_BINDING_POWER,
+        Token.K_OR: LOGICAL_BINDING_POWER,
+        Token.EQUALS: COMPARISON_BINDING_POWER,
+        Token.NOT_EQUALS: COMPARISON_BINDING_POWER,
+        Token.LESS_THAN: COMPARISON_BINDING_POWER,
+        Token.LESS_THAN_OR_EQUALS: COMPARISON_BINDING_POWER,
+        Token.GREATER_THAN: COMPARISON_BINDING_POWER,
+        Token.GREATER_THAN_OR_EQUALS: COMPARISON_BINDING_POWER,
+        Token.PLUS: ARITHMETIC_BINDING_POWER,
+        Token.MINUS: ARITHMETIC_BINDING_POWER,
+        Token.MULTIPLICATION: TERM_BINDING_POWER,
+        Token.INT_DIVISION: TERM_BINDING_POWER,
+        Token.FLOAT_DIVISION: TERM_BINDING_POWER,
+        Token.MODULO: TERM_BINDING_POWER,
+    }
+
+    def __init__(self, lexer, lazy_func_bodies=False):
+        """
+        "lexer" can be a Lexer or any iterable of tokens ending with EOF,
+        e.g. a token list produced in one bulk pass or loaded from a cache.
+
+        With "lazy_func_bodies", function bodies are only matched for braces and
+        their tokens kept; they are parsed when FuncDeclStatementNode.body is
+        first accessed.
+        """
+        self.__tokens = TokenBuffer(lexer)
+        self.__curr_token = self.__tokens.next_token()
+        self.__lazy_func_bodies = lazy_func_bodies
 
     def parse(self):
         ast = self.__program()
@@ -41,22 +83,41 @@ class Parser:
 
         return ast
 
+    @staticmethod
+    def parse_func_body(body_tokens):
+        """
+        Parse the body of a function whose parsing was deferred.
+        """
+        parser = Parser(body_tokens, lazy_func_bodies=True)
+        body = parser.__statement_list()
+
+        if parser.__curr_token.type_ != Token.EOF:
+            parser.__error()
+
+        return body
+
     def __eat(self, token_type):
         """
         Verify that the current token matches the passed token type.
         If it does, then "eat" the current token and assign the next.
         """
         if self.__curr_token.type_ == token_type:
-            self.__curr_token = self.__lexer.get_next_token()
+            self.__curr_token = self.__tokens.next_token()
             return
 
         self.__error(token_type=token_type)
 
+    def __peek_type(self, offset=0):
+        """
+        Return the type of the token "offset" positions after the current one.
+        """
+        return self.__tokens.peek(offset).type_
+
     def __error(self, token_type=None):
         error_message = (
             f'{ParserError.UNEXPECTED_TOKEN} "{self.__curr_token.val}"'
             if token_type is None
-            else f'{ParserError.EXPECTED_TOKEN} "{token_type}"'
+            else f'{ParserError.EXPECTED_TOKEN} "{Token.NAMES[token_type]}"'
         )
 
         raise ParserError(
@@ -120,18 +181,44 @@ class Parser:
         self.__eat(Token.RIGHT_SQUARE_BRACKET)
         return AccessNode(accessor_node, start_index, end_index)
 
+    def __array(self):
+        """
+        array = LEFT_SQUARE_BRACKET, [ logical_expr, { COMMA, logical_expr } ], RIGHT_SQUARE_BRACKET ;
+        """
+        left_bracket_token = self.__curr_token
+        self.__eat(Token.LEFT_SQUARE_BRACKET)
+
+        element_nodes = []
+
+        if self.__curr_token.type_ != Token.RIGHT_SQUARE_BRACKET:
+            element_nodes.append(self.__logical_expr())
+
+            while self.__curr_token.type_ == Token.COMMA:
+                self.__eat(Token.COMMA)
+                element_nodes.append(self.__logical_expr())
+
+        self.__eat(Token.RIGHT_SQUARE_BRACKET)
+        return ArrayNode(left_bracket_token, element_nodes)
+
     def __factor(self):
         """
         factor = ( INT | FLOAT | BOOL | STR )
                  | LEFT_PARENTHESIS, logical_expr, RIGHT_PARENTHESIS
                  | ( PLUS | MINUS ), factor
+                 | array
                  | accessor
                  | func_call
                  | var_name ;
         """
         token = self.__curr_token
 
-        if self.__lexer.check_curr_char() == "[":
+        if token.type_ == Token.LEFT_SQUARE_BRACKET:
+            return self.__array()
+
+        if (
+            token.type_ in (Token.IDENTIFIER, Token.STR)
+            and self.__peek_type() == Token.LEFT_SQUARE_BRACKET
+        ):
             return self.__accessor()
 
         if token.type_ in (Token.INT, Token.FLOAT):
@@ -159,75 +246,60 @@ class Parser:
 
         if (
             self.__curr_token.type_ == Token.IDENTIFIER
-            and self.__lexer.curr_char == "("
+            and self.__peek_type() == Token.LEFT_PARENTHESIS
         ):
             return self.__func_call()
 
         return self.__var_name()
 
-    def __binary_op(self, func, operations):
-        left_node = func()
-
-        while self.__curr_token.type_ in operations:
-            op_token = self.__curr_token
-            self.__eat(op_token.type_)
-
-            left_node = BinaryOpNode(left_node, op_token, right_node=func())
-
-        return left_node
-
-    def __term(self):
-        """
-        term = factor, { ( MULTIPLICATION | INT_DIVISION | FLOAT_DIVISION | MODULO ), factor } ;
-        """
-        return self.__binary_op(
-            self.__factor,
-            (
-                Token.MULTIPLICATION,
-                Token.INT_DIVISION,
-                Token.FLOAT_DIVISION,
-                Token.MODULO,
-            ),
-        )
-
-    def __arithmetic_expr(self):
-        """
-        arithmetic_expr = term, { ( PLUS | MINUS ), term }
-        """
-        return self.__binary_op(self.__term, (Token.PLUS, Token.MINUS))
-
-    def __comparison_expr(self):
+    def __logical_expr(self, min_binding_power=0):
         """
+        logical_expr = comparison_expr, { ( K_AND | K_OR ), comparison_expr } ;
         comparison_expr = K_NOT, comparison_expr
                           | arithmetic_expr, { ( EQUALS | NOT_EQUALS | LESS_THAN | LESS_THAN_OR_EQUALS
                                                  | GREATER_THAN | GREATER_THAN_OR_EQUALS ), arithmetic_expr } ;
+        arithmetic_expr = term, { ( PLUS | MINUS ), term } ;
+        term = factor, { ( MULTIPLICATION | INT_DIVISION | FLOAT_DIVISION | MODULO ), factor } ;
+
+        Parsed by precedence climbing over BINARY_OP_BINDING_POWERS: only operators
+        that bind tighter than "min_binding_power" are consumed at this level.
+        Consecutive operators of the same precedence are collected into a NaryOpNode.
         """
-        if self.__curr_token.type_ == Token.K_NOT:
+        if (
+            self.__curr_token.type_ == Token.K_NOT
+            and min_binding_power < Parser.COMPARISON_BINDING_POWER
+        ):
             op_token = self.__curr_token
             self.__eat(Token.K_NOT)
 
-            return UnaryOpNode(op_token, self.__comparison_expr())
-
-        return self.__binary_op(
-            self.__arithmetic_expr,
-            (
-                Token.EQUALS,
-                Token.NOT_EQUALS,
-                Token.LESS_THAN,
-                Token.LESS_THAN_OR_EQUALS,
-                Token.GREATER_THAN,
-                Token.GREATER_THAN_OR_EQUALS,
-            ),
-        )
+            left_node = UnaryOpNode(
+                op_token, self.__logical_expr(Parser.LOGICAL_BINDING_POWER)
+            )
+        else:
+            left_node = self.__factor()
 
-    def __logical_expr(self):
-        """
-        logical_expr = comparison_expr, { ( K_AND | K_OR ), comparison_expr } ;
-        """
-        return self.__binary_op(
-            self.__comparison_expr,
-            (Token.K_AND, Token.K_OR),
-        )
+        binding_powers = Parser.BINARY_OP_BINDING_POWERS
+        prev_binding_power = None
+
+        while True:
+            op_token = self.__curr_token
+            binding_power = binding_powers.get(op_token.type_, 0)
+
+            if binding_power <= min_binding_power:
+                return left_node
+
+            self.__eat(op_token.type_)
+            right_node = self.__logical_expr(binding_power)
+
+            if binding_power != prev_binding_power:
+                left_node = BinaryOpNode(left_node, op_token, right_node)
+            else:
+                if isinstance(left_node, BinaryOpNode):
+                    left_node = NaryOpNode(left_node)
+
+                left_node.append(op_token, right_node)
+
+            prev_binding_power = binding_power
 
     def __empty_statement(self):
         """
@@ -244,7 +316,7 @@ class Parser:
         """
         left_node = (
             self.__accessor()
-            if self.__lexer.check_curr_char() == "["
+            if self.__peek_type() == Token.LEFT_SQUARE_BRACKET
             else self.__var_name()
         )
         op_token = self.__curr_token
@@ -386,8 +458,16 @@ class Parser:
         """
         for_statement = K_FOR, LEFT_PARENTHESIS, K_VAR, LEFT_PARENTHESIS, var_type, RIGHT_PARENTHESIS, var_name,
                         K_FROM, ( logical_expr | range_expr ), RIGHT_PARENTHESIS,
+                        LEFT_CURLY_BRACKET, statement_list, RIGHT_CURLY_BRACKET
+                      | K_PARALLEL, K_FOR, LEFT_PARENTHESIS, K_VAR, LEFT_PARENTHESIS, var_type, RIGHT_PARENTHESIS, var_name,
+                        K_FROM, range_expr, RIGHT_PARENTHESIS,
                         LEFT_CURLY_BRACKET, statement_list, RIGHT_CURLY_BRACKET ;
         """
+        is_parallel = self.__curr_token.type_ == Token.K_PARALLEL
+
+        if is_parallel:
+            self.__eat(Token.K_PARALLEL)
+
         self.__eat(Token.K_FOR)
         self.__eat(Token.LEFT_PARENTHESIS)
 
@@ -402,7 +482,11 @@ class Parser:
         self.__eat(Token.K_FROM)
 
         _ = self.__logical_expr()
-        iterable = self.__range_expr(_) if self.__curr_token.type_ == Token.K_TO else _
+        iterable = (
+            self.__range_expr(_)
+            if is_parallel or self.__curr_token.type_ == Token.K_TO
+            else _
+        )
 
         self.__eat(Token.RIGHT_PARENTHESIS)
         self.__eat(Token.LEFT_CURLY_BRACKET)
@@ -410,30 +494,75 @@ class Parser:
         statement_list = self.__statement_list()
         self.__eat(Token.RIGHT_CURLY_BRACKET)
 
-        return ForStatementNode(var_decl, iterable, statement_list)
+        return ForStatementNode(var_decl, iterable, statement_list, is_parallel)
+
+    def __var_type(self, allow_map_and_gen=True):
+        """
+        var_type = map_type | gen_type | scalar_type, [ LEFT_SQUARE_BRACKET, RIGHT_SQUARE_BRACKET ] ;
+        """
+        token = self.__curr_token
+
+        if allow_map_and_gen and token.type_ == Token.K_MAP:
+            return self.__map_type()
+
+        if allow_map_and_gen and token.type_ == Token.K_GEN:
+            return self.__gen_type()
+
+        type_node = self.__scalar_type()
+
+        if self.__curr_token.type_ == Token.LEFT_SQUARE_BRACKET:
+            self.__eat(Token.LEFT_SQUARE_BRACKET)
+            self.__eat(Token.RIGHT_SQUARE_BRACKET)
+            return VarTypeNode(token, is_array=True)
 
-    def __var_type(self):
+        return type_node
+
+    def __scalar_type(self):
         """
-        var_type = K_INT | K_FLOAT | K_BOOL | K_STR ;
+        scalar_type = K_INT | K_FLOAT | K_BOOL | K_STR ;
         """
         token = self.__curr_token
 
         match token.type_:
             case Token.K_INT:
                 self.__eat(Token.K_INT)
-                return VarTypeNode(token)
 
             case Token.K_FLOAT:
                 self.__eat(Token.K_FLOAT)
-                return VarTypeNode(token)
 
             case Token.K_BOOL:
                 self.__eat(Token.K_BOOL)
-                return VarTypeNode(token)
 
             case _:
                 self.__eat(Token.K_STR)
-                return VarTypeNode(token)
+
+        return VarTypeNode(token)
+
+    def __map_type(self):
+        """
+        map_type = K_MAP, LEFT_PARENTHESIS, scalar_type, COMMA,
+                   scalar_type, [ LEFT_SQUARE_BRACKET, RIGHT_SQUARE_BRACKET ], RIGHT_PARENTHESIS ;
+        """
+        map_token = self.__curr_token
+        self.__eat(Token.K_MAP)
+        self.__eat(Token.LEFT_PARENTHESIS)
+
+        key_type_node = self.__scalar_type()
+        self.__eat(Token.COMMA)
+
+        value_type_node = self.__var_type(allow_map_and_gen=False)
+        self.__eat(Token.RIGHT_PARENTHESIS)
+
+        return MapTypeNode(map_token, key_type_node, value_type_node)
+
+    def __gen_type(self):
+        """
+        gen_type = K_GEN, scalar_type, [ LEFT_SQUARE_BRACKET, RIGHT_SQUARE_BRACKET ] ;
+        """
+        gen_token = self.__curr_token
+        self.__eat(Token.K_GEN)
+
+        return GenTypeNode(gen_token, self.__var_type(allow_map_and_gen=False))
 
     def __var_decl_statement(self):
         """
@@ -478,7 +607,7 @@ class Parser:
 
     def __return_type(self):
         """
-        return_type = K_INT | K_FLOAT | K_BOOL | K_STR | K_VOID ;
+        return_type = var_type | K_VOID ;
         """
         token = self.__curr_token
 
@@ -486,7 +615,7 @@ class Parser:
             self.__eat(Token.K_VOID)
             return ReturnTypeNode(token)
 
-        return ReturnTypeNode(self.__var_type().token)
+        return ReturnTypeNode(self.__var_type())
 
     def __return_statement(self):
         """
@@ -500,6 +629,15 @@ class Parser:
 
         return ReturnStatementNode(return_token)
 
+    def __yield_statement(self):
+        """
+        yield_statement = K_YIELD, logical_expr ;
+        """
+        yield_token = self.__curr_token
+        self.__eat(Token.K_YIELD)
+
+        return YieldStatementNode(yield_token, self.__logical_expr())
+
     def __func_param(self):
         """
         func_param = K_VAR, LEFT_PARENTHESIS, var_type, RIGHT_PARENTHESIS, var_name, [ ASSIGN, logical_expr ] ;
@@ -559,6 +697,19 @@ class Parser:
         self.__eat(Token.RIGHT_PARENTHESIS)
 
         self.__eat(Token.LEFT_CURLY_BRACKET)
+
+        if self.__lazy_func_bodies:
+            body_tokens = self.__func_body_tokens()
+            self.__eat(Token.RIGHT_CURLY_BRACKET)
+
+            return FuncDeclStatementNode(
+                return_type,
+                func_token,
+                func_params,
+                func_body=None,
+                parse_body=functools.partial(Parser.parse_func_body, body_tokens),
+            )
+
         statement_list = self.__statement_list()
         self.__eat(Token.RIGHT_CURLY_BRACKET)
 
@@ -566,9 +717,38 @@ class Parser:
             return_type, func_token, func_params, statement_list
         )
 
+    def __func_body_tokens(self):
+        """
+        Collect the tokens of a function body up to its closing RIGHT_CURLY_BRACKET
+        without parsing them. The collected tokens end with an EOF token placed
+        at the closing bracket, so errors found later point at the right place.
+        """
+        body_tokens = []
+        depth = 0
+
+        while True:
+            token = self.__curr_token
+
+            if token.type_ == Token.RIGHT_CURLY_BRACKET:
+                if depth == 0:
+                    break
+
+                depth -= 1
+            elif token.type_ == Token.LEFT_CURLY_BRACKET:
+                depth += 1
+            elif token.type_ == Token.EOF:
+                break
+
+            body_tokens.append(token)
+            self.__curr_token = self.__tokens.next_token()
+
+        body_tokens.append(Token(Token.EOF, None, token.line, token.col))
+        return body_tokens
+
     def __statement(self):
         """
-        statement = func_decl_statement | return_statement, SEMICOLON | var_decl_statement, SEMICOLON | for_statement
+        statement = func_decl_statement | return_statement, SEMICOLON | yield_statement, SEMICOLON
+                    | var_decl_statement, SEMICOLON | for_statement
                     | continue_statement, SEMICOLON | break_statement, SEMICOLON | while_loop_statement
                     | conditional_statement | func_call, SEMICOLON | assignment_statement, SEMICOLON | empty_statement ;
         """
@@ -580,12 +760,17 @@ class Parser:
             self.__eat(Token.SEMICOLON)
             return curr_statement
 
+        if self.__curr_token.type_ == Token.K_YIELD:
+            curr_statement = self.__yield_statement()
+            self.__eat(Token.SEMICOLON)
+            return curr_statement
+
         if self.__curr_token.type_ == Token.K_VAR:
             curr_statement = self.__var_decl_statement()
             self.__eat(Token.SEMICOLON)
             return curr_statement
 
-        if self.__curr_token.type_ == Token.K_FOR:
+        if self.__curr_token.type_ in (Token.K_FOR, Token.K_PARALLEL):
             return self.__for_statement()
 
         if self.__curr_token.type_ == Token.K_CONTINUE:
@@ -606,7 +791,7 @@ class Parser:
 
         if (
             self.__curr_token.type_ == Token.IDENTIFIER
-            and self.__lexer.curr_char == "("
+            and self.__peek_type() == Token.LEFT_PARENTHESIS
         ):
             curr_statement = self.__func_call(is_statement=True)
             self.__eat(Token.SEMICOLON)
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import struct
+import tempfile
+
+from .flat_ast import FlatAST
+
+
+class ProgramCache:
+    """
+    Keeps checked programs on disk, like __pycache__ does for Python modules, so
+    that running an unchanged program skips lexing, parsing and the semantic
+    analysis.
+
+    Each program has one cache file. It starts with a key, the hash of the
+    source text, the compiler version and the parse mode, followed by the
+    FlatAST of the checked program. A file whose key does not match is stale
+    and is overwritten by the next run.
+
+    A cache file is written to a temporary file next to it and renamed over it,
+    so that processes running the same program at the same time read either a
+    whole cache file or none. The cache is only an optimization: a cache file
+    that cannot be read or written is ignored.
+    """
+
+    DIR_NAME = "__cocache__"
+    SUFFIX = ".coc"
+    KEY_SIZE = hashlib.sha256().digest_size
+
+    def __init__(self, cache_dir=None):
+        """
+        Without "cache_dir", a program is cached in a __cocache__ directory next
+        to it.
+        """
+        self.__cache_dir = cache_dir
+
+    @staticmethod
+    def key(text, eager):
+        key = hashlib.sha256(compiler_version())
+        key.update(b"eager" if eager else b"lazy")
+        key.update(text.encode("utf-8"))
+
+        return key.digest()
+
+    def load(self, filename, key):
+        """
+        Return the cached ProgramNode of "filename", or None if there is no cache
+        file for "key".
+        """
+        try:
+            with open(self.__cache_path(filename), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if data[: ProgramCache.KEY_SIZE] != key:
+            return None
+
+        try:
+            return FlatAST.from_buffer(
+                memoryview(data)[ProgramCache.KEY_SIZE :]
+            ).to_tree()
+        except (
+            struct.error,
+            ValueError,
+            TypeError,
+            KeyError,
+            IndexError,
+            AttributeError,
+        ):
+            return None  # A damaged cache file, or one from another build.
+
+    def store(self, filename, key, tree):
+        """
+        Cache the checked ProgramNode "tree" of "filename" under "key". Function
+        bodies that were never parsed are left out, as they are never run.
+        """
+        data = FlatAST.from_tree(tree, parse_func_bodies=False).to_bytes()
+        cache_path = self.__cache_path(filename)
+        cache_dir = os.path.dirname(cache_path)
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                prefix=os.path.basename(cache_path), suffix=".tmp", dir=cache_dir
+            )
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(key)
+                f.write(data)
+
+            # mkstemp makes the file private to its owner, unlike open().
+            os.chmod(temp_path, _file_mode())
+            os.replace(temp_path, cache_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def __cache_path(self, filename):
+        path = os.path.abspath(filename)
+        name = os.path.splitext(os.path.basename(path))[0]
+
+        if self.__cache_dir is None:
+            return os.path.join(
+                os.path.dirname(path),
+                ProgramCache.DIR_NAME,
+                name + ProgramCache.SUFFIX,
+            )
+
+        # Programs from different directories share "cache_dir".
+        path_hash = hashlib.sha256(path.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(
+            self.__cache_dir, f"{name}-{path_hash}{ProgramCache.SUFFIX}"
+        )
+
+
+_default_file_mode = None
+
+
+def _file_mode():
+    """
+    The mode open() gives a new file under the umask of the process.
+    """
+    global _default_file_mode
+
+    if _default_file_mode is None:
+        # The umask can only be read by setting it.
+        umask = os.umask(0)
+        os.umask(umask)
+        _default_file_mode = 0o666 & ~umask
+
+    return _default_file_mode
+
+
+_compiler_version = None
+
+
+def compiler_version():
+    """
+    Identify the build of the compiler by the size and modification time of its
+    source files, so that changing any of them invalidates every cache file.
+    """
+    global _compiler_version
+
+    if _compiler_version is None:
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        version = hashlib.sha256(FlatAST.MAGIC)
+
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                stat = os.stat(os.path.join(package_dir, name))
+                version.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+
+        _compiler_version = version.digest()
+
+    return _compiler_version
@@ -65,7 +65,7 @@ class StackFrame:
             return (
                 self.__functions[key]["stack frame"],
                 self.__functions[key]["param names"],
-                self.__functions[key]["body"],
+                self.__functions[key]["func decl"],
             )
 
         if self.__outer_scope is not None:
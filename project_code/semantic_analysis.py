@@ -1,14 +1,42 @@
-import copy
-
-from .abstract_syntax_tree import VarNode, AccessNode, AssignmentStatementNode
+from .abstract_syntax_tree import (
+    VarNode,
+    FuncCallNode,
+    AccessNode,
+    ArrayNode,
+    MapAccessNode,
+    AssignmentStatementNode,
+    NegNode,
+    PosNode,
+    NotNode,
+    AddNode,
+    ConcatNode,
+    SubNode,
+    MulNode,
+    IntDivNode,
+    FloatDivNode,
+    ModNode,
+    EqualsNode,
+    NotEqualsNode,
+    LessThanNode,
+    LessThanOrEqualsNode,
+    GreaterThanNode,
+    GreaterThanOrEqualsNode,
+    AndNode,
+    OrNode,
+    BINARY_OP_NODES,
+)
+from .built_in_funcs import BUILT_IN_FUNCS
 from .error import SemanticError
 from .symbol_table import (
     SymbolTable,
+    RecordingSymbolTable,
     BuiltInTypeSymbol,
+    ArrayTypeSymbol,
+    MapTypeSymbol,
+    GeneratorTypeSymbol,
     BuiltInFuncSymbol,
+    Types,
     VarSymbol,
-    ConditionalSymbol,
-    LoopSymbol,
     FuncSymbol,
 )
 from .tokens import Token
@@ -16,37 +44,135 @@ from .type_checking import TypeChecker
 from .visit_ast_node import ASTNodeVisitor
 
 
-class SemanticAnalyzer(ASTNodeVisitor):
-    def __init__(self):
-        self.__curr_symbol_table = SymbolTable(
-            scope_name="global", scope_level=1, outer_scope=None
+# Returned for a function that is still being checked.
+_PENDING = object()
+
+
+class _EffectRegion:
+    """
+    What a function body or a parallel for statement does to the variables
+    declared outside of it, collected while it is checked.
+    """
+
+    def __init__(self, outer_scope, for_node=None, loop_depth=0):
+        """
+        "for_node" is the parallel for statement, if the region is one, and
+        "loop_depth" the loop depth of its body.
+        """
+        self.outer_scope = outer_scope
+        self.for_node = for_node
+        self.loop_depth = loop_depth
+
+        self.side_effect_node = None  # The first one, in a function body.
+        self.reads = {}  # symbol -> the VarNodes that read it
+        self.callees = {}  # FuncSymbol -> the first FuncCallNode
+        # (symbol, node) for every array or map modified and generator advanced
+        self.mutations = []
+        # Arrays, maps and generators that may refer to one declared outside of
+        # the region.
+        self.aliased_symbols = set()
+        self.reductions = {}  # symbol -> the VarNodes that add to it
+        self.is_checked = False
+
+    @property
+    def is_parallel(self):
+        return self.for_node is not None
+
+    def is_outer(self, symbol):
+        return self.outer_scope.get_symbol(symbol.name) is symbol
+
+    def owns(self, symbol):
+        """
+        Whether the array, map or generator of "symbol" (None if it is not a
+        variable) can only have been created in the region.
+        """
+        return (
+            symbol is not None
+            and not self.is_outer(symbol)
+            and symbol not in self.aliased_symbols
         )
-        self.__curr_symbol_table.add_built_in_symbols()
+
+
+class SemanticAnalyzer(ASTNodeVisitor):
+    # The type-specialized node classes that the operators are turned into.
+    UNARY_OP_NODES = {Token.MINUS: NegNode, Token.PLUS: PosNode, Token.K_NOT: NotNode}
+    BINARY_OP_NODES = {
+        Token.PLUS: AddNode,
+        Token.MINUS: SubNode,
+        Token.MULTIPLICATION: MulNode,
+        Token.INT_DIVISION: IntDivNode,
+        Token.FLOAT_DIVISION: FloatDivNode,
+        Token.MODULO: ModNode,
+        Token.EQUALS: EqualsNode,
+        Token.NOT_EQUALS: NotEqualsNode,
+        Token.LESS_THAN: LessThanNode,
+        Token.LESS_THAN_OR_EQUALS: LessThanOrEqualsNode,
+        Token.GREATER_THAN: GreaterThanNode,
+        Token.GREATER_THAN_OR_EQUALS: GreaterThanOrEqualsNode,
+        Token.K_AND: AndNode,
+        Token.K_OR: OrNode,
+    }
+
+    def __init__(self, incremental=False):
+        """
+        An incremental analyzer can visit new versions of the same program, such
+        as the trees produced by IncrementalParser, and only revisits the
+        top-level statements that an edit can affect. It checks every function
+        body at its declaration, as in eager mode.
+        """
+        self.__curr_symbol_table = self.__create_global_symbol_table(incremental)
 
         self.__return_flag = False
         self.is_func_call_statement = False
 
+        # Lazily parsed functions are checked when they are first called.
+        self.__deferred_func_bodies = {}
+
+        # The function bodies and parallel for statements being checked, and
+        # the checked functions by their symbols.
+        self.__regions = []
+        self.__func_regions = {}
+        # Parallel for statements that call a function still being checked.
+        self.__pending_parallel_regions = []
+
+        # Top-level statement -> (global names it read with the signatures they
+        # resolved to, global symbols it declared, FuncSymbols of the functions
+        # checked in it) from the last successful check.
+        self.__statement_records = {} if incremental else None
+        # The FuncSymbols of the functions checked in the statement being visited.
+        self.__checked_func_symbols = None
+
     def visitVarNode(self, ast_node):
         var_name = ast_node.val
         variable_symbol = self.__curr_symbol_table.get_symbol(var_name)
 
         if variable_symbol is None:
-            self.__error(f'Variable "{var_name}" is not found', ast_node.token)
+            self.__error(f'Variable "{var_name}" is not found', ast_node)
+
+        if self.__regions:
+            self.__regions[-1].reads.setdefault(variable_symbol, []).append(ast_node)
 
+        ast_node.type_ = variable_symbol.type_.name
         return variable_symbol.type_
 
     def visitFuncCallNode(self, ast_node):
         func_name = ast_node.func_name
-        func_token = ast_node.token
         func_args = ast_node.args
         func_symbol = self.__curr_symbol_table.get_symbol(f"func_{func_name}")
 
         if func_symbol is None:
-            self.__error(f'Function "{func_name}" is not found', func_token)
+            self.__error(f'Function "{func_name}" is not found', ast_node)
 
         if isinstance(func_symbol, BuiltInFuncSymbol):
-            self.__handle_built_in_funcs(func_name, func_args, func_token)
-            return func_symbol.type_
+            return self.__handle_built_in_funcs(
+                func_symbol.built_in_func, func_args, ast_node
+            )
+
+        if func_symbol.type_ is not None:
+            ast_node.type_ = func_symbol.type_.name
+
+        if self.__regions:
+            self.__regions[-1].callees.setdefault(func_symbol, ast_node)
 
         num_args = len(func_args)
         num_params = len(func_symbol.params)
@@ -59,83 +185,225 @@ class SemanticAnalyzer(ASTNodeVisitor):
                 f'Function "{func_name}" takes {num_non_default_params}'
                 f'{"" if num_params in (0, num_non_default_params) else " to " + str(num_params)} '
                 f"positional arguments but {num_args} were given",
-                func_token,
+                ast_node,
             )
 
         for i, arg in enumerate(func_args):
             TypeChecker.check_assignment_statement(
-                func_symbol.params[i].type_.name,
-                self.visit(arg).name,
-                arg.token,
+                func_symbol.params[i].type_,
+                self.visit(arg),
+                arg,
             )
 
         if func_symbol.type_ is None and not ast_node.is_statement:
             self.__error(
                 f'"void" function "{func_name}" is not allowed',
-                func_token,
+                ast_node,
             )
 
+        deferred_func_body = self.__deferred_func_bodies.pop(func_symbol, None)
+
+        if deferred_func_body is not None:
+            self.__check_func_body(*deferred_func_body)
+
         return func_symbol.type_
 
-    def __handle_built_in_funcs(self, func_name, func_args, func_token):
-        if func_name == "input" and len(func_args) not in (0, 1):
+    def __handle_built_in_funcs(self, built_in_func, func_args, func_node):
+        num_args = len(func_args)
+
+        if not built_in_func.is_variadic and not (
+            built_in_func.num_required_params
+            <= num_args
+            <= len(built_in_func.param_types)
+        ):
             self.__error(
-                f'Function "{func_name}" must take 0 or 1 argument', func_token
+                f'Function "{built_in_func.name}" must take '
+                f"{built_in_func.arity_description}",
+                func_node,
             )
 
-        if (
-            func_name
-            in ("reverse", "len", "typeof", "toint", "tofloat", "tobool", "tostr")
-            and len(func_args) != 1
-        ):
-            self.__error(f'Function "{func_name}" must take 1 argument', func_token)
+        func_arg_types = [self.visit(arg) for arg in func_args]
+        return_type = TypeChecker.check_built_in_func_call(
+            built_in_func, func_arg_types, func_node
+        )
 
-        if func_name == "pow" and len(func_args) != 2:
-            self.__error(f'Function "{func_name}" must take 2 arguments', func_token)
+        if self.__regions:
+            self.__record_built_in_func_call(built_in_func, func_args, func_node)
 
-        func_arg_types = [self.visit(arg).name for arg in func_args]
-        TypeChecker.check_built_in_func_call(func_name, func_arg_types, func_token)
+        if return_type is None:
+            if not func_node.is_statement:
+                self.__error(
+                    f'"void" function "{built_in_func.name}" is not allowed',
+                    func_node,
+                )
+        else:
+            func_node.type_ = return_type.name
+
+        return return_type
+
+    def __record_built_in_func_call(self, built_in_func, func_args, func_node):
+        region = self.__regions[-1]
+
+        if built_in_func.modifies_arg:
+            region.mutations.append((self.__var_symbol(func_args[0]), func_node))
+
+        elif not (built_in_func.is_pure or built_in_func.writes_output):
+            if region.is_parallel:
+                self.__error(
+                    f'The function "{built_in_func.name}" cannot be called in a '
+                    "parallel for statement",
+                    func_node,
+                )
+
+            if region.side_effect_node is None:
+                region.side_effect_node = func_node
 
     def visitAccessNode(self, ast_node):
-        accessor_type = self.visit(ast_node.accessor_node).name
-        TypeChecker.check_accessor(accessor_type, ast_node.accessor_node.token)
+        """
+        Also visits the MapAccessNodes that AccessNodes were turned into, when a
+        top-level statement is checked again.
+        """
+        accessor_type = self.visit(ast_node.accessor_node)
+        TypeChecker.check_accessor(accessor_type, ast_node.accessor_node)
 
-        start_index_type = self.visit(ast_node.start_index_node).name
-        TypeChecker.check_index(start_index_type, ast_node.start_index_node.token)
+        if isinstance(accessor_type, MapTypeSymbol):
+            return self.__visit_map_access(ast_node, accessor_type)
+
+        ast_node.__class__ = AccessNode
+        start_index_type = self.visit(ast_node.start_index_node)
+        TypeChecker.check_index(start_index_type, ast_node.start_index_node)
 
         end_index = ast_node.end_index_node
 
         if end_index is not None:
-            end_index_type = self.visit(end_index).name
-            TypeChecker.check_index(end_index_type, end_index.token)
+            end_index_type = self.visit(end_index)
+            TypeChecker.check_index(end_index_type, end_index)
+
+        # An element of an array, or a string or a slice of an array.
+        node_type = (
+            accessor_type.element_type
+            if isinstance(accessor_type, ArrayTypeSymbol) and end_index is None
+            else accessor_type
+        )
+        ast_node.type_ = node_type.name
+
+        return node_type
+
+    def __visit_map_access(self, ast_node, map_type):
+        TypeChecker.check_key(
+            map_type, self.visit(ast_node.start_index_node), ast_node.start_index_node
+        )
+
+        if ast_node.end_index_node is not None:
+            self.__error("A map cannot be sliced", ast_node.end_index_node)
 
-        return BuiltInTypeSymbol(Token.K_STR)
+        ast_node.__class__ = MapAccessNode
+        ast_node.type_ = map_type.value_type.name
+
+        return map_type.value_type
+
+    def visitArrayNode(self, ast_node):
+        node_type = TypeChecker.check_array(
+            [self.visit(element_node) for element_node in ast_node.element_nodes],
+            ast_node,
+        )
+        ast_node.type_ = node_type.name
+
+        return node_type
 
     def visitNumberNode(self, ast_node):
         if isinstance(ast_node.val, int):
-            return BuiltInTypeSymbol(Token.K_INT)
+            ast_node.type_ = BuiltInTypeSymbol.INT
+            return Types.INT
 
-        return BuiltInTypeSymbol(Token.K_FLOAT)
+        ast_node.type_ = BuiltInTypeSymbol.FLOAT
+        return Types.FLOAT
 
     def visitBoolNode(self, ast_node):
-        return BuiltInTypeSymbol(Token.K_BOOL)
+        ast_node.type_ = BuiltInTypeSymbol.BOOL
+        return Types.BOOL
 
     def visitStrNode(self, ast_node):
-        return BuiltInTypeSymbol(Token.K_STR)
+        ast_node.type_ = BuiltInTypeSymbol.STR
+        return Types.STR
 
     def visitUnaryOpNode(self, ast_node):
-        return TypeChecker.check_unary_op(
-            ast_node.op_token,
-            child_node_type=self.visit(ast_node.child_node).name,
+        """
+        Also visits the type-specialized nodes the UnaryOpNode was turned into,
+        when a top-level statement is checked again.
+        """
+        node_type = TypeChecker.check_unary_op(
+            ast_node.op,
+            child_node_type=self.visit(ast_node.child_node),
+            op_line=ast_node.op_line,
+            op_col=ast_node.op_col,
         )
 
+        ast_node.__class__ = SemanticAnalyzer.UNARY_OP_NODES[ast_node.op]
+        ast_node.type_ = node_type.name
+
+        return node_type
+
     def visitBinaryOpNode(self, ast_node):
-        return TypeChecker.check_binary_op(
-            ast_node.op_token,
-            left_node_type=self.visit(ast_node.left_node).name,
-            right_node_type=self.visit(ast_node.right_node).name,
+        """
+        Also visits the type-specialized nodes the BinaryOpNode was turned into,
+        when a top-level statement is checked again.
+        """
+        left_node_type = self.visit(ast_node.left_node)
+        right_node_type = self.visit(ast_node.right_node)
+
+        node_type = TypeChecker.check_binary_op(
+            ast_node.op,
+            left_node_type=left_node_type,
+            right_node_type=right_node_type,
+            op_line=ast_node.op_line,
+            op_col=ast_node.op_col,
         )
 
+        ast_node.__class__ = self.__binary_op_node_class(
+            ast_node.op, left_node_type, right_node_type
+        )
+        ast_node.type_ = node_type.name
+
+        return node_type
+
+    def visitNaryOpNode(self, ast_node):
+        operand_nodes = ast_node.operand_nodes
+        op_lines, op_cols = ast_node.op_lines, ast_node.op_cols
+        node_type = self.visit(operand_nodes[0])
+        op_kinds = []
+
+        for i, op in enumerate(ast_node.ops):
+            left_node_type = node_type
+            right_node_type = self.visit(operand_nodes[i + 1])
+
+            node_type = TypeChecker.check_binary_op(
+                op,
+                left_node_type=left_node_type,
+                right_node_type=right_node_type,
+                op_line=op_lines[i],
+                op_col=op_cols[i],
+            )
+            op_kinds.append(
+                BINARY_OP_NODES.index(
+                    self.__binary_op_node_class(op, left_node_type, right_node_type)
+                )
+            )
+
+        ast_node.op_kinds = op_kinds
+        ast_node.type_ = node_type.name
+
+        return node_type
+
+    @staticmethod
+    def __binary_op_node_class(op, left_node_type, right_node_type):
+        if op == Token.PLUS and (left_node_type is Types.STR) != (
+            right_node_type is Types.STR
+        ):
+            return ConcatNode
+
+        return SemanticAnalyzer.BINARY_OP_NODES[op]
+
     def visitEmptyStatementNode(self, ast_node):
         pass
 
@@ -144,178 +412,377 @@ class SemanticAnalyzer(ASTNodeVisitor):
 
         if isinstance(left_node, AccessNode):
             TypeChecker.check_accessor_assignment_statement(
-                self.visit(left_node.accessor_node).name, left_node.accessor_node.token
+                self.visit(left_node.accessor_node), left_node.accessor_node
             )
 
         TypeChecker.check_assignment_statement(
-            var_type=self.visit(left_node).name,
-            var_val_type=self.visit(ast_node.right_node).name,
-            var_val_token=ast_node.right_node.token,
+            var_type=self.visit(left_node),
+            var_val_type=self.visit(ast_node.right_node),
+            var_val_node=ast_node.right_node,
         )
 
-    def visitConditionalStatementNode(self, ast_node):
-        symbol_names = []
-        self.__add_conditional_symbols_to_current_scope(ast_node, symbol_names)
+        if self.__regions:
+            self.__record_assignment(ast_node)
 
-        for i, (_, statement_list_node) in enumerate(ast_node.if_cases):
-            self.__curr_symbol_table = SymbolTable(
-                scope_name=symbol_names[i],
-                scope_level=self.__curr_symbol_table.scope_level + 1,
-                outer_scope=self.__curr_symbol_table,
+    def __record_assignment(self, ast_node):
+        region = self.__regions[-1]
+        left_node = ast_node.left_node
+
+        if isinstance(left_node, AccessNode):
+            region.mutations.append(
+                (self.__var_symbol(left_node.accessor_node), left_node)
             )
+            return
 
-            self.visit(statement_list_node)
-            self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
+        var_symbol = self.__curr_symbol_table.get_symbol(left_node.val)
+        self.__record_collection_val(var_symbol, ast_node.right_node)
 
-        if ast_node.else_case is not None:
-            self.__curr_symbol_table = SymbolTable(
-                scope_name=symbol_names[-1],
-                scope_level=self.__curr_symbol_table.scope_level + 1,
-                outer_scope=self.__curr_symbol_table,
+        if not region.is_outer(var_symbol):
+            return
+
+        if not region.is_parallel:
+            if region.side_effect_node is None:
+                region.side_effect_node = left_node
+
+        elif ast_node.op == Token.PLUS_ASSIGN and var_symbol.type_ in (
+            Types.INT,
+            Types.FLOAT,
+        ):
+            region.reductions.setdefault(var_symbol, []).append(left_node)
+
+        else:
+            self.__error(
+                "A parallel for statement can only add to an outer variable, "
+                f'with "+=": "{left_node.val}"',
+                left_node,
             )
 
-            self.visit(ast_node.else_case)
-            self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
+    def __record_collection_val(self, var_symbol, val_node):
+        """
+        Remember that the array, map or generator of "var_symbol" may be one
+        declared outside of the current region, unless "val_node" creates a new
+        one. Every call of a generator function creates a new generator.
+        """
+        if not isinstance(var_symbol.type_, TypeChecker.REFERENCE_TYPES):
+            return
+
+        if isinstance(val_node, ArrayNode) or (
+            isinstance(val_node, FuncCallNode)
+            and (
+                val_node.func_name in BUILT_IN_FUNCS
+                or isinstance(var_symbol.type_, GeneratorTypeSymbol)
+            )
+        ):
+            return
 
-    def __add_conditional_symbols_to_current_scope(self, ast_node, symbol_names):
-        for i, (condition, _) in enumerate(ast_node.if_cases):
-            TypeChecker.check_condition(self.visit(condition).name, condition.token)
-            name = "if" if i == 0 else "elseif"
+        self.__regions[-1].aliased_symbols.add(var_symbol)
 
-            if_elseif_symbol = ConditionalSymbol(name)
-            symbol_names.append(if_elseif_symbol.name)
+    def __var_symbol(self, ast_node):
+        if not isinstance(ast_node, VarNode):
+            return None
 
-            self.__curr_symbol_table.add_symbol(if_elseif_symbol)
+        return self.__curr_symbol_table.get_symbol(ast_node.val)
 
-        if ast_node.else_case is not None:
-            else_symbol = ConditionalSymbol("else")
-            symbol_names.append(else_symbol.name)
+    def visitConditionalStatementNode(self, ast_node):
+        for condition, _ in ast_node.if_cases:
+            TypeChecker.check_condition(self.visit(condition), condition)
 
-            self.__curr_symbol_table.add_symbol(else_symbol)
+        for i, (_, statement_list_node) in enumerate(ast_node.if_cases):
+            self.__enter_block_scope(
+                "if" if i == 0 else "elseif", SymbolTable.CONDITIONAL_STATEMENT
+            )
+            self.visit(statement_list_node)
+            self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
+
+        if ast_node.else_case is not None:
+            self.__enter_block_scope("else", SymbolTable.CONDITIONAL_STATEMENT)
+            self.visit(ast_node.else_case)
+            self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
 
     def visitWhileStatementNode(self, ast_node):
-        TypeChecker.check_condition(
-            self.visit(ast_node.condition).name, ast_node.condition.token
-        )
+        TypeChecker.check_condition(self.visit(ast_node.condition), ast_node.condition)
 
-        while_symbol = LoopSymbol("while")
-        self.__curr_symbol_table.add_symbol(while_symbol)
+        self.__enter_block_scope("while", SymbolTable.LOOP_STATEMENT)
+        self.visit(ast_node.statement_list_node)
+        self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
 
+    def __enter_block_scope(self, scope_name, kind):
+        """
+        Open the scope of a statement block. Nothing is added to the enclosing
+        scope for it, so symbol tables only hold declarations; the scope is
+        dropped once the block is visited.
+        """
         self.__curr_symbol_table = SymbolTable(
-            scope_name=while_symbol.name,
+            scope_name=scope_name,
             scope_level=self.__curr_symbol_table.scope_level + 1,
             outer_scope=self.__curr_symbol_table,
+            kind=kind,
         )
 
-        self.visit(ast_node.statement_list_node)
-        self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
-
     def visitBreakStatementNode(self, ast_node):
-        if not self.__is_in_loop():
+        if self.__curr_symbol_table.loop_depth == 0:
             self.__error(
                 "The break statement cannot be outside of a loop construct like",
-                ast_node.token,
+                ast_node,
+            )
+
+        if (
+            self.__regions
+            and self.__regions[-1].is_parallel
+            and self.__curr_symbol_table.loop_depth == self.__regions[-1].loop_depth
+        ):
+            self.__error(
+                "The break statement cannot be in a parallel for statement", ast_node
             )
 
     def visitContinueStatementNode(self, ast_node):
-        if not self.__is_in_loop():
+        if self.__curr_symbol_table.loop_depth == 0:
             self.__error(
                 "The continue statement cannot be outside of a loop construct like",
-                ast_node.token,
+                ast_node,
             )
 
-    def __is_in_loop(self):
-        curr_symbol_table_cpy = copy.copy(self.__curr_symbol_table)
-
-        while curr_symbol_table_cpy.scope_name != "global":
-            if curr_symbol_table_cpy.scope_name.startswith(
-                "for"
-            ) or curr_symbol_table_cpy.scope_name.startswith("while"):
-                return True
-
-            curr_symbol_table_cpy = curr_symbol_table_cpy.outer_scope
-
-        return False
-
     def visitRangeExprNode(self, ast_node):
         return TypeChecker.check_range_expr(
-            start_type=self.visit(ast_node.start_node).name,
-            end_type=self.visit(ast_node.end_node).name,
-            step_type=self.visit(ast_node.step_node).name
-            if ast_node.step_node
-            else None,
-            range_token=ast_node.token,
+            start_type=self.visit(ast_node.start_node),
+            end_type=self.visit(ast_node.end_node),
+            step_type=self.visit(ast_node.step_node) if ast_node.step_node else None,
+            range_node=ast_node,
         )
 
     def visitForStatementNode(self, ast_node):
-        iterable_type = self.visit(ast_node.iterable).name
-        TypeChecker.check_iterable(iterable_type, ast_node.iterable.token)
+        iterable_type = self.visit(ast_node.iterable)
+        TypeChecker.check_iterable(iterable_type, ast_node.iterable)
+
+        # Iterating over a generator variable advances its generator.
+        if (
+            self.__regions
+            and isinstance(iterable_type, GeneratorTypeSymbol)
+            and isinstance(ast_node.iterable, VarNode)
+        ):
+            self.__regions[-1].mutations.append(
+                (self.__var_symbol(ast_node.iterable), ast_node.iterable)
+            )
 
-        for_symbol = LoopSymbol("for")
-        self.__curr_symbol_table.add_symbol(for_symbol)
+        if ast_node.is_parallel:
+            self.__regions.append(
+                _EffectRegion(
+                    self.__curr_symbol_table,
+                    for_node=ast_node,
+                    loop_depth=self.__curr_symbol_table.loop_depth + 1,
+                )
+            )
 
-        self.__curr_symbol_table = SymbolTable(
-            scope_name=for_symbol.name,
-            scope_level=self.__curr_symbol_table.scope_level + 1,
-            outer_scope=self.__curr_symbol_table,
-        )
+        self.__enter_block_scope("for", SymbolTable.LOOP_STATEMENT)
 
         self.visit(ast_node.var_decl_statement_node)
         TypeChecker.check_assignment_statement(
-            var_type=self.visit(ast_node.var_decl_statement_node.variables[0]).name,
-            var_val_type=(
-                self.visit(ast_node.iterable.start_node).name
-                if iterable_type.startswith("range")
-                else iterable_type
-            ),
-            var_val_token=ast_node.iterable.token,
+            var_type=self.visit(ast_node.var_decl_statement_node.variables[0]),
+            var_val_type=self.__iterated_type(iterable_type, ast_node.iterable),
+            var_val_node=ast_node.iterable,
         )
 
         self.visit(ast_node.statement_list_node)
         self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
 
+        if ast_node.is_parallel:
+            self.__check_parallel_for(self.__regions.pop())
+
+    def __check_parallel_for(self, region):
+        """
+        Check that the iterations of the parallel for statement do not depend on
+        each other: they only add to outer variables, which are read nowhere
+        else, and only modify the arrays and maps created in them, and the
+        functions they call have no side effects.
+        """
+        for var_symbol, node in region.mutations:
+            if not region.owns(var_symbol):
+                self.__error(
+                    "A parallel for statement can only modify the arrays, maps and "
+                    "generators created in it",
+                    node,
+                )
+
+        for var_symbol, add_nodes in region.reductions.items():
+            add_node_ids = {id(add_node) for add_node in add_nodes}
+
+            for read_node in region.reads.get(var_symbol, ()):
+                if id(read_node) not in add_node_ids:
+                    self.__error(
+                        f'The variable "{var_symbol.name}" that a parallel for '
+                        "statement adds to cannot be read in it",
+                        read_node,
+                    )
+
+        if not self.__check_parallel_callees(region):
+            self.__pending_parallel_regions.append(region)
+
+        region.for_node.reduction_names = tuple(
+            var_symbol.name for var_symbol in region.reductions
+        )
+
+        if self.__regions:
+            self.__merge_region(region, self.__regions[-1])
+
+    def __check_parallel_callees(self, region, is_final=False):
+        """
+        Return False if a function that may be called is still being checked,
+        unless "is_final".
+        """
+        for func_symbol, call_node in region.callees.items():
+            reason = self.__parallel_call_error(func_symbol, region.reductions, set())
+
+            if reason is _PENDING:
+                if not is_final:
+                    return False
+            elif reason is not None:
+                self.__error(
+                    f'The function "{call_node.func_name}" {reason}, so it cannot '
+                    "be called in a parallel for statement",
+                    call_node,
+                )
+
+        return True
+
+    def __parallel_call_error(self, func_symbol, reduction_symbols, visited):
+        """
+        Return why the function, or one it calls, cannot be called in a parallel
+        for statement, None if it can, or _PENDING if it is still being checked.
+        """
+        if func_symbol in visited:
+            return None
+
+        visited.add(func_symbol)
+        func_region = self.__func_regions.get(func_symbol)
+
+        if func_region is None or not func_region.is_checked:
+            return _PENDING
+
+        if func_region.side_effect_node is not None:
+            return "has side effects"
+
+        for var_symbol in reduction_symbols:
+            if var_symbol in func_region.reads:
+                return f'reads "{var_symbol.name}"'
+
+        pending = False
+
+        for callee in func_region.callees:
+            reason = self.__parallel_call_error(callee, reduction_symbols, visited)
+
+            if reason is _PENDING:
+                pending = True
+            elif reason is not None:
+                return reason
+
+        return _PENDING if pending else None
+
+    @staticmethod
+    def __merge_region(region, outer_region):
+        """
+        Add what a parallel for statement does to the region it is in.
+        """
+        for var_symbol, read_nodes in region.reads.items():
+            outer_region.reads.setdefault(var_symbol, []).extend(read_nodes)
+
+        for func_symbol, call_node in region.callees.items():
+            outer_region.callees.setdefault(func_symbol, call_node)
+
+        outer_region.mutations.extend(region.mutations)
+        outer_region.aliased_symbols.update(region.aliased_symbols)
+
+        for var_symbol, add_nodes in region.reductions.items():
+            if not outer_region.is_outer(var_symbol):
+                continue
+
+            if outer_region.is_parallel:
+                outer_region.reductions.setdefault(var_symbol, []).extend(add_nodes)
+            elif outer_region.side_effect_node is None:
+                outer_region.side_effect_node = add_nodes[0]
+
+    def __iterated_type(self, iterable_type, iterable):
+        """
+        The type of the values a for statement assigns to its variable.
+        """
+        if iterable_type is Types.RANGE:
+            return self.visit(iterable.start_node)
+
+        if isinstance(iterable_type, ArrayTypeSymbol):
+            return iterable_type.element_type
+
+        if isinstance(iterable_type, MapTypeSymbol):
+            return iterable_type.key_type
+
+        if isinstance(iterable_type, GeneratorTypeSymbol):
+            return iterable_type.element_type
+
+        return iterable_type  # The characters of a string.
+
     def visitVarDeclStatementNode(self, ast_node):
         type_symbol = self.__curr_symbol_table.get_symbol(ast_node.var_type_node.val)
 
         for variable in ast_node.variables:
             if isinstance(variable, VarNode):
                 var_name = variable.val
-                var_token = variable.token
+                var_node = variable
             else:
                 TypeChecker.check_assignment_statement(
-                    var_type=type_symbol.name,
-                    var_val_type=self.visit(variable.right_node).name,
-                    var_val_token=variable.right_node.token,
+                    var_type=type_symbol,
+                    var_val_type=self.visit(variable.right_node),
+                    var_val_node=variable.right_node,
                 )
                 var_name = variable.left_node.val
-                var_token = variable.left_node.token
+                var_node = variable.left_node
 
-            self.__has_identifier_declared(var_name, var_token)
+            self.__has_identifier_declared(var_name, var_node)
             var_symbol = VarSymbol(var_name, type_symbol)
             self.__curr_symbol_table.add_symbol(var_symbol)
 
+            if self.__regions and variable is not var_node:
+                self.__record_collection_val(var_symbol, variable.right_node)
+
     def visitReturnStatementNode(self, ast_node):
         return_type = self.visit(ast_node.expr_node) if ast_node.expr_node else None
-        curr_symbol_table_cpy = copy.copy(self.__curr_symbol_table)
+        func_symbol = self.__curr_symbol_table.func_symbol
 
-        while curr_symbol_table_cpy.scope_name != "global":
-            if curr_symbol_table_cpy.scope_name.startswith("func"):
-                func_symbol = curr_symbol_table_cpy.outer_scope.get_symbol(
-                    curr_symbol_table_cpy.scope_name, check_outer_scope=False
-                )
+        if func_symbol is None:
+            self.__error("Return statement outside function", ast_node)
 
-                TypeChecker.check_return_statement(
-                    func_symbol, return_type, ast_node.token
-                )
+        if self.__regions and self.__regions[-1].is_parallel:
+            self.__error(
+                "The return statement cannot be in a parallel for statement",
+                ast_node,
+            )
 
-                self.__return_flag = True
-                return
+        TypeChecker.check_return_statement(func_symbol, return_type, ast_node)
+        self.__return_flag = True
 
-            curr_symbol_table_cpy = curr_symbol_table_cpy.outer_scope
+    def visitYieldStatementNode(self, ast_node):
+        yield_type = self.visit(ast_node.expr_node)
+        func_symbol = self.__curr_symbol_table.func_symbol
 
-        self.__error("Return statement outside function", ast_node.token)
+        if func_symbol is None or not isinstance(
+            func_symbol.type_, GeneratorTypeSymbol
+        ):
+            self.__error("Yield statement outside generator function", ast_node)
 
-    def __has_identifier_declared(self, identifier, identifier_token):
+        if self.__regions and self.__regions[-1].is_parallel:
+            self.__error(
+                "The yield statement cannot be in a parallel for statement",
+                ast_node,
+            )
+
+        TypeChecker.check_assignment_statement(
+            var_type=func_symbol.type_.element_type,
+            var_val_type=yield_type,
+            var_val_node=ast_node.expr_node,
+        )
+
+    def __has_identifier_declared(self, identifier, identifier_node, is_func=False):
+        """
+        Variables may be named like built-in functions, since calls are looked up
+        apart from variables; functions may not.
+        """
         check_builtin_func = self.__curr_symbol_table.get_symbol(
             "func_" + identifier, check_outer_scope=True
         )
@@ -326,32 +793,40 @@ class SemanticAnalyzer(ASTNodeVisitor):
             identifier, check_outer_scope=False
         )
 
-        if check_builtin_func is not None and isinstance(
-            check_builtin_func, BuiltInFuncSymbol
-        ):
-            self.__error(
-                "A built-in function name cannot be used to declare neither variables nor functions",
-                identifier_token,
-            )
+        if isinstance(check_builtin_func, BuiltInFuncSymbol):
+            if is_func:
+                self.__error(
+                    "A built-in function name cannot be used to declare a function",
+                    identifier_node,
+                )
+
+            check_func = None
 
         if check_func is not None or check_var is not None:
             self.__error(
                 f'Identifier "{identifier}" has already been declared',
-                identifier_token,
+                identifier_node,
             )
 
     def visitFuncDeclStatementNode(self, ast_node):
-        self.__has_identifier_declared(ast_node.name, ast_node.token)
+        self.__has_identifier_declared(ast_node.name, ast_node, is_func=True)
         return_type_symbol = self.__curr_symbol_table.get_symbol(
             ast_node.return_type_node.val
         )
         func_symbol = FuncSymbol(ast_node.name, return_type_symbol)
 
         self.__curr_symbol_table.add_symbol(func_symbol)
+        decl_symbol_table = self.__curr_symbol_table
+
         self.__curr_symbol_table = SymbolTable(
             scope_name=func_symbol.name,
-            scope_level=self.__curr_symbol_table.scope_level + 1,
-            outer_scope=self.__curr_symbol_table,
+            scope_level=decl_symbol_table.scope_level + 1,
+            # A deferred body must not see what is declared after the function.
+            outer_scope=decl_symbol_table
+            if ast_node.is_body_parsed or self.__statement_records is not None
+            else decl_symbol_table.snapshot(),
+            kind=SymbolTable.FUNC,
+            func_symbol=func_symbol,
         )
         prev_param = None
 
@@ -364,15 +839,15 @@ class SemanticAnalyzer(ASTNodeVisitor):
                 if isinstance(prev_param, AssignmentStatementNode):
                     self.__error(
                         "Non-default parameter follows default parameter",
-                        param.var_node.token,
+                        param.var_node,
                     )
 
                 param_name = param.var_node.val
             else:
                 TypeChecker.check_assignment_statement(
-                    var_type=param_type_symbol.name,
-                    var_val_type=self.visit(param.var_node.right_node).name,
-                    var_val_token=param.var_node.right_node.token,
+                    var_type=param_type_symbol,
+                    var_val_type=self.visit(param.var_node.right_node),
+                    var_val_node=param.var_node.right_node,
                 )
                 param_name = param.var_node.left_node.val
                 func_symbol.add_default_param()
@@ -383,27 +858,158 @@ class SemanticAnalyzer(ASTNodeVisitor):
             func_symbol.params.append(param_symbol)
             prev_param = param.var_node
 
+        if ast_node.is_body_parsed or self.__statement_records is not None:
+            self.__check_func_body(ast_node, func_symbol, self.__curr_symbol_table)
+        else:
+            self.__deferred_func_bodies[func_symbol] = (
+                ast_node,
+                func_symbol,
+                self.__curr_symbol_table,
+            )
+
+        self.__curr_symbol_table = decl_symbol_table
+
+    def __check_func_body(self, ast_node, func_symbol, func_symbol_table):
+        prev_symbol_table = self.__curr_symbol_table
+        prev_return_flag = self.__return_flag
+
+        self.__curr_symbol_table = func_symbol_table
+        self.__return_flag = False
+
+        region = _EffectRegion(func_symbol_table.outer_scope)
+        # The arrays, maps and generators passed to the function belong to its
+        # caller.
+        region.aliased_symbols.update(
+            param
+            for param in func_symbol.params
+            if isinstance(param.type_, TypeChecker.REFERENCE_TYPES)
+        )
+        self.__func_regions[func_symbol] = region
+        self.__regions.append(region)
+
+        if self.__checked_func_symbols is not None:
+            self.__checked_func_symbols.append(func_symbol)
+
         self.visit(ast_node.body)
 
-        if return_type_symbol is not None and not self.__return_flag:
+        self.__regions.pop()
+        self.__finish_func_region(region)
+
+        # A generator function may end without a return statement.
+        if (
+            func_symbol.type_ is not None
+            and not isinstance(func_symbol.type_, GeneratorTypeSymbol)
+            and not self.__return_flag
+        ):
             self.__error(
                 f'Missing return statement for the function "{ast_node.name}"',
-                ast_node.token,
+                ast_node,
             )
-        else:
-            self.__return_flag = False
 
-        self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
+        self.__curr_symbol_table = prev_symbol_table
+        self.__return_flag = prev_return_flag
+
+    @staticmethod
+    def __finish_func_region(region):
+        for var_symbol, node in region.mutations:
+            if region.side_effect_node is None and not region.owns(var_symbol):
+                region.side_effect_node = node
+
+        region.is_checked = True
 
     def visitStatementListNode(self, ast_node):
         for statement in ast_node.statements:
             self.visit(statement)
 
     def visitProgramNode(self, ast_node):
-        self.visit(ast_node.statement_list_node)
+        # A failed check of an earlier version may have left regions open.
+        self.__regions = []
+        self.__pending_parallel_regions = []
+        self.__checked_func_symbols = None
+
+        if self.__statement_records is None:
+            self.visit(ast_node.statement_list_node)
+        else:
+            self.__check_top_level_statements(ast_node.statement_list_node.statements)
+
+        for region in self.__pending_parallel_regions:
+            self.__check_parallel_callees(region, is_final=True)
+
         self.__curr_symbol_table = self.__curr_symbol_table.outer_scope
 
-    def __error(self, error_message, token):
+    def __check_top_level_statements(self, statements):
+        """
+        Visit the top-level statements that were not checked before, and the
+        ones that read a global name whose symbol may have changed: names
+        declared by removed or revisited statements. Such a statement is only
+        revisited if one of those names now resolves to a different signature.
+        Every other statement just declares the symbols it declared last time.
+        """
+        global_symbol_table = self.__create_global_symbol_table(incremental=True)
+        self.__curr_symbol_table = global_symbol_table
+
+        prev_records = self.__statement_records
+        records = {}
+        changed_names = set()
+
+        for statement in prev_records.keys() - set(statements):
+            changed_names.update(prev_records[statement][1])
+
+        for statement in statements:
+            record = prev_records.get(statement)
+
+            if record is not None and self.__is_record_valid(
+                record, changed_names, global_symbol_table
+            ):
+                for symbol in record[1].values():
+                    global_symbol_table.add_symbol(symbol)
+            else:
+                global_symbol_table.start_recording()
+                self.__checked_func_symbols = []
+                self.visit(statement)
+
+                record = (
+                    *global_symbol_table.stop_recording(),
+                    self.__checked_func_symbols,
+                )
+                self.__checked_func_symbols = None
+                changed_names.update(record[1])
+
+            records[statement] = record
+
+        # Only a successful check replaces the records of the previous one.
+        self.__statement_records = records
+        # Drop the regions of the functions of the removed and revisited
+        # statements, and of failed checks.
+        self.__func_regions = {
+            func_symbol: self.__func_regions[func_symbol]
+            for record in records.values()
+            for func_symbol in record[2]
+        }
+
+    @staticmethod
+    def __is_record_valid(record, changed_names, global_symbol_table):
+        read_signatures = record[0]
+
+        for name in read_signatures.keys() & changed_names:
+            symbol = global_symbol_table.get_symbol(name)
+            signature = symbol.signature if symbol is not None else None
+
+            if signature != read_signatures[name]:
+                return False
+
+        return True
+
+    @staticmethod
+    def __create_global_symbol_table(incremental):
+        global_symbol_table = (RecordingSymbolTable if incremental else SymbolTable)(
+            scope_name="global", scope_level=1, outer_scope=None
+        )
+        global_symbol_table.add_built_in_symbols(BUILT_IN_FUNCS.values())
+
+        return global_symbol_table
+
+    def __error(self, error_message, ast_node):
         raise SemanticError(
-            error_message + f" in line: {token.line}, column: {token.col}",
+            error_message + f" in line: {ast_node.line}, column: {ast_node.col}",
         )
@@ -1,13 +1,55 @@
-from .tokens import Token
+import copy
+import itertools
+
+# Numbers every declaration, in the order they are made in any scope.
+_decl_indices = itertools.count()
 
 
 class SymbolTable:
-    def __init__(self, scope_name, scope_level, outer_scope=None):
+    ###############
+    # Scope Kinds #
+    ###############
+    GLOBAL = "GLOBAL"
+    CONDITIONAL_STATEMENT = "CONDITIONAL_STATEMENT"
+    LOOP_STATEMENT = "LOOP_STATEMENT"
+    FUNC = "FUNC"
+
+    def __init__(
+        self, scope_name, scope_level, outer_scope=None, kind=GLOBAL, func_symbol=None
+    ):
+        """
+        "func_symbol" is the function whose body a FUNC scope is. Every scope keeps
+        the function it is in and how many loops it is in, so that neither has to
+        be looked up through the outer scopes.
+        """
         self.__scope_name = scope_name
         self.__scope_level = scope_level
 
         self.__outer_scope = outer_scope
         self.__symbols = {}
+        # Name -> declaration index, and the index from which on the symbols
+        # are hidden, set in a snapshot.
+        self.__decl_indices = {}
+        self.__decl_limit = None
+
+        self.__kind = kind
+        # Lookups that must stay in the current scope also search the scopes of
+        # the statement blocks it is in.
+        self.__is_block = kind in (
+            SymbolTable.CONDITIONAL_STATEMENT,
+            SymbolTable.LOOP_STATEMENT,
+        )
+
+        if outer_scope is None:
+            self.__loop_depth = 0
+            self.__func_symbol = func_symbol
+        else:
+            self.__loop_depth = outer_scope.loop_depth + (
+                kind == SymbolTable.LOOP_STATEMENT
+            )
+            self.__func_symbol = (
+                func_symbol if kind == SymbolTable.FUNC else outer_scope.func_symbol
+            )
 
     @property
     def scope_name(self):
@@ -21,51 +63,120 @@ class SymbolTable:
     def outer_scope(self):
         return self.__outer_scope
 
-    def add_built_in_symbols(self):
+    @property
+    def kind(self):
+        return self.__kind
+
+    @property
+    def loop_depth(self):
+        return self.__loop_depth
+
+    @property
+    def func_symbol(self):
+        return self.__func_symbol
+
+    def add_built_in_symbols(self, built_in_funcs):
+        """
+        Add the built-in types, and a symbol for each BuiltInFunc.
+        """
         self.__symbols = {
-            "int": BuiltInTypeSymbol(Token.K_INT),
-            "float": BuiltInTypeSymbol(Token.K_FLOAT),
-            "bool": BuiltInTypeSymbol(Token.K_BOOL),
-            "str": BuiltInTypeSymbol(Token.K_STR),
-
-            "func_print": BuiltInFuncSymbol("print"),
-            "func_println": BuiltInFuncSymbol("println"),
-            "func_input": BuiltInFuncSymbol("input", BuiltInTypeSymbol(Token.K_STR)),
-            "func_reverse": BuiltInFuncSymbol("reverse", BuiltInTypeSymbol(Token.K_STR)),
-
-            "func_len": BuiltInFuncSymbol("len", BuiltInTypeSymbol(Token.K_INT)),
-            "func_pow": BuiltInFuncSymbol("pow", BuiltInTypeSymbol(Token.K_FLOAT)),
-            "func_typeof": BuiltInFuncSymbol("typeof", BuiltInTypeSymbol(Token.K_STR)),
-            "func_toint": BuiltInFuncSymbol("toint", BuiltInTypeSymbol(Token.K_INT)),
-
-            "func_tofloat": BuiltInFuncSymbol("tofloat", BuiltInTypeSymbol(Token.K_FLOAT)),
-            "func_tobool": BuiltInFuncSymbol("tobool", BuiltInTypeSymbol(Token.K_BOOL)),
-            "func_tostr": BuiltInFuncSymbol("tostr", BuiltInTypeSymbol(Token.K_STR)),
+            "int": Types.INT,
+            "float": Types.FLOAT,
+            "bool": Types.BOOL,
+            "str": Types.STR,
+            **{array_type.name: array_type for array_type in Types.ARRAYS.values()},
+            **{map_type.name: map_type for map_type in Types.MAPS.values()},
+            **{gen_type.name: gen_type for gen_type in Types.GENERATORS.values()},
         }
 
+        for built_in_func in built_in_funcs:
+            self.add_symbol(BuiltInFuncSymbol(built_in_func))
+
+    def snapshot(self):
+        """
+        Return a view of the scope chain that hides the symbols declared later.
+        It shares the symbols with the scopes instead of copying them.
+        """
+        return self.__hide_decls_from(next(_decl_indices))
+
+    def __hide_decls_from(self, decl_limit):
+        snapshot = copy.copy(self)
+        snapshot.__decl_limit = decl_limit
+
+        if self.__outer_scope is not None:
+            snapshot.__outer_scope = self.__outer_scope.__hide_decls_from(decl_limit)
+
+        return snapshot
+
     def add_symbol(self, symbol):
         self.__symbols[symbol.name] = symbol
+        self.__decl_indices[symbol.name] = next(_decl_indices)
 
     def get_symbol(self, name, check_outer_scope=True):
         if self.__check_symbol(name):
             return self.__symbols[name]
 
-        if (not check_outer_scope) and (
-            not (
-                self.__scope_name.startswith("if")
-                or self.__scope_name.startswith("elseif")
-                or self.__scope_name.startswith("else")
-                or self.__scope_name.startswith("while")
-                or self.__scope_name.startswith("for")
-            )
-        ):
+        if not (check_outer_scope or self.__is_block):
             return None
 
         if self.__outer_scope is not None:
             return self.__outer_scope.get_symbol(name, check_outer_scope)
 
     def __check_symbol(self, name):
-        return name in self.__symbols
+        if name not in self.__symbols:
+            return False
+
+        # The built-in types have no declaration index and are never hidden.
+        return (
+            self.__decl_limit is None
+            or self.__decl_indices.get(name, -1) < self.__decl_limit
+        )
+
+
+class RecordingSymbolTable(SymbolTable):
+    """
+    A scope that, while recording, remembers the names looked up in it, with the
+    signature of the symbol each name resolved to the first time, and the
+    symbols added to it. Lookups made from inner scopes are recorded too once
+    they reach this scope.
+    """
+
+    def __init__(
+        self, scope_name, scope_level, outer_scope=None, kind=SymbolTable.GLOBAL
+    ):
+        super().__init__(scope_name, scope_level, outer_scope, kind)
+        self.__read_signatures = None
+        self.__added_symbols = None
+
+    def start_recording(self):
+        self.__read_signatures = {}
+        self.__added_symbols = {}
+
+    def stop_recording(self):
+        """
+        Return the recorded read signatures and added symbols.
+        """
+        recorded = (self.__read_signatures, self.__added_symbols)
+        self.__read_signatures = None
+        self.__added_symbols = None
+
+        return recorded
+
+    def add_symbol(self, symbol):
+        super().add_symbol(symbol)
+
+        if self.__added_symbols is not None:
+            self.__added_symbols[symbol.name] = symbol
+
+    def get_symbol(self, name, check_outer_scope=True):
+        symbol = super().get_symbol(name, check_outer_scope)
+
+        if self.__read_signatures is not None and name not in self.__read_signatures:
+            self.__read_signatures[name] = (
+                symbol.signature if symbol is not None else None
+            )
+
+        return symbol
 
 
 class Symbol:
@@ -81,21 +192,86 @@ class Symbol:
     def type_(self):
         return self._type_
 
+    @property
+    def signature(self):
+        """
+        Everything about the symbol that the code using it can depend on.
+        """
+        return (
+            type(self).__name__,
+            self._name,
+            self._type_.name if self._type_ is not None else None,
+        )
+
 
 class BuiltInTypeSymbol(Symbol):
+    ##############
+    # Type Names #
+    ##############
+    INT = "int"
+    FLOAT = "float"
+    BOOL = "bool"
+    STR = "str"
+
     def __init__(self, name):
+        """
+        Use the instances in Types instead of creating new ones.
+        """
         super().__init__(name)
 
-    def __eq__(self, other):
-        if not isinstance(other, BuiltInTypeSymbol):
-            return False
 
-        return self.name == other.name
+class ArrayTypeSymbol(BuiltInTypeSymbol):
+    def __init__(self, element_type):
+        """
+        Use the instances in Types.ARRAYS instead of creating new ones.
+        """
+        super().__init__(element_type.name + "[]")
+        self.__element_type = element_type
+
+    @property
+    def element_type(self):
+        return self.__element_type
+
+
+class MapTypeSymbol(BuiltInTypeSymbol):
+    def __init__(self, key_type, value_type):
+        """
+        Use the instances in Types.MAPS instead of creating new ones.
+        """
+        super().__init__(f"map({key_type.name}, {value_type.name})")
+        self.__key_type = key_type
+        self.__value_type = value_type
+
+    @property
+    def key_type(self):
+        return self.__key_type
+
+    @property
+    def value_type(self):
+        return self.__value_type
+
+
+class GeneratorTypeSymbol(BuiltInTypeSymbol):
+    def __init__(self, element_type):
+        """
+        Use the instances in Types.GENERATORS instead of creating new ones.
+        """
+        super().__init__(f"gen {element_type.name}")
+        self.__element_type = element_type
+
+    @property
+    def element_type(self):
+        return self.__element_type
 
 
 class BuiltInFuncSymbol(Symbol):
-    def __init__(self, name, type_=None):
-        super().__init__(f"func_{name}", type_)
+    def __init__(self, built_in_func):
+        super().__init__(f"func_{built_in_func.name}", built_in_func.return_type)
+        self.__built_in_func = built_in_func
+
+    @property
+    def built_in_func(self):
+        return self.__built_in_func
 
 
 class VarSymbol(Symbol):
@@ -107,19 +283,9 @@ class VarSymbol(Symbol):
         super().__init__(name, type_)
 
 
-class ConditionalSymbol(Symbol):
-    def __init__(self, name):
-        super().__init__(name=f"{name}_{id(self)}")
-
-
 class RangeSymbol(Symbol):
     def __init__(self, name="range"):
-        super().__init__(name=f"{name}_{id(self)}")
-
-
-class LoopSymbol(Symbol):
-    def __init__(self, name):
-        super().__init__(name=f"{name}_{id(self)}")
+        super().__init__(name)
 
 
 class FuncSymbol(Symbol):
@@ -136,5 +302,54 @@ class FuncSymbol(Symbol):
     def num_default_params(self):
         return self.__num_default_params
 
+    @property
+    def signature(self):
+        return (
+            *super().signature,
+            tuple(param.type_.name for param in self.__params),
+            self.__num_default_params,
+        )
+
     def add_default_param(self):
         self.__num_default_params += 1
+
+
+class Types:
+    """
+    The only instances of the built-in types, so that types compare by identity.
+    """
+
+    INT = BuiltInTypeSymbol(BuiltInTypeSymbol.INT)
+    FLOAT = BuiltInTypeSymbol(BuiltInTypeSymbol.FLOAT)
+    BOOL = BuiltInTypeSymbol(BuiltInTypeSymbol.BOOL)
+    STR = BuiltInTypeSymbol(BuiltInTypeSymbol.STR)
+    RANGE = RangeSymbol()
+
+    INT_ARRAY = ArrayTypeSymbol(INT)
+    FLOAT_ARRAY = ArrayTypeSymbol(FLOAT)
+    BOOL_ARRAY = ArrayTypeSymbol(BOOL)
+    STR_ARRAY = ArrayTypeSymbol(STR)
+
+    # Element type -> array type
+    ARRAYS = {
+        INT: INT_ARRAY,
+        FLOAT: FLOAT_ARRAY,
+        BOOL: BOOL_ARRAY,
+        STR: STR_ARRAY,
+    }
+
+    # (key type, value type) -> map type. Keys are of a scalar type, values of a
+    # scalar or an array type.
+    MAPS = {}
+
+    for _key_type in ARRAYS:
+        for _value_type in (*ARRAYS, *ARRAYS.values()):
+            MAPS[_key_type, _value_type] = MapTypeSymbol(_key_type, _value_type)
+
+    del _key_type, _value_type
+
+    # Element type -> generator type. Generators yield scalars or arrays.
+    GENERATORS = {
+        element_type: GeneratorTypeSymbol(element_type)
+        for element_type in (*ARRAYS, *ARRAYS.values())
+    }
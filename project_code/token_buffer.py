@@ -0,0 +1,46 @@
+from collections import deque
+
+from .tokens import Token
+
+
+class TokenBuffer:
+    """
+    Gives the parser k-token lookahead over a token stream.
+    The stream can be a Lexer, which is then read lazily, or any iterable of
+    already produced tokens, such as the list returned by Lexer.tokenize().
+    """
+
+    def __init__(self, tokens):
+        self.__tokens = iter(tokens)
+        self.__lookahead = deque()
+        self.__last_token = None
+
+    def next_token(self):
+        if self.__lookahead:
+            return self.__lookahead.popleft()
+
+        return self.__read_token()
+
+    def peek(self, offset=0):
+        """
+        Return the token "offset" positions after the next one without consuming it.
+        """
+        while len(self.__lookahead) <= offset:
+            self.__lookahead.append(self.__read_token())
+
+        return self.__lookahead[offset]
+
+    def __read_token(self):
+        """
+        Once the stream is exhausted, keep returning its final EOF token.
+        """
+        token = next(self.__tokens, None)
+
+        if token is None:
+            if self.__last_token is None or self.__last_token.type_ != Token.EOF:
+                self.__last_token = Token(Token.EOF)
+
+            return self.__last_token
+
+        self.__last_token = token
+        return token
@@ -1,142 +1,181 @@
 class Token:
-    EOF = "EOF"
-    IDENTIFIER = "IDENTIFIER"  # An identifier is a combination of letters and numbers that begins with a letter
+    """
+    Token kinds are small integers so they can be compared and hashed cheaply;
+    use Token.NAMES to get the readable form of a kind for error messages.
+    """
+
+    __slots__ = ("type_", "val", "line", "col")
+
+    EOF = 0
+    IDENTIFIER = 1  # An identifier is a combination of letters and numbers that begins with a letter
     # and can be followed by any number of additional letters and numbers.
 
-    SEMICOLON = ";"
-    COLON = ":"
-    COMMA = ","
+    SEMICOLON = 2
+    COLON = 3
+    COMMA = 4
 
     ##############
     # Data Types #
     ##############
-    INT = "INT"
-    FLOAT = "FLOAT"
-    BOOL = "BOOL"
-    STR = "STR"
+    INT = 5
+    FLOAT = 6
+    BOOL = 7
+    STR = 8
 
     #########################
     # Arithmetic Operations #
     #########################
-    PLUS = "+"
-    MINUS = "-"
-    MULTIPLICATION = "*"
-    INT_DIVISION = "//"
-    FLOAT_DIVISION = "/"
-    MODULO = "%"
+    PLUS = 9
+    MINUS = 10
+    MULTIPLICATION = 11
+    INT_DIVISION = 12
+    FLOAT_DIVISION = 13
+    MODULO = 14
 
     #########################
     # Assignment Operations #
     #########################
-    ASSIGN = "="
-    PLUS_ASSIGN = "+="
-    MINUS_ASSIGN = "-="
-    MULTIPLICATION_ASSIGN = "*="
-    FLOAT_DIVISION_ASSIGN = "/="
-    INT_DIVISION_ASSIGN = "//="
-    MODULO_ASSIGN = "%="
+    ASSIGN = 15
+    PLUS_ASSIGN = 16
+    MINUS_ASSIGN = 17
+    MULTIPLICATION_ASSIGN = 18
+    FLOAT_DIVISION_ASSIGN = 19
+    INT_DIVISION_ASSIGN = 20
+    MODULO_ASSIGN = 21
 
     #########################
     # Comparison Operations #
     #########################
-    EQUALS = "=="
-    NOT_EQUALS = "!="
-    LESS_THAN = "<"
-    LESS_THAN_OR_EQUALS = "<="
-    GREATER_THAN = ">"
-    GREATER_THAN_OR_EQUALS = ">="
+    EQUALS = 22
+    NOT_EQUALS = 23
+    LESS_THAN = 24
+    LESS_THAN_OR_EQUALS = 25
+    GREATER_THAN = 26
+    GREATER_THAN_OR_EQUALS = 27
 
     ###############
     # Parentheses #
     ###############
-    LEFT_PARENTHESIS = "("
-    RIGHT_PARENTHESIS = ")"
+    LEFT_PARENTHESIS = 28
+    RIGHT_PARENTHESIS = 29
 
     ############
     # Brackets #
     ############
-    LEFT_SQUARE_BRACKET = "["
-    RIGHT_SQUARE_BRACKET = "]"
+    LEFT_SQUARE_BRACKET = 30
+    RIGHT_SQUARE_BRACKET = 31
 
     ###########
     # Wrapper #
     ###########
-    LEFT_CURLY_BRACKET = "{"
-    RIGHT_CURLY_BRACKET = "}"
+    LEFT_CURLY_BRACKET = 32
+    RIGHT_CURLY_BRACKET = 33
 
     ############
     # KEYWORDS #
     ############
-    K_VAR = "var"
-    K_INT = "int"
-    K_FLOAT = "float"
-    K_BOOL = "bool"
-    K_STR = "str"
-    K_AND = "and"
-    K_OR = "or"
-    K_NOT = "not"
-    K_IF = "if"
-    K_ELSEIF = "elseif"
-    K_ELSE = "else"
-    K_WHILE = "while"
-    K_FOR = "for"
-    K_FROM = "from"
-    K_TO = "to"
-    K_STEP = "step"
-    K_CONTINUE = "continue"
-    K_BREAK = "break"
-    K_FUNC = "func"
-    K_VOID = "void"
-    K_RETURN = "return"
-
-    KEYWORDS = (
-        K_VAR,
-        K_INT,
-        K_FLOAT,
-        K_BOOL,
-        K_STR,
-        K_AND,
-        K_OR,
-        K_NOT,
-        K_IF,
-        K_ELSEIF,
-        K_ELSE,
-        K_WHILE,
-        K_FOR,
-        K_FROM,
-        K_TO,
-        K_STEP,
-        K_CONTINUE,
-        K_BREAK,
-        K_FUNC,
-        K_VOID,
-        K_RETURN,
-    )
+    K_VAR = 34
+    K_INT = 35
+    K_FLOAT = 36
+    K_BOOL = 37
+    K_STR = 38
+    K_AND = 39
+    K_OR = 40
+    K_NOT = 41
+    K_IF = 42
+    K_ELSEIF = 43
+    K_ELSE = 44
+    K_WHILE = 45
+    K_FOR = 46
+    K_FROM = 47
+    K_TO = 48
+    K_STEP = 49
+    K_CONTINUE = 50
+    K_BREAK = 51
+    K_FUNC = 52
+    K_VOID = 53
+    K_RETURN = 54
+    K_MAP = 55
+    K_PARALLEL = 56
+    K_GEN = 57
+    K_YIELD = 58
+
+    KEYWORDS = {
+        "var": K_VAR,
+        "int": K_INT,
+        "float": K_FLOAT,
+        "bool": K_BOOL,
+        "str": K_STR,
+        "and": K_AND,
+        "or": K_OR,
+        "not": K_NOT,
+        "if": K_IF,
+        "elseif": K_ELSEIF,
+        "else": K_ELSE,
+        "while": K_WHILE,
+        "for": K_FOR,
+        "from": K_FROM,
+        "to": K_TO,
+        "step": K_STEP,
+        "continue": K_CONTINUE,
+        "break": K_BREAK,
+        "func": K_FUNC,
+        "void": K_VOID,
+        "return": K_RETURN,
+        "map": K_MAP,
+        "parallel": K_PARALLEL,
+        "gen": K_GEN,
+        "yield": K_YIELD,
+    }
+
+    BOOL_LITERALS = frozenset(("true", "false"))
 
     ###########
     # COMMENT #
     ###########
     MULTI_LINE_COMMENT = "/* */"
 
-    def __init__(self, _type, val=None, line=None, col=None):
-        self.__type = _type
-        self.__val = val
-
-        self.__line = line
-        self.__col = col
+    NAMES = {
+        EOF: "EOF",
+        IDENTIFIER: "IDENTIFIER",
+        SEMICOLON: ";",
+        COLON: ":",
+        COMMA: ",",
+        INT: "INT",
+        FLOAT: "FLOAT",
+        BOOL: "BOOL",
+        STR: "STR",
+        PLUS: "+",
+        MINUS: "-",
+        MULTIPLICATION: "*",
+        INT_DIVISION: "//",
+        FLOAT_DIVISION: "/",
+        MODULO: "%",
+        ASSIGN: "=",
+        PLUS_ASSIGN: "+=",
+        MINUS_ASSIGN: "-=",
+        MULTIPLICATION_ASSIGN: "*=",
+        FLOAT_DIVISION_ASSIGN: "/=",
+        INT_DIVISION_ASSIGN: "//=",
+        MODULO_ASSIGN: "%=",
+        EQUALS: "==",
+        NOT_EQUALS: "!=",
+        LESS_THAN: "<",
+        LESS_THAN_OR_EQUALS: "<=",
+        GREATER_THAN: ">",
+        GREATER_THAN_OR_EQUALS: ">=",
+        LEFT_PARENTHESIS: "(",
+        RIGHT_PARENTHESIS: ")",
+        LEFT_SQUARE_BRACKET: "[",
+        RIGHT_SQUARE_BRACKET: "]",
+        LEFT_CURLY_BRACKET: "{",
+        RIGHT_CURLY_BRACKET: "}",
+        **{kind: keyword for keyword, kind in KEYWORDS.items()},
+    }
 
-    @property
-    def type_(self):
-        return self.__type
-
-    @property
-    def val(self):
-        return self.__val
-
-    @property
-    def line(self):
-        return self.__line
+    def __init__(self, _type, val=None, line=None, col=None):
+        self.type_ = _type
+        self.val = val
 
-    @property
-    def col(self):
-        return self.__col
+        self.line = line
+        self.col = col
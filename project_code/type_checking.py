@@ -1,84 +1,148 @@
 from .tokens import Token
-from .symbol_table import BuiltInTypeSymbol, RangeSymbol
+from .built_in_funcs import TypeParam
+from .symbol_table import ArrayTypeSymbol, MapTypeSymbol, GeneratorTypeSymbol, Types
 from .error import SemanticError
 
 
 class TypeChecker:
     """
-    Used the type rules from the programming language Java.
+    Used the type rules from the programming language Java. Types are the
+    symbols in Types, so they compare by identity.
     """
 
+    COLLECTION_TYPES = (ArrayTypeSymbol, MapTypeSymbol)
+    # Values that are shared, not copied, by assignments. They only support "=="
+    # and "!=" as operators.
+    REFERENCE_TYPES = (ArrayTypeSymbol, MapTypeSymbol, GeneratorTypeSymbol)
+
     @staticmethod
-    def check_accessor(accessor_type, accessor_token):
-        if accessor_type != Token.K_STR:
+    def check_accessor(accessor_type, accessor_node):
+        if accessor_type is not Types.STR and not isinstance(
+            accessor_type, TypeChecker.COLLECTION_TYPES
+        ):
             TypeChecker.__error(
-                f'"{accessor_type}" type cannot be an accessor',
-                accessor_token,
+                f'"{accessor_type.name}" type cannot be an accessor',
+                accessor_node.line,
+                accessor_node.col,
             )
 
     @staticmethod
-    def check_index(index_type, index_token):
-        if index_type != Token.K_INT:
+    def check_index(index_type, index_node):
+        if index_type is not Types.INT:
             TypeChecker.__error(
-                f'Index of type "{index_type}" is not allowed',
-                index_token,
+                f'Index of type "{index_type.name}" is not allowed',
+                index_node.line,
+                index_node.col,
             )
 
     @staticmethod
-    def check_built_in_func_call(func_name, func_arg_types, func_token):
-        match func_name:
-            case "input":
-                if func_arg_types[0] != Token.K_STR:
-                    TypeChecker.__error(
-                        f'The function named "{func_name}" can only accept a string argument',
-                        func_token,
-                    )
+    def check_key(map_type, key_type, key_node):
+        if key_type is not map_type.key_type:
+            TypeChecker.__error(
+                f'Key of type "{key_type.name}" is not allowed for "{map_type.name}"',
+                key_node.line,
+                key_node.col,
+            )
 
-            case "reverse" | "len":
-                if func_arg_types[0] != Token.K_STR:
-                    TypeChecker.__error(
-                        f'The function named "{func_name}" can only accept a string argument',
-                        func_token,
-                    )
+    @staticmethod
+    def check_array(element_types, array_node):
+        if not element_types:
+            TypeChecker.__error(
+                "The type of an empty array is unknown, declare the array without "
+                "a value instead",
+                array_node.line,
+                array_node.col,
+            )
 
-            case "pow":
-                if func_arg_types[0] not in (
-                    Token.K_FLOAT,
-                    Token.K_INT,
-                ) or func_arg_types[1] not in (Token.K_FLOAT, Token.K_INT):
-                    TypeChecker.__error(
-                        f'The function named "{func_name}" can only accept integer or float values as arguments',
-                        func_token,
-                    )
+        element_type = element_types[0]
+
+        if element_type not in Types.ARRAYS:
+            TypeChecker.__error(
+                f'An array cannot contain "{element_type.name}" values',
+                array_node.line,
+                array_node.col,
+            )
+
+        for other_element_type in element_types:
+            if other_element_type is not element_type:
+                TypeChecker.__error(
+                    f'An array cannot contain both "{element_type.name}" and '
+                    f'"{other_element_type.name}" values',
+                    array_node.line,
+                    array_node.col,
+                )
+
+        return Types.ARRAYS[element_type]
 
     @staticmethod
-    def check_unary_op(op_token, child_node_type):
-        if op_token.type_ == Token.K_NOT:
-            if child_node_type != Token.K_BOOL:
+    def check_built_in_func_call(built_in_func, func_arg_types, func_node):
+        """
+        Return the type of the value the call returns.
+        """
+        if built_in_func.is_variadic:
+            return built_in_func.return_type
+
+        for func_arg_type, param_types in zip(
+            func_arg_types, built_in_func.param_types
+        ):
+            # The first parameter is never a TypeParam, so its argument is
+            # checked before a TypeParam is resolved with it.
+            if isinstance(param_types, TypeParam):
+                param_types = (param_types.resolve(func_arg_types[0]),)
+
+            if param_types is not None and func_arg_type not in param_types:
                 TypeChecker.__error(
-                    f'The operator "{op_token.val}" cannot be used with the type "{child_node_type}"',
-                    op_token,
+                    f'The function named "{built_in_func.name}" can only accept '
+                    f"{built_in_func.params_description}",
+                    func_node.line,
+                    func_node.col,
                 )
 
-            return BuiltInTypeSymbol(Token.K_BOOL)
+        if isinstance(built_in_func.return_type, TypeParam):
+            return built_in_func.return_type.resolve(func_arg_types[0])
 
-        if op_token.type_ in (Token.MINUS, Token.PLUS):
+        return built_in_func.return_type
+
+    @staticmethod
+    def check_unary_op(op, child_node_type, op_line, op_col):
+        if op == Token.K_NOT:
+            if child_node_type is not Types.BOOL:
+                TypeChecker.__error(
+                    f'The operator "{Token.NAMES[op]}" cannot be used with the type "{child_node_type.name}"',
+                    op_line,
+                    op_col,
+                )
+
+            return Types.BOOL
+
+        if op in (Token.MINUS, Token.PLUS):
             match child_node_type:
-                case Token.K_STR | Token.K_BOOL:
-                    TypeChecker.__error(
-                        f'The operator "{op_token.val}" cannot be used with the type "{child_node_type}"',
-                        op_token,
-                    )
+                case Types.FLOAT:
+                    return Types.FLOAT
 
-                case Token.K_FLOAT:
-                    return BuiltInTypeSymbol(Token.K_FLOAT)
+                case Types.INT:
+                    return Types.INT
 
-                case Token.K_INT:
-                    return BuiltInTypeSymbol(Token.K_INT)
+                case _:
+                    TypeChecker.__error(
+                        f'The operator "{Token.NAMES[op]}" cannot be used with the type "{child_node_type.name}"',
+                        op_line,
+                        op_col,
+                    )
 
     @staticmethod
-    def check_binary_op(op_token, left_node_type, right_node_type):
-        if op_token.type_ in (
+    def check_binary_op(op, left_node_type, right_node_type, op_line, op_col):
+        if op not in (Token.EQUALS, Token.NOT_EQUALS) and (
+            isinstance(left_node_type, TypeChecker.REFERENCE_TYPES)
+            or isinstance(right_node_type, TypeChecker.REFERENCE_TYPES)
+        ):
+            TypeChecker.__error(
+                f'"{Token.NAMES[op]}" operator cannot be used with "{left_node_type.name}" and "{right_node_type.name}"',
+                op_line,
+                op_col,
+            )
+
+        if op in (
             Token.PLUS,
             Token.MINUS,
             Token.MULTIPLICATION,
@@ -87,141 +151,169 @@ class TypeChecker:
             Token.MODULO,
         ):
             return TypeChecker.__check_arithmetic_op(
-                op_token, left_node_type, right_node_type
+                op, left_node_type, right_node_type, op_line, op_col
             )
 
-        if op_token.type_ in (Token.EQUALS, Token.NOT_EQUALS):
-            if left_node_type != right_node_type:
+        if op in (Token.EQUALS, Token.NOT_EQUALS):
+            if left_node_type is not right_node_type:
                 TypeChecker.__error(
-                    f'The types of "{left_node_type}" and "{right_node_type}" cannot be compared',
-                    op_token,
+                    f'The types of "{left_node_type.name}" and "{right_node_type.name}" cannot be compared',
+                    op_line,
+                    op_col,
                 )
 
-            return BuiltInTypeSymbol(Token.K_BOOL)
+            return Types.BOOL
 
-        if op_token.type_ in (
+        if op in (
             Token.LESS_THAN,
             Token.LESS_THAN_OR_EQUALS,
             Token.GREATER_THAN,
             Token.GREATER_THAN_OR_EQUALS,
         ):
             return TypeChecker.__check_comparison_op(
-                op_token, left_node_type, right_node_type
+                op, left_node_type, right_node_type, op_line, op_col
             )
 
-        if op_token.type_ in (Token.K_AND, Token.K_OR):
-            if Token.K_BOOL not in (left_node_type, right_node_type):
+        if op in (Token.K_AND, Token.K_OR):
+            if Types.BOOL not in (left_node_type, right_node_type):
                 TypeChecker.__error(
-                    f'"{op_token.val}" operator cannot be used with "{left_node_type}" and "{right_node_type}"',
-                    op_token,
+                    f'"{Token.NAMES[op]}" operator cannot be used with "{left_node_type.name}" and "{right_node_type.name}"',
+                    op_line,
+                    op_col,
                 )
 
-            return BuiltInTypeSymbol(Token.K_BOOL)
+            return Types.BOOL
 
     @staticmethod
-    def check_assignment_statement(var_type, var_val_type, var_val_token):
-        if var_type != var_val_type:
+    def check_assignment_statement(var_type, var_val_type, var_val_node):
+        if var_type is not var_val_type:
             TypeChecker.__error(
-                f'Cannot assign "{var_val_type}" to "{var_type}"', var_val_token
+                f'Cannot assign "{var_val_type.name}" to "{var_type.name}"',
+                var_val_node.line,
+                var_val_node.col,
             )
 
     @staticmethod
-    def check_accessor_assignment_statement(accessor_type, accessor_token):
-        if accessor_type == Token.K_STR:
+    def check_accessor_assignment_statement(accessor_type, accessor_node):
+        if accessor_type is Types.STR:
             TypeChecker.__error(
                 "Strings are immutable",
-                accessor_token,
+                accessor_node.line,
+                accessor_node.col,
             )
 
     @staticmethod
-    def check_condition(condition_type, condition_token):
-        if condition_type != Token.K_BOOL:
+    def check_condition(condition_type, condition_node):
+        if condition_type is not Types.BOOL:
             TypeChecker.__error(
-                f'The Condition must evaluate to "bool", not "{condition_type}"',
-                condition_token,
+                f'The Condition must evaluate to "bool", not "{condition_type.name}"',
+                condition_node.line,
+                condition_node.col,
             )
 
     @staticmethod
-    def check_range_expr(start_type, end_type, step_type, range_token):
-        if (start_type != Token.K_INT) or (end_type != Token.K_INT):
+    def check_range_expr(start_type, end_type, step_type, range_node):
+        if (start_type is not Types.INT) or (end_type is not Types.INT):
             TypeChecker.__error(
-                'The start and the end of the range must be "int"', range_token
+                'The start and the end of the range must be "int"',
+                range_node.line,
+                range_node.col,
             )
 
-        if step_type is not None and step_type != Token.K_INT:
-            TypeChecker.__error('"step" of the range must be "int"', range_token)
+        if step_type is not None and step_type is not Types.INT:
+            TypeChecker.__error(
+                '"step" of the range must be "int"', range_node.line, range_node.col
+            )
 
-        return RangeSymbol()
+        return Types.RANGE
 
     @staticmethod
-    def check_iterable(iterable_type, iterable_token):
-        if not iterable_type.startswith("range") and iterable_type != Token.K_STR:
+    def check_iterable(iterable_type, iterable_node):
+        if (
+            iterable_type is not Types.RANGE
+            and iterable_type is not Types.STR
+            and not isinstance(iterable_type, TypeChecker.REFERENCE_TYPES)
+        ):
             TypeChecker.__error(
-                f'Cannot iterate over "{iterable_type}"', iterable_token
+                f'Cannot iterate over "{iterable_type.name}"',
+                iterable_node.line,
+                iterable_node.col,
             )
 
     @staticmethod
-    def check_return_statement(func_symbol, curr_returned, return_token):
-        if func_symbol.type_ != curr_returned:
+    def check_return_statement(func_symbol, curr_returned, return_node):
+        # A generator function yields its values and returns nothing.
+        expected = (
+            None
+            if isinstance(func_symbol.type_, GeneratorTypeSymbol)
+            else func_symbol.type_
+        )
+
+        if expected is not curr_returned:
             TypeChecker.__error(
                 f'Function "{func_symbol.name[5:]}" returns "{"nothing" if curr_returned is None else curr_returned.name}" '
-                f'but should return "{"nothing" if func_symbol.type_ is None else func_symbol.type_.name}"',
-                return_token,
+                f'but should return "{"nothing" if expected is None else expected.name}"',
+                return_node.line,
+                return_node.col,
             )
 
     @staticmethod
-    def __check_arithmetic_op(op_token, left_node_type, right_node_type):
+    def __check_arithmetic_op(op, left_node_type, right_node_type, op_line, op_col):
         match (left_node_type, right_node_type):
-            case (Token.K_STR, _) | (_, Token.K_STR):
-                if op_token.type_ == Token.PLUS:
-                    return BuiltInTypeSymbol(Token.K_STR)
+            case (Types.STR, _) | (_, Types.STR):
+                if op == Token.PLUS:
+                    return Types.STR
 
-                if op_token.type_ in Token.MULTIPLICATION and Token.K_INT in (
+                if op == Token.MULTIPLICATION and Types.INT in (
                     left_node_type,
                     right_node_type,
                 ):
-                    return BuiltInTypeSymbol(Token.K_STR)
+                    return Types.STR
 
                 TypeChecker.__error(
-                    f'"{op_token.val}" operator cannot be used with "{left_node_type}" and "{right_node_type}"',
-                    op_token,
+                    f'"{Token.NAMES[op]}" operator cannot be used with "{left_node_type.name}" and "{right_node_type.name}"',
+                    op_line,
+                    op_col,
                 )
 
-            case (Token.K_BOOL, _) | (_, Token.K_BOOL):
+            case (Types.BOOL, _) | (_, Types.BOOL):
                 TypeChecker.__error(
-                    f'"{op_token.val}" operator cannot be used with "{left_node_type}" and "{right_node_type}"',
-                    op_token,
+                    f'"{Token.NAMES[op]}" operator cannot be used with "{left_node_type.name}" and "{right_node_type.name}"',
+                    op_line,
+                    op_col,
                 )
 
-            case (Token.K_FLOAT, _) | (_, Token.K_FLOAT):
-                if op_token.type_ in Token.INT_DIVISION:
-                    return BuiltInTypeSymbol(Token.K_INT)
-
-                return BuiltInTypeSymbol(Token.K_FLOAT)
+            case (Types.FLOAT, _) | (_, Types.FLOAT):
+                return Types.FLOAT
 
             case (_, _):
-                return BuiltInTypeSymbol(Token.K_INT)
+                # "/" divides ints into a float.
+                if op == Token.FLOAT_DIVISION:
+                    return Types.FLOAT
+
+                return Types.INT
 
     @staticmethod
-    def __check_comparison_op(op_token, left_node_type, right_node_type):
+    def __check_comparison_op(op, left_node_type, right_node_type, op_line, op_col):
         match (left_node_type, right_node_type):
-            case (Token.K_STR, Token.K_STR):
-                return BuiltInTypeSymbol(Token.K_BOOL)
+            case (Types.STR, Types.STR):
+                return Types.BOOL
 
-            case (Token.K_STR, _) | (_, Token.K_STR) | (Token.K_BOOL, _) | (
+            case (Types.STR, _) | (_, Types.STR) | (Types.BOOL, _) | (
                 _,
-                Token.K_BOOL,
+                Types.BOOL,
             ):
                 TypeChecker.__error(
-                    f'"{op_token.val}" operator cannot be used with "{left_node_type}" and "{right_node_type}"',
-                    op_token,
+                    f'"{Token.NAMES[op]}" operator cannot be used with "{left_node_type.name}" and "{right_node_type.name}"',
+                    op_line,
+                    op_col,
                 )
 
             case (_, _):
-                return BuiltInTypeSymbol(Token.K_BOOL)
+                return Types.BOOL
 
     @staticmethod
-    def __error(error_message, token):
+    def __error(error_message, line, col):
         raise SemanticError(
-            error_message + f" in line: {token.line}, column: {token.col}",
+            error_message + f" in line: {line}, column: {col}",
         )
@@ -0,0 +1,465 @@
+import operator
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional; without it every loop is interpreted.
+    numpy = None
+
+from .abstract_syntax_tree import (
+    VarNode,
+    AccessNode,
+    NumberNode,
+    EmptyStatementNode,
+    AssignmentStatementNode,
+    NegNode,
+    PosNode,
+    AddNode,
+    SubNode,
+    MulNode,
+    IntDivNode,
+    FloatDivNode,
+    ModNode,
+    NaryOpNode,
+    BINARY_OP_NODES,
+)
+from .symbol_table import BuiltInTypeSymbol, Types
+from .tokens import Token
+
+_INT64_MAX = 2**63 - 1
+# The largest int that a float holds exactly, so that "/" on ints is rounded
+# like in Python.
+_EXACT_FLOAT_INT_MAX = 2**53
+
+_NUMBER_TYPES = (BuiltInTypeSymbol.INT, BuiltInTypeSymbol.FLOAT)
+_NUMBER_ARRAY_TYPES = (Types.INT_ARRAY.name, Types.FLOAT_ARRAY.name)
+
+# The Python operator of each arithmetic node; NumPy applies the same ones to
+# arrays element by element.
+_ARITHMETIC_FUNCS = {
+    AddNode: operator.add,
+    SubNode: operator.sub,
+    MulNode: operator.mul,
+    IntDivNode: operator.floordiv,
+    FloatDivNode: operator.truediv,
+    ModNode: operator.mod,
+}
+_ARITHMETIC_NODES = tuple(_ARITHMETIC_FUNCS)
+_ARITHMETIC_KINDS = frozenset(
+    BINARY_OP_NODES.index(node_class) for node_class in _ARITHMETIC_NODES
+)
+
+
+class _NotVectorizable(Exception):
+    """
+    Raised when a loop cannot be run in one batch with the values it has at
+    run time, so that the interpreter runs it instead.
+    """
+
+
+class _Store:
+    """
+    "array[i] = expr", where "i" is the loop variable.
+    """
+
+    def __init__(self, array_name, expr_node):
+        self.array_name = array_name
+        self.expr_node = expr_node
+
+
+class _Accumulate:
+    """
+    "var += expr" or "var -= expr", where "var" is not used anywhere else in the
+    loop.
+    """
+
+    def __init__(self, var_name, expr_node, is_sub):
+        self.var_name = var_name
+        self.expr_node = expr_node
+        self.is_sub = is_sub
+
+
+class LoopVectorizer:
+    """
+    Runs a for loop over a range as NumPy array operations, all iterations at
+    once, when the loop body only does int and float arithmetic on the loop
+    variable and writes it to array elements indexed by the loop variable or
+    to accumulators. Every iteration then only touches its own array elements,
+    so the statements can be run one after another over the whole range.
+
+    Each batch gives the same result as the interpreter: if an int could
+    overflow 64 bits, a divisor is zero or an index is out of range, nothing is
+    written and the interpreter runs the loop, and reports the error if there
+    is one.
+    """
+
+    MIN_ITERATIONS = 32  # Shorter loops are faster to interpret.
+
+    def __init__(self):
+        self.__plans = {}  # ForStatementNode -> its statements, or None
+
+    @staticmethod
+    def is_available():
+        return numpy is not None
+
+    def run(self, for_node, iterable, stack_frame):
+        """
+        Run the loop and return True, or return False if the interpreter has
+        to run it. "stack_frame" is the frame of the loop.
+        """
+        if not isinstance(iterable, range) or len(iterable) < self.MIN_ITERATIONS:
+            return False
+
+        if for_node not in self.__plans:
+            self.__plans[for_node] = self.__plan(for_node)
+
+        plan = self.__plans[for_node]
+
+        if plan is None:
+            return False
+
+        loop_var_name, statements = plan
+
+        try:
+            # Like Python floats, the arrays overflow to inf without a warning.
+            with numpy.errstate(all="ignore"):
+                _Batch(loop_var_name, iterable, stack_frame).run(statements)
+        except _NotVectorizable:
+            return False
+
+        return True
+
+    ############
+    # Planning #
+    ############
+    def __plan(self, for_node):
+        """
+        Return the loop variable name and the _Store and _Accumulate statements of
+        the loop body, or None if the body does not qualify.
+        """
+        loop_var_name = for_node.var_decl_statement_node.variables[0].val
+        statements = []
+
+        for statement in for_node.statement_list_node.statements:
+            if isinstance(statement, EmptyStatementNode):
+                continue
+
+            if not isinstance(statement, AssignmentStatementNode):
+                return None
+
+            statement = self.__plan_assignment(statement, loop_var_name)
+
+            if statement is None:
+                return None
+
+            statements.append(statement)
+
+        if not statements:
+            return None
+
+        read_names = set()
+
+        for statement in statements:
+            if not self.__check_expr(statement.expr_node, loop_var_name, read_names):
+                return None
+
+        accumulator_names = [
+            statement.var_name
+            for statement in statements
+            if isinstance(statement, _Accumulate)
+        ]
+
+        # An accumulator is only written by its own statement and never read,
+        # so the order in which its terms are added does not show.
+        if len(set(accumulator_names)) != len(
+            accumulator_names
+        ) or not read_names.isdisjoint(accumulator_names):
+            return None
+
+        return loop_var_name, statements
+
+    @staticmethod
+    def __plan_assignment(ast_node, loop_var_name):
+        left_node = ast_node.left_node
+        right_node = ast_node.right_node
+
+        if type(left_node) is AccessNode:
+            if not LoopVectorizer.__is_loop_var_access(left_node, loop_var_name):
+                return None
+
+            return _Store(left_node.accessor_node.val, right_node)
+
+        if (
+            left_node.val == loop_var_name
+            or left_node.type_ not in _NUMBER_TYPES
+            or ast_node.op not in (Token.PLUS_ASSIGN, Token.MINUS_ASSIGN)
+        ):
+            return None
+
+        return _Accumulate(
+            left_node.val, right_node.right_node, isinstance(right_node, SubNode)
+        )
+
+    @staticmethod
+    def __is_loop_var_access(ast_node, loop_var_name):
+        accessor_node = ast_node.accessor_node
+        index_node = ast_node.start_index_node
+
+        return (
+            isinstance(accessor_node, VarNode)
+            and accessor_node.type_ in _NUMBER_ARRAY_TYPES
+            and isinstance(index_node, VarNode)
+            and index_node.val == loop_var_name
+            and ast_node.end_index_node is None
+        )
+
+    @staticmethod
+    def __check_expr(ast_node, loop_var_name, read_names):
+        """
+        Check that the expression only does int and float arithmetic, and add the
+        names of the scalar variables it reads to "read_names".
+        """
+        check_expr = LoopVectorizer.__check_expr
+
+        if isinstance(ast_node, NumberNode):
+            return True
+
+        if isinstance(ast_node, VarNode):
+            if ast_node.val != loop_var_name:
+                read_names.add(ast_node.val)
+
+            return ast_node.type_ in _NUMBER_TYPES
+
+        if type(ast_node) is AccessNode:
+            return LoopVectorizer.__is_loop_var_access(ast_node, loop_var_name)
+
+        if isinstance(ast_node, (NegNode, PosNode)):
+            return check_expr(ast_node.child_node, loop_var_name, read_names)
+
+        if isinstance(ast_node, _ARITHMETIC_NODES):
+            return check_expr(
+                ast_node.left_node, loop_var_name, read_names
+            ) and check_expr(ast_node.right_node, loop_var_name, read_names)
+
+        if isinstance(ast_node, NaryOpNode):
+            return _ARITHMETIC_KINDS.issuperset(ast_node.op_kinds) and all(
+                check_expr(operand_node, loop_var_name, read_names)
+                for operand_node in ast_node.operand_nodes
+            )
+
+        return False
+
+
+class _Batch:
+    """
+    One run of a planned loop. The array elements the loop writes are staged in
+    NumPy arrays and only written back once every statement has run, so that
+    the interpreter can still run the loop from the start.
+    """
+
+    def __init__(self, loop_var_name, iterable, stack_frame):
+        if max(abs(iterable.start), abs(iterable.stop)) > _INT64_MAX:
+            raise _NotVectorizable()
+
+        self.__loop_var_name = loop_var_name
+        self.__stack_frame = stack_frame
+
+        self.__indices = numpy.arange(
+            iterable.start, iterable.stop, iterable.step, dtype=numpy.int64
+        )
+        self.__min_index = min(iterable[0], iterable[-1])
+        self.__max_index = max(iterable[0], iterable[-1])
+
+        # id of an array -> (the array, a NumPy view of it, the staged elements)
+        self.__columns = {}
+        self.__written_ids = set()
+
+    def run(self, statements):
+        stack_frame = self.__stack_frame
+        accumulated = []
+
+        for statement in statements:
+            val = self.__eval(statement.expr_node)
+
+            if isinstance(statement, _Store):
+                self.__store(statement.array_name, val)
+            else:
+                accumulated.append(
+                    (statement.var_name, self.__accumulate(statement, val))
+                )
+
+        for array_id in self.__written_ids:
+            _, view, column = self.__columns[array_id]
+            view[self.__indices] = column
+
+        # Drop the views, so that the arrays can be resized again.
+        self.__columns.clear()
+
+        for var_name, val in accumulated:
+            stack_frame.set_var(var_name, val=val)
+
+    def __column(self, array_name):
+        array_ = self.__stack_frame.get_var(array_name)
+
+        if array_ is None or self.__min_index < 0 or self.__max_index >= len(array_):
+            raise _NotVectorizable()
+
+        if id(array_) not in self.__columns:
+            view = numpy.frombuffer(
+                array_, dtype=numpy.int64 if array_.typecode == "q" else numpy.float64
+            )
+            self.__columns[id(array_)] = (array_, view, view[self.__indices])
+
+        return self.__columns[id(array_)]
+
+    def __store(self, array_name, val):
+        array_, view, column = self.__column(array_name)
+
+        if column.dtype == numpy.int64:
+            # The interpreter cannot store a float in an int array either.
+            if not _is_int(val):
+                raise _NotVectorizable()
+
+            _check_int(val)
+
+        column = numpy.empty_like(column)
+        column[...] = val
+
+        self.__columns[id(array_)] = (array_, view, column)
+        self.__written_ids.add(id(array_))
+
+    def __accumulate(self, statement, val):
+        """
+        Return the value of the accumulator after the loop.
+        """
+        total = self.__stack_frame.get_var(statement.var_name)
+
+        # An int accumulator must stay an int.
+        if total is None or (isinstance(total, int) and not _is_int(val)):
+            raise _NotVectorizable()
+
+        _check_int(val)
+
+        terms = numpy.broadcast_to(val, self.__indices.shape)
+
+        if statement.is_sub:
+            terms = -terms
+
+        if isinstance(total, int) and terms.dtype == numpy.int64:
+            if abs(total) + len(terms) * _max_abs(terms) > _INT64_MAX:
+                raise _NotVectorizable()
+
+            return total + int(terms.sum())
+
+        # The terms are added one by one, like the interpreter does, so the
+        # rounding is the same.
+        return numpy.add.accumulate(
+            numpy.concatenate(([float(total)], terms.astype(numpy.float64)))
+        )[-1].item()
+
+    ##############
+    # Evaluation #
+    ##############
+    # A value is a NumPy array with an element per iteration, or a Python int or
+    # float when it is the same in every iteration.
+    def __eval(self, ast_node):
+        if isinstance(ast_node, NumberNode):
+            return ast_node.val
+
+        if isinstance(ast_node, VarNode):
+            if ast_node.val == self.__loop_var_name:
+                return self.__indices
+
+            val = self.__stack_frame.get_var(ast_node.val)
+
+            if val is None:
+                raise _NotVectorizable()
+
+            return val
+
+        if isinstance(ast_node, AccessNode):
+            return self.__column(ast_node.accessor_node.val)[2]
+
+        if isinstance(ast_node, NegNode):
+            val = self.__eval(ast_node.child_node)
+            _check_int(val)
+            return -val
+
+        if isinstance(ast_node, PosNode):
+            return self.__eval(ast_node.child_node)
+
+        if isinstance(ast_node, NaryOpNode):
+            operand_nodes = ast_node.operand_nodes
+            result = self.__eval(operand_nodes[0])
+
+            for i, op_kind in enumerate(ast_node.op_kinds, start=1):
+                result = _apply(
+                    BINARY_OP_NODES[op_kind],
+                    result,
+                    self.__eval(operand_nodes[i]),
+                )
+
+            return result
+
+        return _apply(
+            type(ast_node),
+            self.__eval(ast_node.left_node),
+            self.__eval(ast_node.right_node),
+        )
+
+
+def _is_int(val):
+    if isinstance(val, numpy.ndarray):
+        return val.dtype == numpy.int64
+
+    return isinstance(val, int)
+
+
+def _max_abs(val):
+    if isinstance(val, numpy.ndarray):
+        if val.size == 0:
+            return 0
+
+        return max(int(val.max()), -int(val.min()))
+
+    return abs(val)
+
+
+def _check_int(val, limit=_INT64_MAX):
+    if _is_int(val) and _max_abs(val) > limit:
+        raise _NotVectorizable()
+
+
+def _apply(node_class, left_val, right_val):
+    """
+    Apply the arithmetic operator of "node_class" the way Python applies it to
+    each pair of elements.
+    """
+    if not (
+        isinstance(left_val, numpy.ndarray) or isinstance(right_val, numpy.ndarray)
+    ):
+        try:
+            return _ARITHMETIC_FUNCS[node_class](left_val, right_val)
+        except ZeroDivisionError:
+            raise _NotVectorizable()
+
+    _check_int(left_val)
+    _check_int(right_val)
+
+    if _is_int(left_val) and _is_int(right_val):
+        left_max, right_max = _max_abs(left_val), _max_abs(right_val)
+
+        if (node_class in (AddNode, SubNode) and left_max + right_max > _INT64_MAX) or (
+            node_class is MulNode and left_max * right_max > _INT64_MAX
+        ):
+            raise _NotVectorizable()
+
+        if node_class is FloatDivNode:
+            _check_int(left_val, _EXACT_FLOAT_INT_MAX)
+            _check_int(right_val, _EXACT_FLOAT_INT_MAX)
+
+    if node_class in (IntDivNode, FloatDivNode, ModNode) and numpy.any(
+        numpy.equal(right_val, 0)
+    ):
+        raise _NotVectorizable()
+
+    return _ARITHMETIC_FUNCS[node_class](left_val, right_val)
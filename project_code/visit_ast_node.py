@@ -5,8 +5,15 @@ class ASTNodeVisitor:
 
     def no_visit(self, ast_node):
         """
-        Raise an exception if no visit method is implemented for a node.
+        Visit a node like the closest base class that has a visit method, e.g. an
+        AddNode as a BinaryOpNode. Raise an exception if there is none.
         """
+        for node_class in type(ast_node).__mro__[1:]:
+            execute = getattr(self, "visit" + node_class.__name__, None)
+
+            if execute is not None:
+                return execute(ast_node)
+
         raise NotImplementedError(
             f'NotImplementedError: "visit{type(ast_node).__name__}" not implemented.'
         )
@@ -0,0 +1,33 @@
+import unittest
+
+from project_code.abstract_syntax_tree import AccessNode, ArrayNode, FuncCallNode
+from project_code.lexer import Lexer
+from project_code.parser_ import Parser
+
+
+def parse_statement(source):
+    return Parser(Lexer(source)).parse().statement_list_node.statements[0]
+
+
+class ArrayLiteralTest(unittest.TestCase):
+    def test_parenthesised_array_literal(self):
+        statement = parse_statement("len(([1, 2]));")
+
+        self.assertIsInstance(statement, FuncCallNode)
+        self.assertIsInstance(statement.args[0], ArrayNode)
+
+    def test_parenthesised_array_literal_in_comparison(self):
+        statement = parse_statement("var(bool) b = ([1, 2] == [1, 2]);")
+        comparison = statement.variables[0].right_node
+
+        self.assertIsInstance(comparison.left_node, ArrayNode)
+        self.assertIsInstance(comparison.right_node, ArrayNode)
+
+    def test_accessors(self):
+        for source in ('println(a[0]);', 'println("abc"[1]);'):
+            with self.subTest(source=source):
+                self.assertIsInstance(parse_statement(source).args[0], AccessNode)
+
+
+if __name__ == "__main__":
+    unittest.main()
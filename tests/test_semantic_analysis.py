@@ -0,0 +1,44 @@
+import unittest
+
+from project_code.embedding import check_program
+from project_code.error import SemanticError
+
+
+class FloatDivisionTest(unittest.TestCase):
+    def test_int_division_with_slash_is_float(self):
+        for source in (
+            "var(int[]) a = [1]; append(a, 3 / 2);",
+            "var(int[]) a = [1]; a[0] = 3 / 2;",
+            "var(int[]) a = [1 / 2];",
+            "var(int) n = 4 / 2;",
+        ):
+            with self.subTest(source=source):
+                with self.assertRaises(SemanticError):
+                    check_program(source)
+
+    def test_float_division_assigns_to_float(self):
+        check_program("var(float) f = 3 / 2; var(float[]) a = [1 / 2];")
+
+
+class ConversionTest(unittest.TestCase):
+    def test_collections_cannot_be_converted(self):
+        sources = [
+            "var(int[]) a = [1, 2]; println(toint(a));",
+            "var(map(str, int)) m; println(tofloat(m));",
+            "var(str[]) a; println(tobool(a));",
+            "func(gen int) g() { yield 1; } println(tostr(g()));",
+        ]
+
+        for source in sources:
+            with self.subTest(source=source):
+                with self.assertRaises(SemanticError):
+                    check_program(source)
+
+    def test_scalars_can_be_converted(self):
+        check_program(
+            'println(toint("1"), tofloat(1), tobool(0), tostr(1.5), tostr(true));'
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()